@@ -0,0 +1,270 @@
+"""
+Repeatable benchmarks for the data, model, wellness and UI hot paths.
+
+Writes machine-readable results as JSON and can compare them against a saved
+baseline, exiting non-zero when any metric regresses beyond the threshold.
+
+Usage:
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --baseline bench_baseline.json --threshold 0.2
+    python -m benchmarks.run_benchmarks --only dataset wellness
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Metric units: times and sizes are lower-is-better, throughputs and accuracy are
+# higher-is-better. compare() skips metrics whose unit is in neither set.
+LOWER_IS_BETTER = {'s', 'ms', 'us', 'bytes'}
+HIGHER_IS_BETTER = {'rows/s', 'r2'}
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a benchmark function that returns {metric: (value, unit)}"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def best_of(func, repeat=3):
+    """Best wall-clock time in seconds over `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def latency_percentiles(func, calls, warmup=20):
+    """p50/p99 latency in microseconds of `calls` sequential calls"""
+    for _ in range(warmup):
+        func()
+    timings = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        func()
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1e6, np.percentile(timings, 99) * 1e6
+
+def sample_members(n_rows, seed=0):
+    """Synthetic member rows with both premium and wellness inputs"""
+    from data.insurance_data import iter_insurance_data
+    members = next(iter_insurance_data(n_rows, chunk_size=n_rows, seed=seed)).drop(columns='charges')
+    rng = np.random.default_rng(seed)
+    members['exercise_freq'] = rng.integers(0, 8, n_rows)
+    members['diet_quality'] = rng.choice(["Poor", "Fair", "Good", "Excellent"], n_rows)
+    members['sleep_hours'] = rng.integers(4, 13, n_rows)
+    members['stress_level'] = rng.integers(1, 11, n_rows)
+    return members
+
+def trained_predictor(compiled=False):
+    from ml_model import InsurancePremiumPredictor
+    predictor = InsurancePremiumPredictor()
+    predictor.load_or_train(compiled=compiled)
+    return predictor
+
+@benchmark('dataset')
+def bench_dataset():
+    from data.insurance_data import get_insurance_data, iter_insurance_data
+    results = {}
+    for n_samples in (1338, 100_000, 1_000_000):
+        seconds = best_of(lambda: get_insurance_data(n_samples))
+        results[f'get_insurance_data[{n_samples}]'] = (seconds * 1e3, 'ms')
+    seconds = best_of(lambda: sum(len(chunk) for chunk in iter_insurance_data(5_000_000)), repeat=1)
+    results['iter_insurance_data[5000000]'] = (5_000_000 / seconds, 'rows/s')
+    return results
+
+@benchmark('training')
+def bench_training():
+    from ml_model import InsurancePremiumPredictor
+
+    def train():
+        InsurancePremiumPredictor().train_model()
+
+    return {'train_model': (best_of(train), 's')}
+
+@benchmark('backends')
+def bench_backends():
+    from ml_model import InsurancePremiumPredictor, MODEL_BACKENDS
+    results = {}
+    for backend in MODEL_BACKENDS:
+        predictor = InsurancePremiumPredictor(backend=backend)
+        predictor.train_model()
+        profile = predictor.get_backend_profile()
+        results[f'{backend}.fit'] = (profile['fit_seconds'], 's')
+        results[f'{backend}.latency_p50'] = (profile['latency_p50_us'], 'us')
+        results[f'{backend}.model_size'] = (profile['model_bytes'], 'bytes')
+        results[f'{backend}.r2'] = (profile['r2'], 'r2')
+    return results
+
+@benchmark('distillation')
+def bench_distillation():
+    from ml_model import distill_model
+    student, report = distill_model(trained_predictor())
+    results = {}
+    for row in (report[0], next((r for r in report if r['model'] == 'student' and r['within_budget']), None)):
+        if row is None:
+            continue
+        results[f"{row['model']}.model_size"] = (row['model_bytes'], 'bytes')
+        results[f"{row['model']}.latency_p50"] = (row['latency_p50_us'], 'us')
+        results[f"{row['model']}.r2"] = (row['r2'], 'r2')
+    return results
+
+@benchmark('prediction')
+def bench_prediction():
+    results = {}
+    members = sample_members(200_000)
+    for compiled in (False, True):
+        predictor = trained_predictor(compiled=compiled)
+        label = 'compiled' if compiled else 'live'
+        p50, p99 = latency_percentiles(
+            lambda: predictor.predict_premium(35, 'male', 27.3, 1, 'no', 'southeast'),
+            calls=200 if not compiled else 5000
+        )
+        results[f'predict_premium[{label}].p50'] = (p50, 'us')
+        results[f'predict_premium[{label}].p99'] = (p99, 'us')
+        seconds = best_of(lambda: predictor.predict_premium_batch(members), repeat=1)
+        results[f'predict_premium_batch[{label}]'] = (len(members) / seconds, 'rows/s')
+    return results
+
+@benchmark('wellness')
+def bench_wellness():
+    from wellness_calculator import WellnessCalculator
+    wellness_calc = WellnessCalculator()
+    members = sample_members(1_000_000)
+    columns = [members[col] for col in ('bmi', 'exercise_freq', 'diet_quality', 'smoker',
+                                         'sleep_hours', 'stress_level')]
+    rows = list(zip(*(col.to_numpy()[:20_000] for col in columns)))
+
+    scalar_seconds = best_of(lambda: [wellness_calc.calculate_wellness_score(*row) for row in rows])
+    batch_seconds = best_of(lambda: wellness_calc.calculate_wellness_score_batch(*columns))
+
+    from wellness_report import ReportText, score_members
+    text = ReportText(wellness_calc)
+    report_seconds = best_of(lambda: text.expand_report(score_members(members, wellness_calc)))
+    return {
+        'calculate_wellness_score': (len(rows) / scalar_seconds, 'rows/s'),
+        'calculate_wellness_score_batch': (len(members) / batch_seconds, 'rows/s'),
+        'wellness_report.score+expand': (len(members) / report_seconds, 'rows/s'),
+    }
+
+@benchmark('figures')
+def bench_figures():
+    from utils.visualization import (create_wellness_gauge, create_discount_tier_chart,
+                                     create_wellness_breakdown_chart)
+    breakdown = {"BMI Score": 15, "Exercise Score": 12, "Diet Score": 10,
+                 "Smoking Score": 20, "Sleep Score": 20, "Stress Score": 15}
+    results = {}
+    for name, build in (
+        ('create_wellness_gauge', lambda: create_wellness_gauge(72.5)),
+        ('create_discount_tier_chart', create_discount_tier_chart),
+        ('create_wellness_breakdown_chart', lambda: create_wellness_breakdown_chart(breakdown)),
+    ):
+        build()
+        results[f'{name}.build'] = (best_of(build, repeat=20) * 1e3, 'ms')
+        results[f'{name}.build+json'] = (best_of(lambda: build().to_json(), repeat=20) * 1e3, 'ms')
+    return results
+
+@benchmark('what_if')
+def bench_what_if():
+    from wellness_calculator import WellnessCalculator
+    from what_if import SWEEP_LABELS, sweep_values, what_if_surface
+    from utils.visualization import create_what_if_chart
+    profile = dict(age=35, sex='male', bmi=27.3, children=1, smoker='no', region='southeast',
+                   exercise_freq=3, diet_quality='Good', sleep_hours=7, stress_level=5)
+    sweeps = {'age': sweep_values('age'), 'bmi': sweep_values('bmi')}
+    predictor, wellness_calc = trained_predictor(compiled=True), WellnessCalculator()
+
+    def render():
+        surface = what_if_surface(profile, sweeps, predictor, wellness_calc)
+        return create_what_if_chart(surface, list(sweeps), SWEEP_LABELS, profile).to_json()
+
+    render()
+    return {'what_if_surface[age x bmi].render': (best_of(render, repeat=5) * 1e3, 'ms')}
+
+@benchmark('simulation')
+def bench_simulation():
+    from portfolio_simulation import SCENARIOS, simulate_portfolio
+    results = {}
+    trained_predictor(compiled=True)
+    for n_jobs in sorted({1, os.cpu_count() or 1}):
+        simulation = simulate_portfolio(
+            {name: SCENARIOS[name] for name in ('baseline', 'smokers_quit_10pct')},
+            n_members=1_000_000, n_jobs=n_jobs
+        )
+        results[f'simulate_portfolio[jobs={n_jobs}]'] = (simulation['members_per_second'], 'rows/s')
+    return results
+
+def run(names=None):
+    """Run the selected benchmarks (all by default) and return the results document"""
+    metrics = {}
+    for name, func in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        start = time.perf_counter()
+        for metric, (value, unit) in func().items():
+            metrics[f'{name}.{metric}'] = {'value': float(value), 'unit': unit}
+        print(f"{name}: done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'metrics': metrics,
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Return (metric, baseline, current, change) tuples for metrics that regressed beyond
+    threshold; change is the relative worsening in the metric's unit direction.
+    """
+    regressions = []
+    for metric, current in results['metrics'].items():
+        previous = baseline.get('metrics', {}).get(metric)
+        if previous is None or previous['value'] == 0:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        if current['unit'] in HIGHER_IS_BETTER:
+            change = -change
+        elif current['unit'] not in LOWER_IS_BETTER:
+            continue
+        if change > threshold:
+            regressions.append((metric, previous['value'], current['value'], change))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the hot-path benchmark suite")
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    parser.add_argument('--baseline', help="Saved results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed slowdown as a fraction of the baseline (default 0.2 = 20%%)")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    args = parser.parse_args(argv)
+
+    results = run(args.only)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for metric, entry in results['metrics'].items():
+        print(f"{metric:<60} {entry['value']:>14,.2f} {entry['unit']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for metric, previous, current, change in regressions:
+            print(f"REGRESSION {metric}: {previous:,.2f} -> {current:,.2f} ({change:+.0%} worse)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
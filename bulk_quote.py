@@ -0,0 +1,220 @@
+"""
+Headless bulk quoting for member files.
+
+Streams a CSV or Parquet file in chunks, computes the base premium, wellness
+score, discount and final premium for every row and writes the results
+incrementally, so memory stays flat regardless of the input size.
+
+Usage:
+    python bulk_quote.py members.csv quotes.csv --chunk-size 100000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from ml_model import InsurancePremiumPredictor, FEATURE_COLUMNS, NUMERIC_COLUMNS
+from wellness_calculator import WellnessCalculator
+
+WELLNESS_COLUMNS = ['exercise_freq', 'diet_quality', 'sleep_hours', 'stress_level']
+NUMERIC_WELLNESS_COLUMNS = ['bmi', 'exercise_freq', 'sleep_hours', 'stress_level']
+INPUT_COLUMNS = FEATURE_COLUMNS + WELLNESS_COLUMNS
+QUOTE_COLUMNS = ['base_premium', 'wellness_score', 'discount_percentage', 'final_premium', 'error']
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+def coerce_wellness_columns(members):
+    """
+    Wellness inputs of a DataFrame of members with the numeric ones converted to
+    floats, and an object array with an error message per invalid row (None where
+    the row is valid), as encode_features does for the premium inputs.
+    """
+    wellness = {}
+    errors = np.full(len(members), None, dtype=object)
+    for col in ['bmi', 'smoker'] + WELLNESS_COLUMNS:
+        if col not in NUMERIC_WELLNESS_COLUMNS:
+            wellness[col] = members[col]
+            continue
+        values = pd.to_numeric(pd.Series(np.asarray(members[col]), copy=False), errors='coerce')
+        values = values.to_numpy(dtype=float)
+        errors[~np.isfinite(values) & pd.isna(errors)] = f"Invalid value for '{col}'"
+        wellness[col] = values
+    return wellness, errors
+
+def quote_members(members, predictor, wellness_calc):
+    """
+    Quote a DataFrame of members, returning the quote columns aligned with its rows.
+    Invalid rows get NaN premiums and the reason in 'error'.
+    """
+    base_premium, errors = predictor.predict_premium_batch(members[FEATURE_COLUMNS], return_errors=True)
+    wellness, wellness_errors = coerce_wellness_columns(members)
+    errors = np.where(pd.isna(errors), wellness_errors, errors)
+
+    wellness_score = wellness_calc.calculate_wellness_score_batch(
+        wellness['bmi'], wellness['exercise_freq'], wellness['diet_quality'],
+        wellness['smoker'], wellness['sleep_hours'], wellness['stress_level']
+    )
+    wellness_score = np.where(pd.isna(wellness_errors), wellness_score, np.nan)
+    discount_percentage = wellness_calc.get_discount_percentage_batch(wellness_score)
+
+    discount_amount = base_premium * (discount_percentage / 100)
+    final_premium = base_premium - discount_amount
+    final_premium[np.isnan(wellness_score)] = np.nan
+
+    return pd.DataFrame({
+        'base_premium': base_premium,
+        'wellness_score': wellness_score,
+        'discount_percentage': discount_percentage,
+        'final_premium': final_premium,
+        'error': errors
+    }, index=members.index)
+
+def coerce_numeric_inputs(members):
+    """
+    Copy of `members` with non-numeric and non-finite values in numeric input columns
+    replaced by NaN, so those rows are reported in 'error' instead of failing the chunk
+    """
+    members = members.copy()
+    for col in NUMERIC_COLUMNS + NUMERIC_WELLNESS_COLUMNS:
+        if col not in members:
+            continue
+        if members[col].dtype == object:
+            members[col] = pd.to_numeric(members[col], errors='coerce')
+        if members[col].dtype.kind == 'f':
+            members[col] = members[col].where(np.isfinite(members[col]))
+    return members
+
+def quote_output_schema():
+    """Parquet schema of the bulk quote output columns, so every chunk is written with the same types"""
+    pa = import_pyarrow()
+    numeric = set(NUMERIC_COLUMNS + NUMERIC_WELLNESS_COLUMNS)
+    return pa.schema(
+        [pa.field(col, pa.float64() if col in numeric else pa.string()) for col in INPUT_COLUMNS]
+        + [pa.field('base_premium', pa.float64()), pa.field('wellness_score', pa.float64()),
+           pa.field('discount_percentage', pa.int64()), pa.field('final_premium', pa.float64()),
+           pa.field('error', pa.string())]
+    )
+
+def import_pyarrow():
+    """pyarrow, which Parquet input and output need; raises ImportError with install instructions"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Reading or writing .parquet files needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+def read_chunks(path, chunk_size, columns=None, dtype=None):
+    """
+    Yield DataFrame chunks of `columns` (INPUT_COLUMNS by default) from a CSV or Parquet
+    file; `dtype` maps CSV columns to the type to read them as (Parquet columns keep theirs)
+    """
+    columns = columns or INPUT_COLUMNS
+    if path.endswith('.parquet'):
+        import_pyarrow()
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=dtype)
+
+class ChunkWriter:
+    """
+    Append result chunks to a CSV or Parquet file.
+    Parquet columns take their type from `schema` (a pyarrow schema, which may cover only
+    some columns); the others are typed from the first chunk, with all-null ones as strings.
+    """
+
+    def __init__(self, path, schema=None):
+        self.path = path
+        self.is_parquet = path.endswith('.parquet')
+        self.schema = schema
+        self.parquet_writer = None
+        self.rows_written = 0
+        if self.is_parquet:
+            import_pyarrow()
+
+    def _full_schema(self, chunk):
+        import pyarrow as pa
+
+        inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+        fields = []
+        for field in inferred:
+            if self.schema is not None and field.name in self.schema.names:
+                field = self.schema.field(field.name)
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def write(self, chunk):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.path, self._full_schema(chunk))
+            table = pa.Table.from_pandas(chunk, schema=self.parquet_writer.schema, preserve_index=False)
+            self.parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='w' if self.rows_written == 0 else 'a',
+                         header=self.rows_written == 0, index=False)
+        self.rows_written += len(chunk)
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+def run_bulk_quote(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, compiled=False, log=print,
+                   predictor=None):
+    """
+    Quote every row of `input_path` into `output_path`; returns (rows, seconds).
+    Uses `predictor` if given, otherwise loads or trains the default model.
+    """
+    if predictor is None:
+        predictor = InsurancePremiumPredictor()
+        predictor.load_or_train(compiled=compiled)
+    if not predictor.is_trained:
+        raise RuntimeError("Premium model could not be loaded or trained")
+    wellness_calc = WellnessCalculator()
+
+    writer = ChunkWriter(output_path, quote_output_schema() if output_path.endswith('.parquet') else None)
+    start = time.perf_counter()
+    try:
+        for chunk in read_chunks(input_path, chunk_size):
+            chunk_start = time.perf_counter()
+            chunk = coerce_numeric_inputs(chunk)
+            quotes = quote_members(chunk, predictor, wellness_calc)
+            writer.write(pd.concat([chunk, quotes], axis=1))
+
+            elapsed = time.perf_counter() - start
+            log(f"{writer.rows_written:,} rows quoted "
+                f"({len(chunk) / max(time.perf_counter() - chunk_start, 1e-9):,.0f} rows/sec this chunk, "
+                f"{writer.rows_written / max(elapsed, 1e-9):,.0f} rows/sec overall)")
+    finally:
+        writer.close()
+
+    return writer.rows_written, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quote premiums for a CSV or Parquet member file")
+    parser.add_argument('input', help="Member file (.csv or .parquet) with columns: " + ", ".join(INPUT_COLUMNS))
+    parser.add_argument('output', help="Output file (.csv or .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument('--compiled', action='store_true', help="Serve quotes from the compiled premium table")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not os.path.exists(args.input):
+        parser.error(f"Input file not found: {args.input}")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    rows, seconds = run_bulk_quote(args.input, args.output, args.chunk_size, args.compiled, log=log)
+    log(f"Done: {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+
+if __name__ == "__main__":
+    main()
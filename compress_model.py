@@ -0,0 +1,57 @@
+"""
+Distill the trained premium model into a compact forest for serving.
+
+Loads (or trains) the configured model, distills it under an error budget
+and writes the smallest student that fits as a standalone artifact, which
+quote_service.py can serve with --model.
+
+Usage:
+    python compress_model.py models/premium_model-compact.joblib --max-r2-loss 0.005
+"""
+import argparse
+import logging
+import sys
+from ml_model import InsurancePremiumPredictor, distill_model, DEFAULT_MAX_R2_LOSS, DEFAULT_TRANSFER_SAMPLES
+
+def format_report(report):
+    """Side-by-side table of distill_model() report rows"""
+    lines = [f"{'model':<36} {'bytes':>12} {'p50 us':>10} {'r2':>8} {'rmse':>10} {'r2 loss':>9} {'budget':>7}"]
+    for row in report:
+        name = row['model'] + (' ' + ','.join(f"{k}={v}" for k, v in row['params'].items()) if row['params'] else '')
+        lines.append(
+            f"{name:<36} {row['model_bytes']:>12,} {row['latency_p50_us']:>10.0f} {row['r2']:>8.4f} "
+            f"{row['rmse']:>10.1f} {row['r2_loss']:>9.4f} {'ok' if row['within_budget'] else '-':>7}"
+        )
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distill the premium model into a compact forest")
+    parser.add_argument('output', help="Path of the compact model artifact")
+    parser.add_argument('--max-r2-loss', type=float, default=DEFAULT_MAX_R2_LOSS,
+                        help="Largest allowed drop in held-out r2")
+    parser.add_argument('--max-rmse-increase', type=float, default=None,
+                        help="Largest allowed relative increase in held-out RMSE, e.g. 0.02")
+    parser.add_argument('--transfer-samples', type=int, default=DEFAULT_TRANSFER_SAMPLES,
+                        help="Synthetic rows labelled by the original model to train the student")
+    parser.add_argument('--evaluate-all', action='store_true', help="Report every candidate, not just up to the first fit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    teacher = InsurancePremiumPredictor()
+    teacher.load_or_train()
+    if not teacher.is_trained:
+        raise SystemExit("Premium model could not be loaded or trained")
+
+    student, report = distill_model(teacher, args.max_r2_loss, args.max_rmse_increase,
+                                    transfer_samples=args.transfer_samples, evaluate_all=args.evaluate_all)
+    print(format_report(report))
+    if student is None:
+        print("No candidate fits the error budget", file=sys.stderr)
+        return 1
+
+    student.save_model(args.output)
+    print(f"Wrote {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import numpy as np
+
+DEFAULT_HISTORY_DB = os.environ.get(
+    'HEALSURE_HISTORY_DB',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'premium_history.db')
+)
+
+# Fields of a premium calculation record, in table column order
+HISTORY_FIELDS = [
+    'base_premium', 'wellness_score', 'discount_percentage', 'final_premium',
+    'age', 'bmi', 'exercise_freq', 'diet_quality', 'sleep_hours', 'stress_level'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS premium_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    base_premium REAL NOT NULL,
+    wellness_score REAL NOT NULL,
+    discount_percentage REAL NOT NULL,
+    final_premium REAL NOT NULL,
+    age INTEGER,
+    bmi REAL,
+    exercise_freq INTEGER,
+    diet_quality TEXT,
+    sleep_hours INTEGER,
+    stress_level INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_premium_history_user_date ON premium_history (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_premium_history_date ON premium_history (date);
+CREATE TRIGGER IF NOT EXISTS premium_history_append_only
+BEFORE UPDATE ON premium_history
+BEGIN
+    SELECT RAISE(ABORT, 'premium_history records are append-only');
+END;
+
+-- Running per-user aggregates, updated in O(1) per inserted or deleted record
+CREATE TABLE IF NOT EXISTS premium_history_summary (
+    user_id TEXT PRIMARY KEY,
+    record_count INTEGER NOT NULL,
+    sum_base_premium REAL NOT NULL,
+    sum_wellness_score REAL NOT NULL,
+    sum_discount_percentage REAL NOT NULL,
+    total_savings REAL NOT NULL,
+    last_id INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS premium_history_summary_insert
+AFTER INSERT ON premium_history
+BEGIN
+    INSERT INTO premium_history_summary VALUES (
+        NEW.user_id, 1, NEW.base_premium, NEW.wellness_score, NEW.discount_percentage,
+        NEW.base_premium - NEW.final_premium, NEW.id
+    )
+    ON CONFLICT (user_id) DO UPDATE SET
+        record_count = record_count + 1,
+        sum_base_premium = sum_base_premium + excluded.sum_base_premium,
+        sum_wellness_score = sum_wellness_score + excluded.sum_wellness_score,
+        sum_discount_percentage = sum_discount_percentage + excluded.sum_discount_percentage,
+        total_savings = total_savings + excluded.total_savings,
+        last_id = excluded.last_id;
+END;
+CREATE TRIGGER IF NOT EXISTS premium_history_summary_delete
+AFTER DELETE ON premium_history
+BEGIN
+    UPDATE premium_history_summary SET
+        record_count = record_count - 1,
+        sum_base_premium = sum_base_premium - OLD.base_premium,
+        sum_wellness_score = sum_wellness_score - OLD.wellness_score,
+        sum_discount_percentage = sum_discount_percentage - OLD.discount_percentage,
+        total_savings = total_savings - (OLD.base_premium - OLD.final_premium)
+    WHERE user_id = OLD.user_id;
+END;
+"""
+
+# Column dtypes of PremiumHistoryBuffer. Dates are nanoseconds since the epoch,
+# diet_quality holds int8 codes into the buffer's category list (-1 when missing),
+# and missing integer fields are stored as -1.
+BUFFER_DTYPES = {
+    'date': np.int64,
+    'base_premium': np.float64,
+    'wellness_score': np.float64,
+    'discount_percentage': np.float32,
+    'final_premium': np.float64,
+    'age': np.int16,
+    'bmi': np.float32,
+    'exercise_freq': np.int8,
+    'diet_quality': np.int8,
+    'sleep_hours': np.int8,
+    'stress_level': np.int8,
+}
+BUFFER_INITIAL_CAPACITY = 64
+
+# Rebuilds the running aggregates for databases created before the summary table existed
+BACKFILL_SUMMARY = """
+INSERT INTO premium_history_summary
+SELECT user_id, COUNT(*), SUM(base_premium), SUM(wellness_score), SUM(discount_percentage),
+       SUM(base_premium - final_premium), MAX(id)
+FROM premium_history
+WHERE user_id NOT IN (SELECT user_id FROM premium_history_summary)
+GROUP BY user_id
+"""
+
+class PremiumHistoryStore:
+    """
+    Durable per-user premium history backed by SQLite in WAL mode.
+    Records are append-only; each thread gets its own connection, so one store
+    can be shared by every Streamlit session.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            conn.execute(BACKFILL_SUMMARY)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, user_id, record):
+        """Append one premium calculation record for a user"""
+        self.append_many(user_id, [record])
+
+    def append_many(self, user_id, records):
+        """Append a batch of records for a user in a single transaction"""
+        rows = [
+            (user_id, _format_date(record.get('date')),
+             *(_to_sql_value(record.get(field)) for field in HISTORY_FIELDS))
+            for record in records
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO premium_history (user_id, date, {', '.join(HISTORY_FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(HISTORY_FIELDS))})",
+                rows
+            )
+
+    def clear(self, user_id):
+        """Delete every record of a user"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM premium_history WHERE user_id = ?", (user_id,))
+            # Drop the aggregates outright rather than keep subtracted float sums
+            conn.execute("DELETE FROM premium_history_summary WHERE user_id = ?", (user_id,))
+
+    def count(self, user_id):
+        """Number of records stored for a user"""
+        return self.get_summary(user_id)['count']
+
+    def get_summary(self, user_id):
+        """
+        Summary statistics of a user's history, read from the running aggregates in O(1).
+        `version` changes whenever records are added, so it can key caches of derived data.
+        """
+        row = self._connect().execute(
+            """
+            SELECT record_count, sum_base_premium, sum_wellness_score,
+                   sum_discount_percentage, total_savings, last_id
+            FROM premium_history_summary
+            WHERE user_id = ?
+            """,
+            (user_id,)
+        ).fetchone()
+        if row is None or row[0] == 0:
+            return {'count': 0, 'avg_base_premium': None, 'avg_wellness_score': None,
+                    'avg_discount_percentage': None, 'total_savings': 0.0, 'version': (0, None)}
+
+        count = row[0]
+        return {
+            'count': count,
+            'avg_base_premium': row[1] / count,
+            'avg_wellness_score': row[2] / count,
+            'avg_discount_percentage': row[3] / count,
+            'total_savings': row[4],
+            'version': (count, row[5])
+        }
+
+    def get_records_since(self, user_id, after_id=None):
+        """
+        A user's records with id greater than `after_id`, in id order, plus the user's total record count.
+        Both are read from one snapshot, so the count always matches the returned rows.
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT record_count FROM premium_history_summary WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            rows = conn.execute(
+                f"SELECT id, date, {', '.join(HISTORY_FIELDS)} FROM premium_history "
+                "WHERE user_id = ? AND id > ? ORDER BY id",
+                (user_id, -1 if after_id is None else after_id)
+            ).fetchall()
+        return (row[0] if row else 0), rows
+
+    def get_history(self, user_id, limit=None, offset=0):
+        """A user's records in date order, optionally one page at a time"""
+        import pandas as pd
+
+        df = pd.read_sql_query(
+            f"SELECT date, {', '.join(HISTORY_FIELDS)} FROM premium_history "
+            "WHERE user_id = ? ORDER BY date, id LIMIT ? OFFSET ?",
+            self._connect(),
+            params=(user_id, -1 if limit is None else limit, offset)
+        )
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+class PremiumHistoryBuffer:
+    """
+    Append-optimized columnar copy of one user's premium history.
+    Each field is a typed NumPy array with geometric growth, so a record costs
+    ~46 bytes instead of a dict of boxed Python objects. to_frame() returns a
+    DataFrame whose columns are read-only views of those arrays.
+    """
+
+    def __init__(self, capacity=BUFFER_INITIAL_CAPACITY):
+        self._lock = threading.Lock()
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        """
+        Drop every record. Fresh arrays are allocated rather than reused, so frames
+        returned earlier keep seeing their own rows.
+        """
+        self._columns = {name: np.empty(self.capacity, dtype) for name, dtype in BUFFER_DTYPES.items()}
+        self.diet_categories = []
+        self._diet_codes = {}
+        self.size = 0
+        self.is_sorted = True
+        self.last_id = None
+        self.version = (0, None)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays, including unused capacity"""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def _reserve(self, n_new):
+        needed = self.size + n_new
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self._columns[name] = grown
+        self.capacity = capacity
+
+    def _encode_diet(self, values):
+        codes = np.empty(len(values), np.int8)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+                continue
+            code = self._diet_codes.get(value)
+            if code is None:
+                code = self._diet_codes[value] = len(self.diet_categories)
+                self.diet_categories.append(value)
+            codes[i] = code
+        return codes
+
+    def append_columns(self, columns):
+        """Append records given as {field: sequence of values}, covering every field of BUFFER_DTYPES"""
+        n_new = len(columns['date'])
+        if n_new == 0:
+            return
+        self._reserve(n_new)
+        start, stop = self.size, self.size + n_new
+
+        dates = np.array([_format_date(value) for value in columns['date']],
+                         dtype='datetime64[ns]').view(np.int64)
+        for name, dtype in BUFFER_DTYPES.items():
+            if name == 'date':
+                values = dates
+            elif name == 'diet_quality':
+                values = self._encode_diet(columns[name])
+            elif np.issubdtype(dtype, np.integer):
+                values = [-1 if value is None else value for value in columns[name]]
+            else:
+                values = np.array(columns[name], dtype=float)
+            self._columns[name][start:stop] = values
+
+        previous_date = self._columns['date'][start - 1] if start else dates[0]
+        self.is_sorted = self.is_sorted and previous_date <= dates[0] and bool(np.all(np.diff(dates) >= 0))
+        self.size = stop
+
+    def append_many(self, records):
+        """Append a batch of record dicts, as passed to PremiumHistoryStore.append_many"""
+        self.append_columns({
+            name: [record.get(name) for record in records] for name in BUFFER_DTYPES
+        })
+
+    def sync(self, store, user_id):
+        """
+        Bring the buffer up to date with a user's records in `store`.
+        Only records added since the last sync are read; the buffer is rebuilt if records were deleted.
+        """
+        with self._lock:
+            version = store.get_summary(user_id)['version']
+            if version == self.version:
+                return self
+            count, rows = store.get_records_since(user_id, self.last_id)
+            if self.size + len(rows) != count:
+                self.reset()
+                count, rows = store.get_records_since(user_id)
+            if rows:
+                ids, *fields = zip(*rows)
+                self.append_columns(dict(zip(['date'] + HISTORY_FIELDS, fields)))
+                self.last_id = ids[-1]
+            self.version = (count, self.last_id) if count else (0, None)
+        return self
+
+    def to_frame(self):
+        """
+        The buffered records as a DataFrame in date order, without copying the numeric columns.
+        Missing integer fields show as <NA> and diet_quality is categorical.
+        """
+        import pandas as pd
+
+        # Grab consistent views under the lock; a concurrent sync() may reset() or grow the arrays
+        with self._lock:
+            n = self.size
+            views = {name: column[:n] for name, column in self._columns.items()}
+            diet_categories = list(self.diet_categories)
+            is_sorted = self.is_sorted
+
+        data = {}
+        for name, values in views.items():
+            values.flags.writeable = False
+            if name == 'date':
+                values = values.view('datetime64[ns]')
+            elif name == 'diet_quality':
+                values = pd.Categorical.from_codes(values, categories=diet_categories,
+                                                   validate=False)
+            elif np.issubdtype(values.dtype, np.integer):
+                missing = values < 0
+                if missing.any():
+                    values = pd.arrays.IntegerArray(values, missing)
+            data[name] = values
+
+        df = pd.DataFrame(data, copy=False)
+        if not is_sorted:
+            df = df.sort_values('date', kind='stable', ignore_index=True)
+        return df
+
+def _format_date(value):
+    """Store dates as sortable ISO 8601 text"""
+    if value is None:
+        value = datetime.now()
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, datetime):
+        import pandas as pd
+        value = pd.Timestamp(value)
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def _to_sql_value(value):
+    """Unwrap NumPy scalars, which sqlite3 cannot bind directly"""
+    return value.item() if hasattr(value, 'item') else value
@@ -1,77 +1,84 @@
 import pandas as pd
 import numpy as np
+from utils.metrics import timed
 
-def get_insurance_data():
+SEXES = ['male', 'female']
+SMOKER_STATUSES = ['no', 'yes']
+REGIONS = ['southwest', 'southeast', 'northwest', 'northeast']
+
+# Charge multipliers, indexed in the same order as REGIONS
+REGION_MULTIPLIERS = np.array([0.95, 1.05, 0.98, 1.02])
+
+CHILDREN_VALUES = [0, 1, 2, 3, 4, 5]
+CHILDREN_PROBABILITIES = [0.4, 0.25, 0.2, 0.1, 0.04, 0.01]
+
+DEFAULT_N_SAMPLES = 1338
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+def compute_charges(ages, bmis, children, is_male, is_smoker, region_codes, noise):
+    """
+    Compute insurance charges for whole arrays of members at once.
+    `noise` is the multiplicative random variation (mean 1) for each row.
+    """
+    base_charge = 1000.0 + ages * 250.0  # Age factor
+
+    # BMI factor
+    base_charge = base_charge * np.where(bmis >= 30, 1.5, np.where(bmis >= 25, 1.2, 1.0))
+
+    # Smoking factor (major impact)
+    base_charge = base_charge * np.where(is_smoker, 2.5, 1.0)
+
+    # Children factor
+    base_charge = base_charge + children * 500.0
+
+    # Gender factor (small difference)
+    base_charge = base_charge * np.where(is_male, 1.05, 1.0)
+
+    # Regional factor
+    base_charge = base_charge * REGION_MULTIPLIERS[region_codes]
+
+    # Add some random variation
+    base_charge = base_charge * noise
+
+    # Ensure positive charges
+    return np.round(np.maximum(base_charge, 1000), 2)
+
+@timed('dataset.generate')
+def get_insurance_data(n_samples=DEFAULT_N_SAMPLES, seed=42):
     """
     Generate a comprehensive insurance dataset similar to the Kaggle insurance dataset.
     This creates realistic data for training the ML model.
     """
-    np.random.seed(42)
-    
-    # Generate sample data similar to the Kaggle insurance dataset
-    n_samples = 1338
-    
+    np.random.seed(seed)
+
     # Age distribution (18-64)
     ages = np.random.randint(18, 65, n_samples)
-    
+
     # Gender distribution (roughly 50/50)
-    genders = np.random.choice(['male', 'female'], n_samples)
-    
+    genders = np.random.choice(SEXES, n_samples)
+
     # BMI distribution (normal distribution around 30 with some variance)
     bmis = np.random.normal(30, 6, n_samples)
     bmis = np.clip(bmis, 15, 50)  # Clip to reasonable range
-    
+
     # Children distribution (0-5, weighted towards fewer children)
-    children = np.random.choice([0, 1, 2, 3, 4, 5], n_samples, 
-                               p=[0.4, 0.25, 0.2, 0.1, 0.04, 0.01])
-    
+    children = np.random.choice(CHILDREN_VALUES, n_samples, p=CHILDREN_PROBABILITIES)
+
     # Smoking status (roughly 20% smokers)
-    smokers = np.random.choice(['no', 'yes'], n_samples, p=[0.8, 0.2])
-    
+    smokers = np.random.choice(SMOKER_STATUSES, n_samples, p=[0.8, 0.2])
+
     # Region distribution
-    regions = np.random.choice(['southwest', 'southeast', 'northwest', 'northeast'], n_samples)
-    
+    regions = np.random.choice(REGIONS, n_samples)
+
     # Calculate charges based on realistic factors
-    charges = []
-    
-    for i in range(n_samples):
-        # Base charge calculation
-        base_charge = 1000 + (ages[i] * 250)  # Age factor
-        
-        # BMI factor
-        if bmis[i] >= 30:
-            base_charge *= 1.5  # Obesity penalty
-        elif bmis[i] >= 25:
-            base_charge *= 1.2  # Overweight penalty
-        
-        # Smoking factor (major impact)
-        if smokers[i] == 'yes':
-            base_charge *= 2.5
-        
-        # Children factor
-        base_charge += children[i] * 500
-        
-        # Gender factor (small difference)
-        if genders[i] == 'male':
-            base_charge *= 1.05
-        
-        # Regional factor
-        region_multipliers = {
-            'southwest': 0.95,
-            'southeast': 1.05,
-            'northwest': 0.98,
-            'northeast': 1.02
-        }
-        base_charge *= region_multipliers[regions[i]]
-        
-        # Add some random variation
-        base_charge *= np.random.normal(1, 0.15)
-        
-        # Ensure positive charges
-        base_charge = max(base_charge, 1000)
-        
-        charges.append(round(base_charge, 2))
-    
+    charges = compute_charges(
+        ages, bmis, children,
+        is_male=genders == 'male',
+        is_smoker=smokers == 'yes',
+        region_codes=pd.Categorical(regions, categories=REGIONS).codes,
+        noise=np.random.normal(1, 0.15, n_samples)
+    )
+
     # Create DataFrame
     df = pd.DataFrame({
         'age': ages,
@@ -82,13 +89,56 @@ def get_insurance_data():
         'region': regions,
         'charges': charges
     })
-    
+
     return df
 
+@timed('dataset.sample')
+def sample_insurance_data(n_samples, rng):
+    """
+    Draw `n_samples` members from the dataset distributions using a NumPy Generator.
+    Categorical columns are returned as pandas categoricals to keep large chunks compact.
+    """
+    ages = rng.integers(18, 65, n_samples, dtype=np.int16)
+    sex_codes = rng.integers(0, len(SEXES), n_samples, dtype=np.int8)
+    bmis = np.clip(rng.normal(30, 6, n_samples), 15, 50)
+    children = rng.choice(np.array(CHILDREN_VALUES, dtype=np.int8), n_samples,
+                          p=CHILDREN_PROBABILITIES)
+    smoker_codes = (rng.random(n_samples) < 0.2).astype(np.int8)
+    region_codes = rng.integers(0, len(REGIONS), n_samples, dtype=np.int8)
+
+    charges = compute_charges(
+        ages, bmis, children,
+        is_male=sex_codes == 0,
+        is_smoker=smoker_codes == 1,
+        region_codes=region_codes,
+        noise=rng.normal(1, 0.15, n_samples)
+    )
+
+    return pd.DataFrame({
+        'age': ages,
+        'sex': pd.Categorical.from_codes(sex_codes, categories=SEXES),
+        'bmi': np.round(bmis, 1),
+        'children': children,
+        'smoker': pd.Categorical.from_codes(smoker_codes, categories=SMOKER_STATUSES),
+        'region': pd.Categorical.from_codes(region_codes, categories=REGIONS),
+        'charges': charges
+    })
+
+def iter_insurance_data(n_samples, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """
+    Yield the dataset as DataFrame chunks of at most `chunk_size` rows.
+    Each chunk is seeded from (seed, chunk index), so any chunk can be regenerated on its own.
+    """
+    for chunk_index, start in enumerate(range(0, n_samples, chunk_size)):
+        rng = np.random.default_rng([seed, chunk_index])
+        chunk = sample_insurance_data(min(chunk_size, n_samples - start), rng)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        yield chunk
+
 def get_data_statistics():
     """Get basic statistics about the insurance dataset"""
     df = get_insurance_data()
-    
+
     stats = {
         'total_records': len(df),
         'avg_age': df['age'].mean(),
@@ -98,5 +148,5 @@ def get_data_statistics():
         'gender_distribution': df['sex'].value_counts().to_dict(),
         'region_distribution': df['region'].value_counts().to_dict()
     }
-    
+
     return stats
@@ -1,23 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import time
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+import joblib
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.linear_model import TweedieRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, SplineTransformer
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import mean_squared_error, r2_score
-import streamlit as st
-from data.insurance_data import get_insurance_data
+from data.insurance_data import (get_insurance_data, iter_insurance_data, DEFAULT_N_SAMPLES,
+                                 SEXES, SMOKER_STATUSES, REGIONS)
+from utils.metrics import timed
+
+FEATURE_COLUMNS = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
+CATEGORICAL_COLUMNS = ['sex', 'smoker', 'region']
+NUMERIC_COLUMNS = ['age', 'bmi', 'children']
+
+logger = logging.getLogger(__name__)
+
+def report_error(message):
+    """Show an error in the Streamlit app, or log it when running headless"""
+    # Only use Streamlit if the app already imported it, so headless tools never load it
+    if 'streamlit' in sys.modules:
+        sys.modules['streamlit'].error(message)
+    else:
+        logger.error(message)
+
+# Rows passed to a single model.predict call in predict_premium_batch
+DEFAULT_BATCH_SIZE = 100_000
+
+# sklearn casts features to float32 and rejects anything non-finite after the cast
+MAX_FEATURE_MAGNITUDE = float(np.finfo(np.float32).max)
+
+# Bump whenever the artifact layout changes so old files are retrained
+ARTIFACT_VERSION = 2
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# Discrete input space offered by the estimator UI, covered by the compiled premium table.
+# The categorical axes follow the fitted encoders' classes.
+GRID_AGES = np.arange(18, 81)
+GRID_BMIS = np.round(np.arange(150, 501) / 10, 1)
+GRID_CHILDREN = np.arange(0, 6)
+
+# Ages whose full sub-grid is re-predicted to check a premium table after it is compiled or loaded
+TABLE_VERIFY_AGES = 4
+
+# Parameters that change how fast a model trains or predicts but not what it learns;
+# they are left out of the artifact key
+RUNTIME_PARAMS = ('n_jobs', 'verbose')
+
+# Student forests tried by distill_model, roughly from smallest to largest
+DISTILL_CANDIDATES = [
+    {'n_estimators': 5, 'max_depth': 6},
+    {'n_estimators': 10, 'max_depth': 8},
+    {'n_estimators': 10, 'max_depth': 10},
+    {'n_estimators': 20, 'max_depth': 10},
+    {'n_estimators': 20, 'max_depth': 12},
+    {'n_estimators': 50, 'max_depth': 12},
+]
+DEFAULT_MAX_R2_LOSS = 0.005
+DEFAULT_TRANSFER_SAMPLES = 200_000
+
+def make_random_forest(n_jobs=None, **params):
+    """The original 100-tree random forest"""
+    return RandomForestRegressor(**{'n_estimators': 100, 'random_state': 42, **params, 'n_jobs': n_jobs})
+
+def make_hist_gradient_boosting(n_jobs=None, **params):
+    """Histogram gradient boosting with native handling of the encoded categoricals"""
+    # Threads come from OpenMP here, so n_jobs is not used
+    defaults = {'max_iter': 200, 'learning_rate': 0.1, 'random_state': 42,
+                'categorical_features': [FEATURE_COLUMNS.index(col) for col in CATEGORICAL_COLUMNS]}
+    return HistGradientBoostingRegressor(**{**defaults, **params})
+
+def make_glm(n_jobs=None, alpha=1e-4, **params):
+    """
+    Regularized gamma GLM with a log link: charges are multiplicative in the risk
+    factors, and splines pick up the non-linear age and BMI effects.
+    """
+    features = ColumnTransformer([
+        ('splines', SplineTransformer(n_knots=8, degree=3), ['age', 'bmi']),
+        ('onehot', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_COLUMNS),
+        ('children', 'passthrough', ['children']),
+    ])
+    return Pipeline([
+        ('features', features),
+        ('glm', TweedieRegressor(power=2, link='log', alpha=alpha, max_iter=1000, **params)),
+    ])
+
+MODEL_BACKENDS = {
+    'random_forest': make_random_forest,
+    'hist_gradient_boosting': make_hist_gradient_boosting,
+    'glm': make_glm,
+}
 
 class InsurancePremiumPredictor:
-    def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+    def __init__(self, n_samples=DEFAULT_N_SAMPLES, seed=42, n_jobs=None, backend='random_forest',
+                 **model_params):
+        """
+        `backend` is one of MODEL_BACKENDS; `n_jobs` sets how many cores fit and predict
+        the model (-1 for all of them) and any other keyword is passed to the backend.
+        """
+        if backend not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown model backend '{backend}', expected one of {sorted(MODEL_BACKENDS)}")
+        self.backend = backend
+        self.model = MODEL_BACKENDS[backend](n_jobs=n_jobs, **model_params)
         self.encoders = {}
         self.is_trained = False
+        self.dataset_params = {'n_samples': n_samples, 'seed': seed}
+        self.premium_table = None
+        self.training_stages = []
         
+    @timed('model.train')
     def train_model(self):
         """Train the Random Forest model on insurance data"""
         try:
             # Get the insurance dataset
-            df = get_insurance_data()
+            df = get_insurance_data(**self.dataset_params)
             
             # Prepare features
             X = df[['age', 'sex', 'bmi', 'children', 'smoker', 'region']].copy()
@@ -27,7 +134,7 @@ class InsurancePremiumPredictor:
             categorical_cols = ['sex', 'smoker', 'region']
             for col in categorical_cols:
                 self.encoders[col] = LabelEncoder()
-                X.loc[:, col] = self.encoders[col].fit_transform(X[col])
+                X[col] = self.encoders[col].fit_transform(X[col])
             
             # Split the data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -35,25 +142,97 @@ class InsurancePremiumPredictor:
             )
             
             # Train the model
+            start = time.perf_counter()
             self.model.fit(X_train, y_train)
+            self.fit_seconds = time.perf_counter() - start
             
             # Evaluate the model
             y_pred = self.model.predict(X_test)
             self.mse = mean_squared_error(y_test, y_pred)
             self.r2 = r2_score(y_test, y_pred)
             
+            self.premium_table = None
             self.is_trained = True
             
         except Exception as e:
-            st.error(f"Error training model: {str(e)}")
+            report_error(f"Error training model: {str(e)}")
             self.is_trained = False
     
+    @timed('model.train_incremental')
+    def train_model_incremental(self, n_samples, chunk_size=1_000_000, trees_per_stage=10,
+                                eval_size=100_000):
+        """
+        Grow the forest in stages over chunks of a large generated dataset.
+        Each stage adds `trees_per_stage` trees fitted on one chunk, so peak memory is bounded
+        by the chunk size. Consider passing min_samples_leaf or max_leaf_nodes to the
+        constructor so trees fitted on millions of rows stay small.
+        Per-stage timings are kept in self.training_stages.
+        """
+        if self.backend != 'random_forest':
+            report_error("Incremental training is only supported by the random_forest backend")
+            return []
+
+        try:
+            seed = self.dataset_params['seed']
+            self.dataset_params = {'n_samples': n_samples, 'seed': seed,
+                                   'chunk_size': chunk_size, 'trees_per_stage': trees_per_stage}
+
+            # Chunks use fixed categories, so the encoders can be fitted up front
+            for col, categories in zip(CATEGORICAL_COLUMNS, (SEXES, SMOKER_STATUSES, REGIONS)):
+                self.encoders[col] = LabelEncoder().fit(categories)
+
+            self.model.set_params(warm_start=True, n_estimators=0)
+            if hasattr(self.model, 'estimators_'):
+                del self.model.estimators_
+            self.training_stages = []
+
+            for stage, chunk in enumerate(iter_insurance_data(n_samples, chunk_size, seed)):
+                start = time.perf_counter()
+                X, _ = self.encode_features(chunk)
+                self.model.set_params(n_estimators=self.model.n_estimators + trees_per_stage)
+                self.model.fit(X, chunk['charges'])
+                seconds = time.perf_counter() - start
+
+                self.training_stages.append({
+                    'stage': stage,
+                    'rows': len(chunk),
+                    'trees': self.model.n_estimators,
+                    'seconds': seconds
+                })
+                logger.info("Stage %d: %d rows, %d trees, %.2fs", stage, len(chunk),
+                            self.model.n_estimators, seconds)
+
+            self.model.set_params(warm_start=False)
+            self.fit_seconds = sum(stage['seconds'] for stage in self.training_stages)
+
+            # Evaluate on an independent sample drawn with a different seed
+            eval_df = next(iter_insurance_data(eval_size, eval_size, seed + 1))
+            X_eval, _ = self.encode_features(eval_df)
+            y_pred = self.model.predict(X_eval)
+            self.mse = mean_squared_error(eval_df['charges'], y_pred)
+            self.r2 = r2_score(eval_df['charges'], y_pred)
+
+            self.premium_table = None
+            self.is_trained = True
+
+        except Exception as e:
+            report_error(f"Error training model: {str(e)}")
+            self.is_trained = False
+
+        return self.training_stages
+
+    @timed('model.predict')
     def predict_premium(self, age, sex, bmi, children, smoker, region):
         """Predict insurance premium for given parameters"""
         if not self.is_trained:
-            st.error("Model not trained yet!")
+            report_error("Model not trained yet!")
             return 0
         
+        if self.premium_table is not None:
+            index = self._premium_table_index(age, sex, bmi, children, smoker, region)
+            if index is not None:
+                return float(self.premium_table[index])
+        
         try:
             # Create input dataframe
             input_data = pd.DataFrame({
@@ -77,12 +256,347 @@ class InsurancePremiumPredictor:
             return max(prediction, 0)  # Ensure non-negative premium
             
         except Exception as e:
-            st.error(f"Error making prediction: {str(e)}")
+            report_error(f"Error making prediction: {str(e)}")
             return 0
     
+    def encode_features(self, data):
+        """
+        Encode a DataFrame of raw inputs into model features in one vectorized pass.
+        Returns the encoded features and an object array with an error message per
+        invalid row (None where the row is valid).
+        """
+        n_rows = len(data)
+        errors = np.full(n_rows, None, dtype=object)
+        features = {}
+
+        for col in FEATURE_COLUMNS:
+            if col not in data:
+                errors[:] = f"Missing column '{col}'"
+                features[col] = np.zeros(n_rows)
+                continue
+
+            if col in CATEGORICAL_COLUMNS:
+                values = np.asarray(data[col], dtype=object)
+                codes = pd.Categorical(values, categories=self.encoders[col].classes_).codes
+                invalid = codes < 0
+                features[col] = np.where(invalid, 0, codes)
+            else:
+                values = pd.to_numeric(pd.Series(np.asarray(data[col]), copy=False), errors='coerce')
+                values = values.to_numpy(dtype=float)
+                # NaN, infinities and values that overflow float32 all fail this test
+                invalid = ~(np.abs(values) <= MAX_FEATURE_MAGNITUDE)
+                features[col] = np.where(invalid, 0, values)
+
+            errors[invalid & pd.isna(errors)] = f"Invalid value for '{col}'"
+
+        return pd.DataFrame(features, columns=FEATURE_COLUMNS), errors
+
+    @timed('model.predict_batch')
+    def predict_premium_batch(self, data=None, chunk_size=DEFAULT_BATCH_SIZE, return_errors=False, **columns):
+        """
+        Predict insurance premiums for many members at once.
+        Pass either a DataFrame with the feature columns or each column as a keyword array.
+        Invalid rows get NaN; with return_errors=True the per-row error messages are returned too.
+        """
+        if data is None:
+            data = columns
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+        n_rows = len(data)
+        premiums = np.full(n_rows, np.nan)
+
+        if not self.is_trained:
+            errors = np.full(n_rows, "Model not trained yet!", dtype=object)
+            return (premiums, errors) if return_errors else premiums
+
+        X, errors = self.encode_features(data)
+        valid_rows = np.flatnonzero(pd.isna(errors))
+
+        if self.premium_table is not None:
+            # Serve on-grid rows straight from the compiled table
+            indices = self._premium_table_indices(X.iloc[valid_rows])
+            on_grid = indices >= 0
+            premiums[valid_rows[on_grid]] = self.premium_table.ravel()[indices[on_grid]]
+            valid_rows = valid_rows[~on_grid]
+
+        # One model.predict call per chunk of valid rows
+        for start in range(0, len(valid_rows), chunk_size):
+            rows = valid_rows[start:start + chunk_size]
+            predictions = self.model.predict(X.iloc[rows])
+            premiums[rows] = np.maximum(predictions, 0)  # Ensure non-negative premium
+
+        return (premiums, errors) if return_errors else premiums
+
+    def get_artifact_key(self):
+        """Hash of the dataset parameters and hyperparameters that identifies a trained model"""
+        spec = {
+            'artifact_version': ARTIFACT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'dataset_params': self.dataset_params,
+            'backend': self.backend,
+            'model_class': type(self.model).__name__,
+            'model_params': {name: value for name, value in self.model.get_params().items()
+                             if name not in RUNTIME_PARAMS},
+        }
+        payload = json.dumps(spec, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def get_artifact_path(self, model_dir=DEFAULT_MODEL_DIR):
+        """Path of the artifact file for the current configuration"""
+        return os.path.join(model_dir, f"premium_model-{self.get_artifact_key()}.joblib")
+
+    def save_model(self, path=None):
+        """Save the trained model, encoders and metrics as a single artifact"""
+        if not self.is_trained:
+            report_error("Model not trained yet!")
+            return None
+
+        path = path or self.get_artifact_path()
+        artifact = {
+            'key': self.get_artifact_key(),
+            'backend': self.backend,
+            'dataset_params': self.dataset_params,
+            'model': self.model,
+            'encoders': self.encoders,
+            'mse': self.mse,
+            'r2': self.r2,
+            'fit_seconds': self.fit_seconds,
+        }
+
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            # Write to a temporary file first so readers never see a partial artifact
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(artifact, tmp_path)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            report_error(f"Error saving model: {str(e)}")
+            return None
+
+    def load_model(self, path=None):
+        """
+        Load a saved artifact if it matches the current configuration.
+        The model is read fully into memory: sklearn copies tree node arrays when it
+        unpickles them, so memory-mapping the file would not keep them on disk. For the
+        default 100-tree forest this takes ~40 ms and about the artifact's size (~10 MB).
+        Returns True when a model was loaded.
+        """
+        path = path or self.get_artifact_path()
+        if not os.path.exists(path):
+            return False
+
+        try:
+            artifact = joblib.load(path)
+        except Exception:
+            return False
+
+        if artifact.get('key') != self.get_artifact_key():
+            return False
+
+        # Keep this instance's runtime settings (e.g. n_jobs) rather than the saved ones
+        runtime_params = {name: value for name, value in self.model.get_params().items()
+                          if name in RUNTIME_PARAMS}
+        self.model = artifact['model']
+        self.model.set_params(**runtime_params)
+        self.encoders = artifact['encoders']
+        self.premium_table = None
+        self.mse = artifact['mse']
+        self.r2 = artifact['r2']
+        self.fit_seconds = artifact['fit_seconds']
+        self.is_trained = True
+        return True
+
+    @classmethod
+    def from_artifact(cls, path, n_jobs=None):
+        """
+        Predictor for whatever model a saved artifact holds, e.g. one produced by
+        distill_model and copied to a serving node. Returns None if it cannot be loaded.
+        """
+        try:
+            artifact = joblib.load(path)
+        except Exception as e:
+            report_error(f"Error loading model: {str(e)}")
+            return None
+
+        predictor = cls(backend=artifact.get('backend', 'random_forest'), n_jobs=n_jobs)
+        predictor.dataset_params = artifact.get('dataset_params', predictor.dataset_params)
+        predictor.model = artifact['model']
+        if 'n_jobs' in predictor.model.get_params():
+            predictor.model.set_params(n_jobs=n_jobs)
+        predictor.encoders = artifact['encoders']
+        predictor.mse = artifact['mse']
+        predictor.r2 = artifact['r2']
+        predictor.fit_seconds = artifact['fit_seconds']
+        predictor.is_trained = True
+        return predictor
+
+    def load_or_train(self, model_dir=DEFAULT_MODEL_DIR, compiled=False):
+        """
+        Load the matching saved model, training and saving a new one only when none exists.
+        With compiled=True the premium lookup table is loaded or compiled as well.
+        """
+        path = self.get_artifact_path(model_dir)
+        if not self.load_model(path):
+            self.train_model()
+            if self.is_trained:
+                self.save_model(path)
+
+        if compiled and self.is_trained:
+            table_path = os.path.join(model_dir, f"premium_table-{self.get_artifact_key()}.npy")
+            loaded = self.load_premium_table(table_path)
+            if loaded and not self.verify_premium_table(TABLE_VERIFY_AGES, seed=None):
+                report_error(f"Premium table {table_path} does not match the model; recompiling it")
+                loaded = False
+            if not loaded and self.compile_premium_table() is not None:
+                self.save_premium_table(table_path)
+
+    def _grid_axes(self):
+        """Values along each axis of the premium table, in FEATURE_COLUMNS order"""
+        return [
+            GRID_AGES,
+            np.arange(len(self.encoders['sex'].classes_)),
+            GRID_BMIS,
+            GRID_CHILDREN,
+            np.arange(len(self.encoders['smoker'].classes_)),
+            np.arange(len(self.encoders['region'].classes_)),
+        ]
+
+    def _grid_features(self, age_values):
+        """Encoded feature rows for every grid point with the given ages, in table order"""
+        axes = self._grid_axes()
+        mesh = np.meshgrid(age_values, *axes[1:], indexing='ij')
+        return pd.DataFrame({col: values.ravel() for col, values in zip(FEATURE_COLUMNS, mesh)})
+
+    @timed('model.compile_table')
+    def compile_premium_table(self, dtype=np.float32, chunk_size=DEFAULT_BATCH_SIZE):
+        """
+        Evaluate the model once over the whole estimator input grid into a dense array,
+        so on-grid quotes become array lookups instead of model calls.
+        A sample of the table is checked against the model before it is used; if the check
+        fails, quotes keep coming from the live model and None is returned.
+        """
+        if not self.is_trained:
+            report_error("Model not trained yet!")
+            return None
+
+        shape = tuple(len(axis) for axis in self._grid_axes())
+        table = np.empty(shape, dtype=dtype)
+        points_per_age = table[0].size
+        ages_per_chunk = max(1, chunk_size // points_per_age)
+
+        for start in range(0, len(GRID_AGES), ages_per_chunk):
+            ages = GRID_AGES[start:start + ages_per_chunk]
+            predictions = self.model.predict(self._grid_features(ages))
+            table[start:start + len(ages)] = np.maximum(predictions, 0).reshape((len(ages),) + shape[1:])
+
+        self._set_premium_table(table)
+        if not self.verify_premium_table(TABLE_VERIFY_AGES, seed=None):
+            self.premium_table = None
+            report_error("Compiled premium table does not match the model; serving quotes from the model")
+            return None
+        return table
+
+    def verify_premium_table(self, sample_size=None, seed=0):
+        """
+        Check that the compiled table matches the live model exactly (at the table's dtype).
+        Checks every grid point, or a random sample of `sample_size` ages x full sub-grids;
+        seed=None samples different ages on every call.
+        """
+        if self.premium_table is None:
+            return False
+
+        ages = GRID_AGES
+        if sample_size is not None:
+            rng = np.random.default_rng(seed)
+            ages = np.sort(rng.choice(GRID_AGES, min(sample_size, len(GRID_AGES)), replace=False))
+
+        for age in ages:
+            predictions = np.maximum(self.model.predict(self._grid_features([age])), 0)
+            expected = predictions.astype(self.premium_table.dtype)
+            if not np.array_equal(self.premium_table[age - GRID_AGES[0]].ravel(), expected):
+                return False
+        return True
+
+    def save_premium_table(self, path):
+        """Save the compiled premium table next to the model artifact"""
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, self.premium_table)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            report_error(f"Error saving premium table: {str(e)}")
+            return None
+
+    def load_premium_table(self, path):
+        """Memory-map a saved premium table; returns True when it fits the current model"""
+        if not os.path.exists(path):
+            return False
+
+        try:
+            table = np.load(path, mmap_mode='r')
+        except Exception:
+            return False
+
+        if table.shape != tuple(len(axis) for axis in self._grid_axes()):
+            return False
+
+        self._set_premium_table(table)
+        return True
+
+    def _set_premium_table(self, table):
+        self.premium_table = table
+        self._category_codes = {
+            col: {value: code for code, value in enumerate(self.encoders[col].classes_)}
+            for col in CATEGORICAL_COLUMNS
+        }
+
+    def _premium_table_index(self, age, sex, bmi, children, smoker, region):
+        """Index of a single quote in the premium table, or None when it is off-grid"""
+        try:
+            age_idx = int(age) - GRID_AGES[0]
+            bmi_idx = int(round((bmi - GRID_BMIS[0]) * 10))
+            children_idx = int(children) - GRID_CHILDREN[0]
+            if (age != int(age) or children != int(children)
+                    or not 0 <= age_idx < len(GRID_AGES)
+                    or not 0 <= bmi_idx < len(GRID_BMIS)
+                    or not 0 <= children_idx < len(GRID_CHILDREN)
+                    # The forest sees float32 features, so this is an exact on-grid test
+                    or np.float32(bmi) != np.float32(GRID_BMIS[bmi_idx])):
+                return None
+            return (age_idx,
+                    self._category_codes['sex'][sex],
+                    bmi_idx,
+                    children_idx,
+                    self._category_codes['smoker'][smoker],
+                    self._category_codes['region'][region])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _premium_table_indices(self, X):
+        """Flat premium table indices for encoded feature rows, -1 where a row is off-grid"""
+        age_idx = X['age'].to_numpy() - GRID_AGES[0]
+        bmi_idx = np.rint((X['bmi'].to_numpy() - GRID_BMIS[0]) * 10).astype(np.int64)
+        children_idx = X['children'].to_numpy() - GRID_CHILDREN[0]
+
+        on_grid = ((age_idx == np.round(age_idx)) & (age_idx >= 0) & (age_idx < len(GRID_AGES))
+                   & (children_idx == np.round(children_idx))
+                   & (children_idx >= 0) & (children_idx < len(GRID_CHILDREN))
+                   & (bmi_idx >= 0) & (bmi_idx < len(GRID_BMIS)))
+        bmi_idx = np.where(on_grid, bmi_idx, 0)
+        on_grid &= X['bmi'].to_numpy().astype(np.float32) == GRID_BMIS[bmi_idx].astype(np.float32)
+
+        coords = [np.where(on_grid, values, 0).astype(np.int64) for values in
+                  (age_idx, X['sex'].to_numpy(), bmi_idx, children_idx,
+                   X['smoker'].to_numpy(), X['region'].to_numpy())]
+        indices = np.ravel_multi_index(coords, self.premium_table.shape)
+        return np.where(on_grid, indices, -1)
+
     def get_feature_importance(self):
         """Get feature importance from the trained model"""
-        if not self.is_trained:
+        if not self.is_trained or not hasattr(self.model, 'feature_importances_'):
             return None
         
         feature_names = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
@@ -103,3 +617,153 @@ class InsurancePremiumPredictor:
             'rmse': np.sqrt(self.mse),
             'r2': self.r2
         }
+
+    def get_backend_profile(self, latency_calls=200):
+        """
+        Report fit time, single-quote inference latency, serialized model size and the
+        get_model_metrics() values for the current backend.
+        Latency is measured on the live model, bypassing any compiled premium table.
+        """
+        if not self.is_trained:
+            return None
+
+        sample = pd.DataFrame({'age': [35], 'sex': [1], 'bmi': [27.3], 'children': [1],
+                               'smoker': [0], 'region': [2]}, columns=FEATURE_COLUMNS)
+        self.model.predict(sample)
+        timings = np.empty(latency_calls)
+        for i in range(latency_calls):
+            start = time.perf_counter()
+            self.model.predict(sample)
+            timings[i] = time.perf_counter() - start
+
+        return {
+            'backend': self.backend,
+            'fit_seconds': self.fit_seconds,
+            'latency_p50_us': float(np.percentile(timings, 50) * 1e6),
+            'latency_p99_us': float(np.percentile(timings, 99) * 1e6),
+            'model_bytes': len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)),
+            **self.get_model_metrics()
+        }
+
+def select_backend(latency_budget_us, backends=None, backend_params=None, **predictor_kwargs):
+    """
+    Train each backend and return the most accurate (highest r2) one whose p50 single-quote
+    latency fits within `latency_budget_us`, together with the profile of every backend.
+    If none fits the budget, the fastest backend is returned.
+    """
+    backends = backends or list(MODEL_BACKENDS)
+    backend_params = backend_params or {}
+    candidates = []
+
+    for backend in backends:
+        predictor = InsurancePremiumPredictor(backend=backend, **predictor_kwargs,
+                                              **backend_params.get(backend, {}))
+        predictor.train_model()
+        if predictor.is_trained:
+            candidates.append((predictor, predictor.get_backend_profile()))
+
+    if not candidates:
+        return None, []
+
+    profiles = [profile for _, profile in candidates]
+    within_budget = [c for c in candidates if c[1]['latency_p50_us'] <= latency_budget_us]
+    if within_budget:
+        best, _ = max(within_budget, key=lambda c: c[1]['r2'])
+    else:
+        best, _ = min(candidates, key=lambda c: c[1]['latency_p50_us'])
+    return best, profiles
+
+def _holdout_set(predictor):
+    """Encoded held-out rows and true charges the predictor's r2/mse were measured on"""
+    params = predictor.dataset_params
+    if 'chunk_size' in params:
+        # Incrementally trained models are evaluated on a sample drawn with seed + 1
+        df = next(iter_insurance_data(100_000, 100_000, params['seed'] + 1))
+        X, _ = predictor.encode_features(df)
+        return X, df['charges']
+
+    df = get_insurance_data(params['n_samples'], params['seed'])
+    X, _ = predictor.encode_features(df)
+    _, X_test, _, y_test = train_test_split(X, df['charges'], test_size=0.2, random_state=42)
+    return X_test, y_test
+
+def _transfer_set(teacher, n_samples, seed):
+    """
+    Inputs the student learns the teacher's predictions on: half drawn from the dataset
+    distribution, half uniform over the estimator's input grid (ages up to 80 included).
+    """
+    rng = np.random.default_rng(seed)
+    n_grid = n_samples // 2
+    grid = pd.DataFrame({
+        'age': rng.choice(GRID_AGES, n_grid),
+        'sex': rng.choice(teacher.encoders['sex'].classes_, n_grid),
+        'bmi': rng.choice(GRID_BMIS, n_grid),
+        'children': rng.choice(GRID_CHILDREN, n_grid),
+        'smoker': rng.choice(teacher.encoders['smoker'].classes_, n_grid),
+        'region': rng.choice(teacher.encoders['region'].classes_, n_grid),
+    })
+    sampled = next(iter_insurance_data(n_samples - n_grid, n_samples - n_grid, seed))
+    X, _ = teacher.encode_features(pd.concat([sampled[FEATURE_COLUMNS], grid], ignore_index=True))
+    return X
+
+def distill_model(teacher, max_r2_loss=DEFAULT_MAX_R2_LOSS, max_rmse_increase=None, candidates=None,
+                  transfer_samples=DEFAULT_TRANSFER_SAMPLES, evaluate_all=False):
+    """
+    Distill a trained model into the smallest depth-limited random forest whose accuracy on
+    the teacher's held-out set stays within the error budget: an r2 drop of at most
+    `max_r2_loss` and, if given, an RMSE increase of at most `max_rmse_increase` (a fraction).
+    Students are fitted to the teacher's predictions on a large synthetic transfer set and
+    tried in `candidates` order (DISTILL_CANDIDATES by default), stopping at the first that
+    fits unless evaluate_all=True.
+    Returns the chosen student predictor (None if no candidate fits) and a report with the
+    bytes, single-quote latency and accuracy loss of the teacher and every student tried.
+    """
+    if not teacher.is_trained:
+        report_error("Model not trained yet!")
+        return None, []
+
+    X_holdout, y_holdout = _holdout_set(teacher)
+    teacher_predictions = teacher.model.predict(X_holdout)
+    teacher_rmse = float(np.sqrt(mean_squared_error(y_holdout, teacher_predictions)))
+    teacher_r2 = float(r2_score(y_holdout, teacher_predictions))
+
+    seed = teacher.dataset_params['seed'] + 2
+    X_transfer = _transfer_set(teacher, transfer_samples, seed)
+    y_transfer = teacher.model.predict(X_transfer)
+    n_jobs = teacher.model.get_params().get('n_jobs')
+
+    report = [{'model': 'teacher', 'params': {}, 'r2_loss': 0.0, 'rmse_increase': 0.0,
+               'fidelity_r2': 1.0, 'within_budget': True, **teacher.get_backend_profile()}]
+    chosen = None
+    for params in candidates or DISTILL_CANDIDATES:
+        student = InsurancePremiumPredictor(backend='random_forest', n_jobs=n_jobs, **params)
+        student.dataset_params = {**teacher.dataset_params, 'distilled_from': teacher.get_artifact_key(),
+                                  'transfer_samples': transfer_samples}
+        start = time.perf_counter()
+        student.model.fit(X_transfer, y_transfer)
+        student.fit_seconds = time.perf_counter() - start
+        student.encoders = teacher.encoders
+
+        predictions = student.model.predict(X_holdout)
+        student.mse = mean_squared_error(y_holdout, predictions)
+        student.r2 = r2_score(y_holdout, predictions)
+        student.is_trained = True
+
+        r2_loss = teacher_r2 - student.r2
+        rmse_increase = np.sqrt(student.mse) / teacher_rmse - 1
+        within_budget = (r2_loss <= max_r2_loss
+                         and (max_rmse_increase is None or rmse_increase <= max_rmse_increase))
+        report.append({
+            'model': 'student', 'params': params, 'r2_loss': float(r2_loss),
+            'rmse_increase': float(rmse_increase),
+            'fidelity_r2': float(r2_score(teacher_predictions, predictions)),
+            'within_budget': within_budget, **student.get_backend_profile()
+        })
+        logger.info("Student %s: r2 loss %.4f, %d bytes", params, r2_loss, report[-1]['model_bytes'])
+
+        if within_budget and chosen is None:
+            chosen = student
+            if not evaluate_all:
+                break
+
+    return chosen, report
@@ -0,0 +1,277 @@
+"""
+Monte Carlo simulation of premium and wellness-discount liability.
+
+Draws a synthetic member population from the dataset distributions, applies
+wellness-behaviour scenarios (e.g. 10% of smokers quit) and scores every
+member with the premium model and wellness calculator. Chunks run across a
+process pool; each chunk is seeded from (seed, chunk index), so results are
+reproducible and do not depend on the number of workers.
+
+Usage:
+    python portfolio_simulation.py --members 5000000 --jobs 4 \
+        --scenario smokers_quit_10pct --scenario exercise_plus_2
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from bulk_quote import quote_members
+from data.insurance_data import sample_insurance_data
+from ml_model import InsurancePremiumPredictor, DEFAULT_MODEL_DIR
+from utils.metrics import timed
+from wellness_calculator import WellnessCalculator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_MEMBERS = 1_000_000
+DEFAULT_CHUNK_SIZE = 250_000
+DEFAULT_CONFIDENCE = 0.95
+
+# Wellness behaviour distributions of the synthetic population. The dataset has no
+# wellness fields, so these are assumptions: diet levels run from worst to best.
+DIET_LEVELS = ['Poor', 'Fair', 'Good', 'Excellent']
+DIET_PROBABILITIES = [0.2, 0.35, 0.3, 0.15]
+EXERCISE_DAYS_P = 3 / 7
+SLEEP_MEAN, SLEEP_STD = 7.0, 1.2
+STRESS_MEAN, STRESS_STD = 5.0, 2.0
+
+# Scenario parameters (all optional):
+#   smoker_quit_rate    fraction of smokers who quit
+#   participation_rate  fraction of members who adopt the behaviour changes below (default 1)
+#   exercise_delta, sleep_delta, stress_delta, bmi_delta, diet_levels
+SCENARIOS = {
+    'baseline': {},
+    'smokers_quit_10pct': {'smoker_quit_rate': 0.10},
+    'smokers_quit_25pct': {'smoker_quit_rate': 0.25},
+    'exercise_plus_2': {'exercise_delta': 2, 'participation_rate': 0.3},
+    'better_sleep_less_stress': {'sleep_delta': 1, 'stress_delta': -2, 'participation_rate': 0.3},
+    'healthy_habits': {'smoker_quit_rate': 0.10, 'exercise_delta': 2, 'diet_levels': 1,
+                       'bmi_delta': -2.0, 'participation_rate': 0.25},
+}
+
+# Per-member quantities summed for every scenario, in result order
+METRICS = ['base_premium', 'discount', 'final_premium', 'wellness_score']
+
+def sample_wellness_behaviour(n_members, rng):
+    """Draw exercise, diet, sleep and stress for `n_members` members"""
+    return {
+        'exercise_freq': rng.binomial(7, EXERCISE_DAYS_P, n_members).astype(np.int8),
+        'diet_quality': pd.Categorical.from_codes(
+            rng.choice(len(DIET_LEVELS), n_members, p=DIET_PROBABILITIES).astype(np.int8),
+            categories=DIET_LEVELS
+        ),
+        'sleep_hours': np.clip(np.rint(rng.normal(SLEEP_MEAN, SLEEP_STD, n_members)), 4, 12).astype(np.int8),
+        'stress_level': np.clip(np.rint(rng.normal(STRESS_MEAN, STRESS_STD, n_members)), 1, 10).astype(np.int8),
+    }
+
+def sample_members(n_members, rng):
+    """Synthetic members with the model features and wellness behaviour"""
+    members = sample_insurance_data(n_members, rng).drop(columns='charges')
+    for col, values in sample_wellness_behaviour(n_members, rng).items():
+        members[col] = values
+    return members
+
+def apply_scenario(members, scenario, rng):
+    """
+    Copy of `members` with a scenario's behaviour changes applied.
+    The random draws do not depend on the scenario, so every scenario run with the
+    same rng state changes the same members (e.g. the 10% who quit are among the 25%).
+    """
+    n_members = len(members)
+    quit_draws = rng.random(n_members)
+    participation_draws = rng.random(n_members)
+
+    members = members.copy()
+    if scenario.get('smoker_quit_rate'):
+        quits = (members['smoker'] == 'yes').to_numpy() & (quit_draws < scenario['smoker_quit_rate'])
+        members['smoker'] = members['smoker'].where(~quits, 'no')
+
+    participants = participation_draws < scenario.get('participation_rate', 1.0)
+    for col, key, low, high in (('exercise_freq', 'exercise_delta', 0, 7),
+                                ('sleep_hours', 'sleep_delta', 4, 12),
+                                ('stress_level', 'stress_delta', 1, 10)):
+        if scenario.get(key):
+            changed = np.clip(members[col].to_numpy() + scenario[key], low, high)
+            members[col] = np.where(participants, changed, members[col].to_numpy()).astype(np.int8)
+    if scenario.get('bmi_delta'):
+        # Rounded to 0.1 like the sampled BMIs, so quotes stay on the compiled table's grid
+        changed = np.round(np.clip(members['bmi'].to_numpy() + scenario['bmi_delta'], 15, 50), 1)
+        members['bmi'] = np.where(participants, changed, members['bmi'].to_numpy())
+    if scenario.get('diet_levels'):
+        codes = members['diet_quality'].cat.codes.to_numpy()
+        changed = np.clip(codes + scenario['diet_levels'], 0, len(DIET_LEVELS) - 1)
+        members['diet_quality'] = pd.Categorical.from_codes(
+            np.where(participants, changed, codes).astype(np.int8), categories=DIET_LEVELS
+        )
+    return members
+
+def score_members(members, predictor, wellness_calc):
+    """Per-member METRICS as an (n_members, len(METRICS)) array"""
+    quotes = quote_members(members, predictor, wellness_calc)
+    base_premium = quotes['base_premium'].to_numpy()
+    return np.column_stack([
+        base_premium,
+        base_premium - quotes['final_premium'].to_numpy(),
+        quotes['final_premium'].to_numpy(),
+        quotes['wellness_score'].to_numpy(),
+    ])
+
+_worker_state = {}
+
+def _init_worker(predictor_params, model_dir, compiled):
+    """Load the shared model artifact once per worker process"""
+    predictor = InsurancePremiumPredictor(**predictor_params)
+    predictor.load_or_train(model_dir, compiled=compiled)
+    _worker_state['predictor'] = predictor
+    _worker_state['wellness_calc'] = WellnessCalculator()
+
+@timed('simulation.chunk')
+def simulate_chunk(task):
+    """
+    Simulate one chunk: draw its members, score the baseline and every scenario,
+    and return per-scenario sums and sums of squares of METRICS and of their change vs baseline.
+    """
+    seed, chunk_index, n_members, scenarios = task
+    predictor, wellness_calc = _worker_state['predictor'], _worker_state['wellness_calc']
+
+    members = sample_members(n_members, np.random.default_rng([seed, chunk_index, 0]))
+    baseline = score_members(members, predictor, wellness_calc)
+
+    moments = {}
+    for name, scenario in scenarios.items():
+        if scenario:
+            # Every scenario reuses the same draws (common random numbers), which
+            # makes the differences between scenarios far less noisy
+            rng = np.random.default_rng([seed, chunk_index, 1])
+            values = score_members(apply_scenario(members, scenario, rng), predictor, wellness_calc)
+        else:
+            values = baseline
+        change = values - baseline
+        moments[name] = {
+            'sum': values.sum(axis=0), 'sumsq': np.square(values).sum(axis=0),
+            'change_sum': change.sum(axis=0), 'change_sumsq': np.square(change).sum(axis=0),
+        }
+    return n_members, moments
+
+def _interval(n_members, total, total_sq, population_size, z):
+    """Estimate and normal-approximation interval of population_size * mean"""
+    mean = total / n_members
+    variance = max(total_sq - total * mean, 0.0) / (n_members - 1) if n_members > 1 else 0.0
+    half_width = z * np.sqrt(variance / n_members)
+    return {
+        'estimate': float(population_size * mean),
+        'ci_low': float(population_size * (mean - half_width)),
+        'ci_high': float(population_size * (mean + half_width)),
+    }
+
+def simulate_portfolio(scenarios=None, n_members=DEFAULT_N_MEMBERS, seed=42, chunk_size=DEFAULT_CHUNK_SIZE,
+                       n_jobs=None, confidence=DEFAULT_CONFIDENCE, population_size=None,
+                       predictor_params=None, model_dir=DEFAULT_MODEL_DIR, compiled=True):
+    """
+    Simulate `n_members` synthetic members under each scenario (name -> parameters, see
+    SCENARIOS; defaults to all of them) and estimate portfolio totals for `population_size`
+    members (defaults to n_members), with confidence intervals.
+    Results depend only on the scenarios, n_members, seed and chunk_size, not on n_jobs.
+    """
+    scenarios = dict(SCENARIOS if scenarios is None else scenarios)
+    predictor_params = predictor_params or {}
+    population_size = population_size or n_members
+    n_jobs = n_jobs or os.cpu_count()
+
+    # Train and save the model once up front, so workers only load the artifact
+    predictor = InsurancePremiumPredictor(**predictor_params)
+    predictor.load_or_train(model_dir, compiled=compiled)
+    if not predictor.is_trained:
+        raise RuntimeError("Premium model could not be loaded or trained")
+
+    tasks = [(seed, chunk_index, min(chunk_size, n_members - start), scenarios)
+             for chunk_index, start in enumerate(range(0, n_members, chunk_size))]
+
+    start = time.perf_counter()
+    if n_jobs == 1 or len(tasks) == 1:
+        _worker_state.update(predictor=predictor, wellness_calc=WellnessCalculator())
+        chunk_results = [simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), initializer=_init_worker,
+                                 initargs=(predictor_params, model_dir, compiled)) as executor:
+            # map() keeps chunk order, so totals are summed in the same order for any n_jobs
+            chunk_results = list(executor.map(simulate_chunk, tasks))
+    seconds = time.perf_counter() - start
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    results = {}
+    for name in scenarios:
+        moments = {key: sum(chunk[name][key] for _, chunk in chunk_results)
+                   for key in ('sum', 'sumsq', 'change_sum', 'change_sumsq')}
+        scenario_result = {}
+        for i, metric in enumerate(METRICS):
+            # The wellness score is reported as a population mean rather than a total
+            scale = 1 if metric == 'wellness_score' else population_size
+            label = 'mean_wellness_score' if metric == 'wellness_score' else f'total_{metric}'
+            scenario_result[label] = _interval(n_members, moments['sum'][i], moments['sumsq'][i], scale, z)
+            scenario_result[f'{label}_change'] = _interval(
+                n_members, moments['change_sum'][i], moments['change_sumsq'][i], scale, z
+            )
+        results[name] = scenario_result
+
+    return {
+        'scenarios': results,
+        'n_members': n_members,
+        'population_size': population_size,
+        'seed': seed,
+        'chunk_size': chunk_size,
+        'confidence': confidence,
+        'n_jobs': n_jobs,
+        'seconds': seconds,
+        'members_per_second': n_members * len(scenarios) / seconds,
+    }
+
+def format_results(simulation):
+    """Human-readable table of simulate_portfolio() output"""
+    pct = int(simulation['confidence'] * 100)
+    lines = [f"{simulation['n_members']:,} members, seed {simulation['seed']}, "
+             f"totals for {simulation['population_size']:,} members with {pct}% CIs"]
+    for name, result in simulation['scenarios'].items():
+        lines.append(name)
+        for label in ('total_base_premium', 'total_discount', 'total_final_premium', 'mean_wellness_score'):
+            value, change = result[label], result[f'{label}_change']
+            lines.append(
+                f"  {label:<22} {value['estimate']:>18,.2f} [{value['ci_low']:,.2f}, {value['ci_high']:,.2f}]"
+                f"  change {change['estimate']:+,.2f} [{change['ci_low']:+,.2f}, {change['ci_high']:+,.2f}]"
+            )
+    lines.append(f"{simulation['seconds']:.1f}s on {simulation['n_jobs']} workers, "
+                 f"{simulation['members_per_second']:,.0f} member-scenarios/s")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of premium and wellness-discount liability")
+    parser.add_argument('--members', type=int, default=DEFAULT_N_MEMBERS, help="Synthetic members to simulate")
+    parser.add_argument('--population', type=int, default=None,
+                        help="Portfolio size the totals are scaled to (default: --members)")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="Scenario to simulate; repeatable (default: all)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--json', help="Also write the full results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    names = ['baseline'] + [name for name in args.scenario or SCENARIOS if name != 'baseline']
+    simulation = simulate_portfolio(
+        {name: SCENARIOS[name] for name in names}, args.members, args.seed, args.chunk_size,
+        args.jobs, args.confidence, args.population
+    )
+    print(format_results(simulation))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(simulation, f, indent=2)
+
+if __name__ == "__main__":
+    main()
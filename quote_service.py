@@ -0,0 +1,326 @@
+"""
+Local HTTP quoting service.
+
+A small asyncio HTTP/1.1 server around InsurancePremiumPredictor and
+WellnessCalculator. Quote requests that arrive within a short window are
+grouped into one batch, so many concurrent callers share a single
+model.predict call instead of each paying sklearn's fixed per-call cost.
+
+Endpoints:
+    POST /quote    JSON member -> base premium, wellness score, discount, final premium
+    GET  /metrics  request latency percentiles and batch size statistics
+    GET  /metrics/prometheus  per-stage latency histograms in the Prometheus text format
+    GET  /health   readiness check
+
+Usage:
+    python quote_service.py --port 8600 --max-batch-size 256 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import math
+import time
+import numpy as np
+import pandas as pd
+from bulk_quote import INPUT_COLUMNS, NUMERIC_WELLNESS_COLUMNS, quote_members
+from ml_model import InsurancePremiumPredictor, NUMERIC_COLUMNS
+from utils import metrics
+from wellness_calculator import WellnessCalculator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Number of recent requests/batches kept for the percentiles in /metrics
+STATS_WINDOW = 10_000
+
+# Largest request body read; a quote is a few hundred bytes of JSON
+MAX_BODY_BYTES = 64 * 1024
+
+HTTP_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+NUMERIC_INPUT_COLUMNS = [col for col in INPUT_COLUMNS if col in NUMERIC_COLUMNS + NUMERIC_WELLNESS_COLUMNS]
+
+def validate_member(member):
+    """
+    Member fields ready to quote, with numbers given as strings converted, and an
+    error message for the first invalid field (None if every field is valid)
+    """
+    values = {}
+    for col in INPUT_COLUMNS:
+        value = member[col]
+        if col in NUMERIC_INPUT_COLUMNS:
+            if isinstance(value, str):
+                try:
+                    value = float(value)
+                except ValueError:
+                    return None, f"Invalid value for '{col}': expected a number"
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                return None, f"Invalid value for '{col}': expected a number"
+        elif not isinstance(value, str):
+            return None, f"Invalid value for '{col}': expected a string"
+        values[col] = value
+    return values, None
+
+class ServiceStats:
+    """Rolling request latency and batch size statistics"""
+
+    def __init__(self, window=STATS_WINDOW):
+        self.latencies = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.started = time.time()
+
+    def record_request(self, seconds):
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batch_sizes.append(size)
+
+    def snapshot(self):
+        latencies_ms = np.array(self.latencies) * 1e3
+        batch_sizes = np.array(self.batch_sizes)
+        uptime = time.time() - self.started
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'uptime_seconds': uptime,
+            'requests_per_second': self.requests / uptime if uptime else 0.0,
+            'latency_ms': {
+                f'p{q}': float(np.percentile(latencies_ms, q)) if len(latencies_ms) else None
+                for q in (50, 95, 99)
+            },
+            'batch_size': {
+                'mean': float(batch_sizes.mean()) if len(batch_sizes) else None,
+                'max': int(batch_sizes.max()) if len(batch_sizes) else None,
+            },
+        }
+
+class QuoteBatcher:
+    """Collect quote requests into batches of up to max_batch_size, waiting at most max_wait_ms"""
+
+    def __init__(self, predictor, wellness_calc, stats, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predictor = predictor
+        self.wellness_calc = wellness_calc
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+
+    async def quote(self, member):
+        """Queue one member and wait for its quote"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((member, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            members = pd.DataFrame([member for member, _ in batch], columns=INPUT_COLUMNS)
+            self.stats.record_batch(len(batch))
+            try:
+                # Run the model off the event loop so new requests keep being accepted
+                quotes = await loop.run_in_executor(
+                    None, quote_members, members, self.predictor, self.wellness_calc
+                )
+                outcomes = quotes.to_dict('records')
+            except Exception:
+                logger.exception("Quoting a batch of %d failed; quoting its members one by one", len(batch))
+                outcomes = await loop.run_in_executor(None, self.quote_one_by_one, members)
+
+            for (_, future), outcome in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def quote_one_by_one(self, members):
+        """Quote each member on its own, so an error only reaches the request that caused it"""
+        outcomes = []
+        for i in range(len(members)):
+            try:
+                quote = quote_members(members.iloc[[i]], self.predictor, self.wellness_calc)
+                outcomes.append(quote.to_dict('records')[0])
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+class QuoteService:
+    def __init__(self, predictor, wellness_calc, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.stats = ServiceStats()
+        self.batcher = QuoteBatcher(predictor, wellness_calc, self.stats, max_batch_size, max_wait_ms)
+
+    async def handle_quote(self, body):
+        try:
+            member = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': "Request body must be JSON"}
+        if not isinstance(member, dict):
+            return 400, {'error': "Request body must be a JSON object"}
+        missing = [col for col in INPUT_COLUMNS if col not in member]
+        if missing:
+            return 400, {'error': f"Missing fields: {', '.join(missing)}"}
+
+        member, error = validate_member(member)
+        if error:
+            return 422, {'error': error}
+
+        quote = await self.batcher.quote(member)
+        if quote['error'] is not None:
+            return 422, {'error': quote['error']}
+
+        return 200, {
+            'base_premium': round(float(quote['base_premium']), 2),
+            'wellness_score': float(quote['wellness_score']),
+            'discount_percentage': int(quote['discount_percentage']),
+            'final_premium': round(float(quote['final_premium']), 2),
+        }
+
+    async def route(self, method, path, body):
+        if path == '/quote':
+            if method != 'POST':
+                return 405, {'error': "Use POST"}
+            return await self.handle_quote(body)
+        if path == '/metrics' and method == 'GET':
+            return 200, self.stats.snapshot()
+        if path == '/metrics/prometheus' and method == 'GET':
+            return 200, metrics.to_prometheus_text()
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok'}
+        return 404, {'error': f"No route for {method} {path}"}
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, honouring keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                    content_length = int(headers.get('content-length', 0))
+                    if content_length < 0:
+                        raise ValueError(content_length)
+                except ValueError:
+                    # The request cannot be framed, so the connection cannot be reused
+                    await self.write_response(writer, 400, {'error': "Malformed HTTP request"}, keep_alive=False)
+                    break
+                if content_length > MAX_BODY_BYTES:
+                    # The body is left unread, so the connection cannot be reused either
+                    await self.write_response(writer, 413, {'error': f"Request body over {MAX_BODY_BYTES} bytes"},
+                                              keep_alive=False)
+                    break
+
+                body = await reader.readexactly(content_length)
+                route_path = path.split('?')[0]
+
+                try:
+                    status, payload = await self.route(method, route_path, body)
+                except Exception as e:
+                    logger.exception("Error handling %s %s", method, path)
+                    status, payload = 500, {'error': str(e)}
+
+                if route_path == '/quote':
+                    self.stats.record_request(time.perf_counter() - start)
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.upper() != 'HTTP/1.0')
+                await self.write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            response, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            response, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(response)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+            + response
+        )
+        await writer.drain()
+
+    async def serve(self, host, port):
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("Quote service listening on http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve premium quotes over HTTP with request micro-batching")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Most requests grouped into one model call")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="Longest a request waits for others to join its batch")
+    parser.add_argument('--compiled', action='store_true', help="Serve quotes from the compiled premium table")
+    parser.add_argument('--model', help="Serve this model artifact, e.g. one written by compress_model.py")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Record per-stage latency histograms for /metrics/prometheus")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.model:
+        predictor = InsurancePremiumPredictor.from_artifact(args.model)
+        if predictor is not None and args.compiled:
+            predictor.compile_premium_table()
+    else:
+        predictor = InsurancePremiumPredictor()
+        predictor.load_or_train(compiled=args.compiled)
+    if predictor is None or not predictor.is_trained:
+        raise SystemExit("Premium model could not be loaded or trained")
+
+    service = QuoteService(predictor, WellnessCalculator(), args.max_batch_size, args.max_wait_ms)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,15 @@
+import os
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
-import bcrypt
 
-# Import custom modules
-from ml_model import InsurancePremiumPredictor
+# Import custom modules. Heavy dependencies (sklearn via ml_model, Plotly) are
+# imported where they are first used, so the login page and health tips load fast.
 from wellness_calculator import WellnessCalculator
-from utils.visualization import create_kpi_cards, create_wellness_gauge
+from data.history_store import PremiumHistoryStore, PremiumHistoryBuffer
+from utils.visualization import create_kpi_cards, create_wellness_gauge, downsample_trend
 from utils.health_tips import get_health_tips
+from utils import metrics
+from utils.warmup import BackgroundWarmup, WARMING_UP, FAILED
 
 # Page configuration
 st.set_page_config(
@@ -19,25 +18,96 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state
-if 'ml_model' not in st.session_state:
-    st.session_state.ml_model = InsurancePremiumPredictor()
-    st.session_state.ml_model.train_model()
-
-if 'wellness_calc' not in st.session_state:
-    st.session_state.wellness_calc = WellnessCalculator()
+def load_predictor():
+    from ml_model import InsurancePremiumPredictor
+
+    with metrics.timed('model.warmup'):
+        predictor = InsurancePremiumPredictor()
+        predictor.load_or_train(compiled=True)
+    if not predictor.is_trained:
+        raise RuntimeError("Premium model could not be loaded or trained")
+    return predictor
+
+@st.cache_resource
+def get_model_warmup():
+    """
+    Loads or trains the premium model in a background thread, once per process,
+    so pages that do not need the model render without waiting for it.
+    """
+    # Plotly looks pandas up in sys.modules without taking the import lock, so a render
+    # running while the thread imports pandas could see a half-initialized module.
+    # pandas is imported here first and the thread only adds sklearn on top.
+    import pandas
+    return BackgroundWarmup(load_predictor, name='premium-model-warmup')
+
+def get_predictor():
+    """
+    Process-wide premium model shared by every session, waiting for the warm-up if needed.
+    Sessions only call the predict methods, which never mutate the fitted model,
+    so the shared instance is safe to use from concurrent script runs.
+    Returns None if the model could not be loaded.
+    """
+    return get_model_warmup().wait()
+
+@st.cache_resource
+def get_wellness_calculator():
+    """Process-wide, stateless wellness calculator shared by every session"""
+    return WellnessCalculator()
+
+@st.cache_resource
+def get_history_store():
+    """Process-wide SQLite premium history store; each session reads only its own user's records"""
+    return PremiumHistoryStore()
+
+@st.cache_resource(max_entries=256)
+def get_history_buffer(user_id):
+    """Process-wide columnar cache of one user's history, shared by all of that user's sessions"""
+    return PremiumHistoryBuffer()
+
+def load_history_frame(user_id):
+    """A user's full history as a DataFrame of zero-copy views, reading only records added since the last call"""
+    return get_history_buffer(user_id).sync(get_history_store(), user_id).to_frame()
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Serve Prometheus metrics on HEALSURE_METRICS_PORT, once per process, when it is set"""
+    port = os.environ.get('HEALSURE_METRICS_PORT')
+    return metrics.start_http_server(int(port)) if port and metrics.is_enabled() else None
+
+def current_user():
+    """Authenticated username, which keys the user's premium history"""
+    return st.session_state["user_id"]
+
+# Trend charts plot at most this many points per chart, however long the history is
+MAX_TREND_POINTS = 500
+HISTORY_PAGE_SIZE = 50
+
+@st.cache_data(max_entries=256)
+@metrics.timed('analytics.trend_series')
+def load_trend_series(user_id, version):
+    """
+    Downsampled trend series for each analytics chart.
+    `version` comes from the history summary, so the cache refreshes only when records change.
+    """
+    df = load_history_frame(user_id)
+    return {
+        'premium': downsample_trend(df, 'date', ['base_premium', 'final_premium'], MAX_TREND_POINTS),
+        'wellness': downsample_trend(df, 'date', ['wellness_score'], MAX_TREND_POINTS),
+        'bmi': downsample_trend(df, 'date', ['bmi'], MAX_TREND_POINTS),
+        'discount': downsample_trend(df, 'date', ['discount_percentage'], MAX_TREND_POINTS),
+    }
 
+# Initialize session state
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
 
-if 'premium_history' not in st.session_state:
-    st.session_state.premium_history = []
-
 def check_password():
     def password_entered():
         if (st.session_state["username"] == "user" and 
             st.session_state["password"] == "pass"):
             st.session_state["authenticated"] = True
+            # The username widget's state is dropped once the login form is gone
+            st.session_state["user_id"] = st.session_state["username"]
             del st.session_state["password"]
         else:
             st.session_state["authenticated"] = False
@@ -60,64 +130,104 @@ def main():
             st.success(f'Welcome *User*')
             if st.button("Logout"):
                 st.session_state["authenticated"] = False
+                st.session_state.pop("user_id", None)
                 st.rerun()
         show_dashboard()
+        # Rendered after the dashboard so the panel includes this run's timings
+        if metrics.is_enabled():
+            with st.sidebar:
+                show_metrics_panel()
     else:
         st.warning('Please enter your username and password')
         st.info('Demo credentials: username = **user**, password = **pass**')
+        # Load the model while the user logs in, once the login form has been sent
+        get_model_warmup()
+
+def show_metrics_panel():
+    """Admin panel with live latency percentiles per instrumented stage"""
+    start_metrics_exporter()
+    with st.expander("⏱️ Performance Metrics"):
+        summary = metrics.get_summary()
+        if not summary:
+            st.caption("No stages recorded yet.")
+            return
+        st.dataframe(
+            [{'Stage': s['stage'], 'Calls': s['count'], 'p50 (ms)': round(s['p50_ms'], 2),
+              'p95 (ms)': round(s['p95_ms'], 2), 'p99 (ms)': round(s['p99_ms'], 2)} for s in summary],
+            hide_index=True
+        )
+        st.download_button("Download Prometheus metrics", metrics.to_prometheus_text(),
+                           file_name="healsure_metrics.prom", mime="text/plain")
 
 def show_dashboard():
-    tab1, tab2, tab3, tab4 = st.tabs(["Premium Estimator", "Wellness Dashboard", "Health Tips", "Analytics"])
-    with tab1:
-        show_premium_estimator()
-    with tab2:
-        show_wellness_dashboard()
-    with tab3:
-        show_health_tips()
-    with tab4:
-        show_analytics()
+    # st.tabs would run every section on each rerun, so only the selected one is rendered.
+    # Each section is a fragment, so a widget change reruns only the section it belongs to.
+    section = st.radio("Section", list(DASHBOARD_SECTIONS), horizontal=True,
+                       label_visibility="collapsed", key="dashboard_section")
+    DASHBOARD_SECTIONS[section]()
 
+@st.fragment
 def show_premium_estimator():
     st.header(" Insurance Premium Estimation")
 
-    col1, col2 = st.columns([1, 1])
+    warmup = get_model_warmup()
+    if warmup.state == WARMING_UP:
+        st.info("⏳ The premium model is warming up. You can fill in the form meanwhile.")
+        await_model_warmup()
+    elif warmup.state == FAILED:
+        st.error(f"The premium model could not be loaded: {warmup.error}")
+        if st.button("Retry loading the model"):
+            get_model_warmup.clear()
+            st.rerun()
 
-    with col1:
-        st.subheader("Personal Information")
-        age = st.slider("Age", 18, 80, 35)
-        sex = st.selectbox("Gender", ["male", "female"])
-        bmi = st.number_input("BMI", 15.0, 50.0, 25.0, 0.1)
-        children = st.selectbox("Number of Children", [0, 1, 2, 3, 4, 5])
-        smoker = st.selectbox("Smoking Status", ["no", "yes"])
-        region = st.selectbox("Region", ["southwest", "southeast", "northwest", "northeast"])
+    # Inputs are batched in a form: editing them triggers no rerun until "Calculate Premium"
+    with st.form("premium_estimator_form", border=False):
+        col1, col2 = st.columns([1, 1])
 
-    with col2:
-        st.subheader("Wellness Metrics")
-        exercise_freq = st.slider("Exercise Frequency (days/week)", 0, 7, 3)
-        diet_quality = st.selectbox("Diet Quality", ["Poor", "Fair", "Good", "Excellent"])
-        sleep_hours = st.slider("Sleep Hours per Night", 4, 12, 8)
-        stress_level = st.slider("Stress Level (1-10)", 1, 10, 5)
+        with col1:
+            st.subheader("Personal Information")
+            age = st.slider("Age", 18, 80, 35)
+            sex = st.selectbox("Gender", ["male", "female"])
+            bmi = st.number_input("BMI", 15.0, 50.0, 25.0, 0.1)
+            children = st.selectbox("Number of Children", [0, 1, 2, 3, 4, 5])
+            smoker = st.selectbox("Smoking Status", ["no", "yes"])
+            region = st.selectbox("Region", ["southwest", "southeast", "northwest", "northeast"])
+
+        with col2:
+            st.subheader("Wellness Metrics")
+            exercise_freq = st.slider("Exercise Frequency (days/week)", 0, 7, 3)
+            diet_quality = st.selectbox("Diet Quality", ["Poor", "Fair", "Good", "Excellent"])
+            sleep_hours = st.slider("Sleep Hours per Night", 4, 12, 8)
+            stress_level = st.slider("Stress Level (1-10)", 1, 10, 5)
+
+        submitted = st.form_submit_button("Calculate Premium", type="primary", disabled=not warmup.is_ready)
 
-        wellness_score = st.session_state.wellness_calc.calculate_wellness_score(
+    if submitted:
+        wellness_calc = get_wellness_calculator()
+        wellness_score = wellness_calc.calculate_wellness_score(
             bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level
         )
-        discount_percentage = st.session_state.wellness_calc.get_discount_percentage(wellness_score)
+        discount_percentage = wellness_calc.get_discount_percentage(wellness_score)
 
-    if st.button("Calculate Premium", type="primary"):
-        base_premium = st.session_state.ml_model.predict_premium(
+        base_premium = get_predictor().predict_premium(
             age, sex, bmi, children, smoker, region
         )
         discount_amount = base_premium * (discount_percentage / 100)
         final_premium = base_premium - discount_amount
 
-        st.success("Premium Calculation Complete!")
-
-        create_kpi_cards(base_premium, discount_percentage, final_premium, wellness_score)
-
-        fig_gauge = create_wellness_gauge(wellness_score)
-        st.plotly_chart(fig_gauge, use_container_width=True, key="premium_estimator_gauge")
-
-        st.session_state.premium_history.append({
+        st.session_state.last_quote = {
+            'base_premium': base_premium,
+            'discount_percentage': discount_percentage,
+            'final_premium': final_premium,
+            'wellness_score': wellness_score,
+            'profile': {
+                'age': age, 'sex': sex, 'bmi': bmi, 'children': children, 'smoker': smoker,
+                'region': region, 'exercise_freq': exercise_freq, 'diet_quality': diet_quality,
+                'sleep_hours': sleep_hours, 'stress_level': stress_level
+            }
+        }
+
+        get_history_store().append(current_user(), {
             'date': datetime.now(),
             'base_premium': base_premium,
             'wellness_score': wellness_score,
@@ -131,6 +241,59 @@ def show_premium_estimator():
             'stress_level': stress_level
         })
 
+        # A new record changes the Analytics tab, so rerun the whole app once
+        st.rerun()
+
+    quote = st.session_state.get('last_quote')
+    if quote:
+        st.success("Premium Calculation Complete!")
+
+        create_kpi_cards(quote['base_premium'], quote['discount_percentage'],
+                         quote['final_premium'], quote['wellness_score'])
+
+        fig_gauge = create_wellness_gauge(quote['wellness_score'])
+        st.plotly_chart(fig_gauge, use_container_width=True, key="premium_estimator_gauge")
+
+        if st.toggle("🔮 What-if Analysis", key="what_if_enabled"):
+            show_what_if(quote['profile'])
+
+@st.fragment(run_every=1)
+def await_model_warmup():
+    """Poll the model warm-up and rerun the app once it has finished"""
+    if get_model_warmup().state != WARMING_UP:
+        st.rerun()
+
+def show_what_if(profile):
+    """Premium sensitivity to one or two factors around the last quoted profile"""
+    from what_if import SWEEP_DIMENSIONS, SWEEP_LABELS, sweep_values, what_if_surface
+    from utils.visualization import create_what_if_chart
+
+    dimensions = st.multiselect(
+        "Vary up to two factors", list(SWEEP_DIMENSIONS), default=['bmi'],
+        format_func=SWEEP_LABELS.get, max_selections=2, key="what_if_dimensions"
+    )
+    if not dimensions:
+        st.info("Pick a factor to see how your premium would change.")
+        return
+
+    sweeps = {}
+    for column, dim in zip(st.columns(len(dimensions)), dimensions):
+        values = SWEEP_DIMENSIONS[dim]
+        with column:
+            if dim == 'smoker':
+                st.caption("Smoker: comparing no vs yes")
+                sweeps[dim] = values
+                continue
+            cast, step = (float, 0.1) if dim == 'bmi' else (int, 1)
+            low, high = st.slider(f"{SWEEP_LABELS[dim]} range", cast(values[0]), cast(values[-1]),
+                                  (cast(values[0]), cast(values[-1])), step=cast(step), key=f"what_if_{dim}_range")
+            sweeps[dim] = sweep_values(dim, low, high)
+
+    surface = what_if_surface(profile, sweeps, get_predictor(), get_wellness_calculator())
+    fig_what_if = create_what_if_chart(surface, dimensions, SWEEP_LABELS, profile)
+    st.plotly_chart(fig_what_if, use_container_width=True, key="what_if_chart")
+
+@st.fragment
 def show_wellness_dashboard():
     st.header(" Wellness Score Dashboard")
 
@@ -146,17 +309,18 @@ def show_wellness_dashboard():
         stress_level = st.slider("Stress Level (1-10)", 1, 10, 5, key="wellness_stress")
 
     with col2:
-        wellness_score = st.session_state.wellness_calc.calculate_wellness_score(
+        wellness_calc = get_wellness_calculator()
+        wellness_score = wellness_calc.calculate_wellness_score(
             bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level
         )
         fig_gauge = create_wellness_gauge(wellness_score)
         st.plotly_chart(fig_gauge, use_container_width=True, key="wellness_dashboard_gauge")
 
-        discount_percentage = st.session_state.wellness_calc.get_discount_percentage(wellness_score)
+        discount_percentage = wellness_calc.get_discount_percentage(wellness_score)
         st.metric("Potential Discount", f"{discount_percentage}%")
 
         st.subheader("Wellness Score Breakdown")
-        breakdown = st.session_state.wellness_calc.get_score_breakdown(
+        breakdown = wellness_calc.get_score_breakdown(
             bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level
         )
 
@@ -188,6 +352,8 @@ def show_health_tips():
         for tip in tips['stress']:
             st.info(tip)
 
+@st.fragment
+@metrics.timed('analytics.render')
 def show_analytics():
     st.header("Premium & Wellness Analytics")
 
@@ -197,18 +363,21 @@ def show_analytics():
             generate_sample_data()
     with col_clear:
         if st.button("🗑️ Clear All Data"):
-            st.session_state.premium_history = []
-            st.rerun()
+            get_history_store().clear(current_user())
+            st.rerun(scope="fragment")
+
+    history_store = get_history_store()
+    summary = history_store.get_summary(current_user())
 
-    if st.session_state.premium_history:
-        df = pd.DataFrame(st.session_state.premium_history)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+    if summary['count']:
+        import plotly.express as px
+
+        trends = load_trend_series(current_user(), summary['version'])
 
         col1, col2 = st.columns(2)
 
         with col1:
-            fig_premium = px.line(df, x='date', y=['base_premium', 'final_premium'], 
+            fig_premium = px.line(trends['premium'], x='date', y=['base_premium', 'final_premium'], 
                                   title="Premium Trend Over Time",
                                   labels={'value': 'Premium (₹)', 'date': 'Date'})
             fig_premium.update_layout(
@@ -219,7 +388,7 @@ def show_analytics():
             st.plotly_chart(fig_premium, use_container_width=True, key="analytics_premium_trend")
 
         with col2:
-            fig_wellness = px.line(df, x='date', y='wellness_score', 
+            fig_wellness = px.line(trends['wellness'], x='date', y='wellness_score', 
                                    title="Wellness Score Trend",
                                    labels={'wellness_score': 'Wellness Score', 'date': 'Date'})
             fig_wellness.update_layout(
@@ -231,14 +400,14 @@ def show_analytics():
 
         col3, col4 = st.columns(2)
         with col3:
-            if 'bmi' in df.columns:
-                fig_bmi = px.line(df, x='date', y='bmi', 
+            if trends['bmi']['bmi'].notna().any():
+                fig_bmi = px.line(trends['bmi'], x='date', y='bmi', 
                                   title="BMI Trend Over Time",
                                   labels={'bmi': 'BMI', 'date': 'Date'})
                 fig_bmi.update_layout(xaxis_title="Date", yaxis_title="BMI")
                 st.plotly_chart(fig_bmi, use_container_width=True, key="analytics_bmi_trend")
         with col4:
-            fig_discount = px.line(df, x='date', y='discount_percentage', 
+            fig_discount = px.line(trends['discount'], x='date', y='discount_percentage', 
                                    title="Discount Percentage Trend",
                                    labels={'discount_percentage': 'Discount %', 'date': 'Date'})
             fig_discount.update_layout(
@@ -251,16 +420,20 @@ def show_analytics():
         st.subheader("📊 Summary Statistics")
         col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
         with col_stats1:
-            st.metric("Average Base Premium", f"₹{df['base_premium'].mean():.2f}")
+            st.metric("Average Base Premium", f"₹{summary['avg_base_premium']:.2f}")
         with col_stats2:
-            st.metric("Average Wellness Score", f"{df['wellness_score'].mean():.1f}")
+            st.metric("Average Wellness Score", f"{summary['avg_wellness_score']:.1f}")
         with col_stats3:
-            st.metric("Average Discount", f"{df['discount_percentage'].mean():.1f}%")
+            st.metric("Average Discount", f"{summary['avg_discount_percentage']:.1f}%")
         with col_stats4:
-            st.metric("Total Savings", f"₹{(df['base_premium'] - df['final_premium']).sum():.2f}")
+            st.metric("Total Savings", f"₹{summary['total_savings']:.2f}")
 
         st.subheader("📋 Calculation History")
-        display_df = df[['date', 'base_premium', 'wellness_score', 'discount_percentage', 'final_premium']].copy()
+        n_pages = max(1, -(-summary['count'] // HISTORY_PAGE_SIZE))
+        page = st.number_input(f"Page (of {n_pages})", 1, n_pages, n_pages, key="history_page")
+        offset = (page - 1) * HISTORY_PAGE_SIZE
+        page_df = history_store.get_history(current_user(), limit=HISTORY_PAGE_SIZE, offset=offset)
+        display_df = page_df[['date', 'base_premium', 'wellness_score', 'discount_percentage', 'final_premium']].copy()
         display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d %H:%M')
         display_df['base_premium'] = display_df['base_premium'].round(2)
         display_df['final_premium'] = display_df['final_premium'].round(2)
@@ -280,11 +453,23 @@ def show_analytics():
     else:
         st.info("💡 No premium calculations available yet. Use the Premium Estimator to generate data, or click 'Generate Sample Data' to see how analytics work!")
 
+DASHBOARD_SECTIONS = {
+    "Premium Estimator": show_premium_estimator,
+    "Wellness Dashboard": show_wellness_dashboard,
+    "Health Tips": show_health_tips,
+    "Analytics": show_analytics,
+}
+
 def generate_sample_data():
     import random
     from datetime import timedelta
 
-    st.session_state.premium_history = []
+    predictor = get_predictor()
+    if predictor is None:
+        st.error("The premium model could not be loaded, so sample data cannot be generated.")
+        return
+
+    records = []
     base_date = datetime.now() - timedelta(days=7)
 
     for i in range(8):
@@ -298,14 +483,14 @@ def generate_sample_data():
         sleep_hours = 6 + random.randint(0, 3)
         stress_level = max(1, min(10, int(10 - wellness_score / 10)))
 
-        base_premium = st.session_state.ml_model.predict_premium(
+        base_premium = predictor.predict_premium(
             age, "male", bmi, 1, "no", "northeast"
         )
 
-        discount_percentage = st.session_state.wellness_calc.get_discount_percentage(wellness_score)
+        discount_percentage = get_wellness_calculator().get_discount_percentage(wellness_score)
         final_premium = base_premium * (1 - discount_percentage / 100)
 
-        st.session_state.premium_history.append({
+        records.append({
             'date': date,
             'base_premium': base_premium,
             'wellness_score': wellness_score,
@@ -319,6 +504,10 @@ def generate_sample_data():
             'stress_level': stress_level
         })
 
+    history_store = get_history_store()
+    history_store.clear(current_user())
+    history_store.append_many(current_user(), records)
+
     st.success("Sample data generated! Check out the analytics below.")
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+import pytest
+from ml_model import InsurancePremiumPredictor
+from wellness_calculator import WellnessCalculator
+
+@pytest.fixture(scope='session')
+def predictor():
+    """A small model that trains in about a second"""
+    predictor = InsurancePremiumPredictor(n_samples=2_000, seed=0, n_estimators=10)
+    predictor.train_model()
+    assert predictor.is_trained
+    return predictor
+
+@pytest.fixture
+def wellness_calc():
+    return WellnessCalculator()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bulk_quote import INPUT_COLUMNS, quote_members, run_bulk_quote
+
+MEMBER = dict(age=35, sex='male', bmi=27.3, children=1, smoker='no', region='southeast',
+              exercise_freq=3, diet_quality='Good', sleep_hours=7, stress_level=5)
+
+def member_file(tmp_path, bad_row):
+    """Six members; with chunks of three the first chunk is clean and the second has `bad_row`"""
+    members = pd.DataFrame([MEMBER] * 6, columns=INPUT_COLUMNS)
+    members = members.astype(object)
+    for col, value in bad_row.items():
+        members.loc[4, col] = value
+    path = tmp_path / 'members.csv'
+    members.to_csv(path, index=False)
+    return str(path)
+
+def test_quote_members_reports_bad_wellness_value_per_row(predictor, wellness_calc):
+    members = pd.DataFrame([MEMBER, {**MEMBER, 'sleep_hours': 'lots'}, MEMBER], columns=INPUT_COLUMNS)
+    quotes = quote_members(members, predictor, wellness_calc)
+
+    assert quotes['error'].tolist() == [None, "Invalid value for 'sleep_hours'", None]
+    assert np.isnan(quotes.loc[1, 'final_premium']) and np.isnan(quotes.loc[1, 'wellness_score'])
+    assert quotes.loc[0, 'final_premium'] == quotes.loc[2, 'final_premium'] > 0
+
+@pytest.mark.parametrize('output_name', ['quotes.parquet', 'quotes.csv'])
+@pytest.mark.parametrize('bad_row', [{'sleep_hours': 'lots'}, {'age': 'old'}, {'region': 'mars'},
+                                     {'bmi': np.inf}, {'age': -np.inf}, {'stress_level': np.inf},
+                                     {'children': 1e39}])
+def test_bad_row_after_clean_first_chunk(tmp_path, predictor, output_name, bad_row):
+    pytest.importorskip('pyarrow')
+    output = str(tmp_path / output_name)
+    rows, _ = run_bulk_quote(member_file(tmp_path, bad_row), output, chunk_size=3,
+                             log=lambda message: None, predictor=predictor)
+
+    quotes = pd.read_parquet(output) if output.endswith('.parquet') else pd.read_csv(output)
+    assert rows == len(quotes) == 6
+    col = next(iter(bad_row))
+    assert quotes['error'].isna().tolist() == [True] * 4 + [False, True]
+    assert quotes.loc[4, 'error'] == f"Invalid value for '{col}'"
+    assert np.isnan(quotes.loc[4, 'final_premium'])
+    assert (quotes.drop(index=4)['final_premium'] > 0).all()
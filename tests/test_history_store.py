@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from data.history_store import PremiumHistoryBuffer, PremiumHistoryStore
+
+def make_records(n, start=datetime(2024, 1, 1)):
+    # Every third record is back-dated, so insertion order and date order differ
+    return [{
+        'date': start + timedelta(days=i if i % 3 else -i),
+        'base_premium': 10_000.0 + i, 'wellness_score': 50.0 + i % 50,
+        'discount_percentage': float(i % 20), 'final_premium': 9_000.0 + i,
+        'age': 30 + i % 40, 'bmi': 22.5, 'exercise_freq': i % 7,
+        'diet_quality': 'Good', 'sleep_hours': 7, 'stress_level': i % 10 + 1
+    } for i in range(n)]
+
+def test_history_pages_match_buffer_order(tmp_path):
+    store = PremiumHistoryStore(str(tmp_path / 'history.db'))
+    store.append_many('alice', make_records(120))
+    store.append_many('bob', make_records(5))
+
+    frame = PremiumHistoryBuffer().sync(store, 'alice').to_frame()
+    pages = [store.get_history('alice', limit=50, offset=offset) for offset in (0, 50, 100)]
+    assert [len(page) for page in pages] == [50, 50, 20]
+
+    paged = pd.concat(pages, ignore_index=True)
+    assert paged['date'].is_monotonic_increasing
+    assert paged['base_premium'].tolist() == frame['base_premium'].tolist()
+    assert paged['date'].tolist() == frame['date'].tolist()
+
+def test_buffer_frame_keeps_rows_after_reset(tmp_path):
+    store = PremiumHistoryStore(str(tmp_path / 'history.db'))
+    store.append_many('alice', make_records(10))
+    buffer = PremiumHistoryBuffer().sync(store, 'alice')
+    frame = buffer.to_frame()
+
+    store.clear('alice')
+    store.append_many('alice', make_records(3))
+    buffer.sync(store, 'alice')
+
+    assert len(frame) == 10
+    assert len(buffer.to_frame()) == 3
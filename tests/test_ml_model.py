@@ -0,0 +1,125 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import ml_model
+from ml_model import InsurancePremiumPredictor
+
+def test_corrupted_premium_table_is_recompiled(predictor, tmp_path):
+    model_dir = str(tmp_path)
+    artifact_path = predictor.save_model(predictor.get_artifact_path(model_dir))
+    compiled = InsurancePremiumPredictor.from_artifact(artifact_path)
+    compiled.load_or_train(model_dir, compiled=True)
+    table_path = tmp_path / f"premium_table-{predictor.get_artifact_key()}.npy"
+    good = np.load(table_path)
+
+    # One wrong premium in every age slice, so any sample of ages finds it
+    corrupted = good.copy()
+    corrupted[:, 0, 100, 0, 0, 0] += 1000
+    np.save(table_path, corrupted)
+
+    reloaded = InsurancePremiumPredictor.from_artifact(artifact_path)
+    reloaded.load_or_train(model_dir, compiled=True)
+    assert np.array_equal(reloaded.premium_table, good)
+    assert reloaded.verify_premium_table()
+    assert np.array_equal(np.load(table_path), good)
+
+def test_unverified_compile_falls_back_to_model(predictor, monkeypatch):
+    monkeypatch.setattr(InsurancePremiumPredictor, 'verify_premium_table', lambda self, *args, **kwargs: False)
+    try:
+        assert predictor.compile_premium_table() is None
+        assert predictor.premium_table is None
+        assert predictor.predict_premium(40, 'male', 27.5, 1, 'no', 'northeast') > 0
+    finally:
+        predictor.premium_table = None
+
+def test_verify_sample_ages(predictor):
+    predictor.compile_premium_table()
+    try:
+        assert predictor.verify_premium_table(ml_model.TABLE_VERIFY_AGES, seed=None)
+        predictor.premium_table = np.array(predictor.premium_table)
+        predictor.premium_table[:, 1] = 0
+        assert not predictor.verify_premium_table(ml_model.TABLE_VERIFY_AGES, seed=None)
+    finally:
+        predictor.premium_table = None
+
+def test_batch_matches_scalar_predictions(predictor):
+    members = {'age': [25, 40, 63.0], 'sex': ['female', 'male', 'male'], 'bmi': [21.7, 33.25, 28.0],
+               'children': [0, 2, 5], 'smoker': ['no', 'yes', 'no'], 'region': ['southwest', 'northeast', 'southeast']}
+    premiums = predictor.predict_premium_batch(members)
+    expected = [predictor.predict_premium(*row) for row in zip(*members.values())]
+    assert premiums.tolist() == expected
+
+def test_batch_reports_non_finite_and_out_of_range_rows(predictor):
+    bmis = [27.5, np.nan, np.inf, -np.inf, 1e39, 'huge', 31.0]
+    n = len(bmis)
+    premiums, errors = predictor.predict_premium_batch(
+        age=[40] * n, sex=['male'] * n, bmi=bmis, children=[1] * n, smoker=['no'] * n,
+        region=['northeast'] * n, return_errors=True)
+
+    bad = slice(1, n - 1)
+    assert np.isnan(premiums[bad]).all()
+    assert list(errors[bad]) == ["Invalid value for 'bmi'"] * (n - 2)
+    assert errors[0] is None and errors[-1] is None
+    assert premiums[0] == predictor.predict_premium(40, 'male', 27.5, 1, 'no', 'northeast')
+    assert premiums[-1] == predictor.predict_premium(40, 'male', 31.0, 1, 'no', 'northeast')
+
+def test_batch_chunks_and_category_errors(predictor):
+    members = pd.DataFrame({
+        'age': [25, 40, 63, 33, 51, 18, 47], 'sex': ['female', 'male', 'male', 'other', 'female', 'male', 'female'],
+        'bmi': [21.7, 33.25, 28.0, 24.0, 30.5, 19.9, 26.1], 'children': [0, 2, 5, 1, 3, 0, 4],
+        'smoker': ['no', 'yes', 'no', 'no', 'maybe', 'yes', 'no'],
+        'region': ['southwest', 'northeast', 'southeast', 'northwest', 'southwest', 'mars', 'northeast']})
+    premiums, errors = predictor.predict_premium_batch(members, return_errors=True)
+    chunked = predictor.predict_premium_batch(members, chunk_size=2)
+    np.testing.assert_array_equal(chunked, premiums)
+    assert list(errors) == [None, None, None, "Invalid value for 'sex'", "Invalid value for 'smoker'",
+                            "Invalid value for 'region'", None]
+    assert np.isnan(premiums[3:6]).all() and not np.isnan(premiums[[0, 1, 2, 6]]).any()
+
+    _, errors = predictor.predict_premium_batch(members.drop(columns='region'), return_errors=True)
+    assert set(errors) == {"Missing column 'region'"}
+
+def test_artifact_round_trip(predictor, tmp_path):
+    path = predictor.save_model(predictor.get_artifact_path(str(tmp_path)))
+    assert path and os.path.basename(path) == f"premium_model-{predictor.get_artifact_key()}.joblib"
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    loaded = InsurancePremiumPredictor(n_samples=2_000, seed=0, n_estimators=10, n_jobs=2)
+    assert loaded.load_model(path)
+    assert loaded.model.n_jobs == 2
+    assert (loaded.mse, loaded.r2) == (predictor.mse, predictor.r2)
+    quote = (40, 'male', 27.5, 1, 'no', 'northeast')
+    # Two jobs average the trees in a different order, so allow for float rounding
+    assert loaded.predict_premium(*quote) == pytest.approx(predictor.predict_premium(*quote))
+    assert InsurancePremiumPredictor.from_artifact(path).predict_premium(*quote) == predictor.predict_premium(*quote)
+
+    # A different configuration or an unreadable file is never loaded
+    assert not InsurancePremiumPredictor(n_samples=2_000, seed=1, n_estimators=10).load_model(path)
+    (tmp_path / 'broken.joblib').write_bytes(b'not a pickle')
+    assert not loaded.load_model(str(tmp_path / 'broken.joblib'))
+    assert not loaded.load_model(str(tmp_path / 'missing.joblib'))
+
+DISTILL_CANDIDATES = [{'n_estimators': 2, 'max_depth': 3}, {'n_estimators': 5, 'max_depth': 8}]
+
+def test_distill_picks_first_student_within_budget(predictor, tmp_path):
+    student, report = ml_model.distill_model(predictor, max_r2_loss=1.0, candidates=DISTILL_CANDIDATES,
+                                             transfer_samples=2_000)
+    assert [row['model'] for row in report] == ['teacher', 'student']
+    assert student.model.get_params()['max_depth'] == 3
+    assert student.get_artifact_key() != predictor.get_artifact_key()
+    assert student.dataset_params['distilled_from'] == predictor.get_artifact_key()
+    assert report[1]['model_bytes'] < report[0]['model_bytes']
+
+    # A distilled artifact loads on its own, as it would on a serving node
+    path = student.save_model(str(tmp_path / 'student.joblib'))
+    served = InsurancePremiumPredictor.from_artifact(path)
+    quote = (40, 'male', 27.5, 1, 'no', 'northeast')
+    assert served.predict_premium(*quote) == student.predict_premium(*quote)
+
+def test_distill_reports_every_student_when_none_fits(predictor):
+    student, report = ml_model.distill_model(predictor, max_r2_loss=-1.0, candidates=DISTILL_CANDIDATES,
+                                             transfer_samples=2_000)
+    assert student is None
+    assert [row['params'] for row in report[1:]] == DISTILL_CANDIDATES
+    assert not any(row['within_budget'] for row in report[1:])
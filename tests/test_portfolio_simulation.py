@@ -0,0 +1,27 @@
+from portfolio_simulation import SCENARIOS, simulate_portfolio
+
+PREDICTOR_PARAMS = {'n_samples': 2_000, 'seed': 0, 'n_estimators': 10}
+
+def test_results_do_not_depend_on_workers(predictor, tmp_path):
+    # Workers load the fixture's model from the artifact instead of training their own
+    predictor.save_model(predictor.get_artifact_path(str(tmp_path)))
+    scenarios = {name: SCENARIOS[name] for name in ('baseline', 'smokers_quit_25pct', 'healthy_habits')}
+    runs = [simulate_portfolio(scenarios, n_members=3_000, seed=7, chunk_size=1_000, n_jobs=n_jobs,
+                               predictor_params=PREDICTOR_PARAMS, model_dir=str(tmp_path), compiled=False)
+            for n_jobs in (1, 2)]
+
+    assert runs[0]['scenarios'] == runs[1]['scenarios']
+    results = runs[0]['scenarios']
+    assert results['baseline']['total_final_premium_change']['estimate'] == 0
+    assert results['smokers_quit_25pct']['total_base_premium_change']['estimate'] < 0
+    assert results['healthy_habits']['mean_wellness_score_change']['estimate'] > 0
+
+    interval = results['baseline']['total_final_premium']
+    assert interval['ci_low'] < interval['estimate'] < interval['ci_high']
+
+def test_results_depend_on_seed(predictor, tmp_path):
+    predictor.save_model(predictor.get_artifact_path(str(tmp_path)))
+    totals = [simulate_portfolio({'baseline': {}}, n_members=500, seed=seed, n_jobs=1,
+                                 predictor_params=PREDICTOR_PARAMS, model_dir=str(tmp_path), compiled=False)
+              ['scenarios']['baseline']['total_base_premium']['estimate'] for seed in (1, 1, 2)]
+    assert totals[0] == totals[1] != totals[2]
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import pytest
+from quote_service import MAX_BODY_BYTES, QuoteService
+from wellness_calculator import WellnessCalculator
+
+MEMBER = dict(age=35, sex='male', bmi=27.3, children=1, smoker='no', region='southeast',
+              exercise_freq=3, diet_quality='Good', sleep_hours=7, stress_level=5)
+
+class PoisonedWellnessCalculator(WellnessCalculator):
+    """Raises whenever a batch contains a stress level of 99, like an unexpected scoring bug"""
+
+    def calculate_wellness_score_batch(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
+        if (stress_level == 99).any():
+            raise RuntimeError("poisoned row")
+        return super().calculate_wellness_score_batch(bmi, exercise_freq, diet_quality, smoker,
+                                                      sleep_hours, stress_level)
+
+async def quote_concurrently(service, members):
+    """handle_quote for every member at once, with the batcher running; exceptions are returned"""
+    batcher = asyncio.create_task(service.batcher.run())
+    try:
+        return await asyncio.gather(*(service.handle_quote(json.dumps(member).encode()) for member in members),
+                                    return_exceptions=True)
+    finally:
+        batcher.cancel()
+
+def test_bad_wellness_field_is_rejected_before_batching(predictor):
+    service = QuoteService(predictor, WellnessCalculator(), max_wait_ms=50)
+    members = [MEMBER, {**MEMBER, 'sleep_hours': 'lots'}, {**MEMBER, 'age': '41'}]
+    (status_ok, quote), (status_bad, error), (status_str, _) = asyncio.run(quote_concurrently(service, members))
+
+    assert status_ok == 200 and quote['final_premium'] > 0
+    assert status_bad == 422 and 'sleep_hours' in error['error']
+    assert status_str == 200
+    assert service.stats.batch_sizes[0] == 2
+
+def test_failed_batch_is_requoted_one_by_one(predictor):
+    service = QuoteService(predictor, PoisonedWellnessCalculator(), max_wait_ms=50)
+    members = [MEMBER, {**MEMBER, 'stress_level': 99}, MEMBER]
+    results = asyncio.run(quote_concurrently(service, members))
+
+    assert results[0][0] == results[2][0] == 200
+    assert isinstance(results[1], RuntimeError)
+    assert service.stats.batch_sizes[0] == 3
+
+async def exchange(service, *requests):
+    """Send each raw request on one connection and return everything the server wrote back"""
+    server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for request_bytes in requests:
+            writer.write(request_bytes)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+def http_request(method, path, body=b'', connection='keep-alive'):
+    return (f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {connection}\r\n\r\n").encode('latin-1') + body
+
+@pytest.mark.parametrize('request_bytes', [b'garbage\r\n\r\n', b'POST /quote HTTP/1.1\r\nContent-Length: x\r\n\r\n'])
+def test_malformed_request_gets_400(predictor, request_bytes):
+    response = asyncio.run(exchange(QuoteService(predictor, WellnessCalculator()), request_bytes))
+    assert response.startswith(b'HTTP/1.1 400 Bad Request')
+    assert b'Connection: close' in response
+
+def test_oversized_body_gets_413_without_being_read(predictor):
+    service = QuoteService(predictor, WellnessCalculator())
+    request_bytes = f"POST /quote HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode('latin-1')
+    response = asyncio.run(exchange(service, request_bytes))
+
+    assert response.startswith(b'HTTP/1.1 413 Payload Too Large')
+    assert b'Connection: close' in response
+    assert service.stats.requests == 0
+
+def test_request_stats_cover_only_the_quote_route(predictor):
+    service = QuoteService(predictor, WellnessCalculator())
+    body = json.dumps({**MEMBER, 'age': 'old'}).encode()
+    response = asyncio.run(exchange(
+        service,
+        http_request('POST', '/quote?trace=1', body),
+        http_request('POST', '/quotes', body),
+        http_request('GET', '/quote/anything'),
+        http_request('GET', '/health', connection='close'),
+    ))
+
+    assert response.count(b'HTTP/1.1 ') == 4
+    assert response.count(b'HTTP/1.1 404 Not Found') == 2
+    assert service.stats.requests == 1
@@ -0,0 +1,13 @@
+from benchmarks.run_benchmarks import compare
+
+def as_results(**metrics):
+    return {'metrics': {name: {'value': value, 'unit': unit} for name, (value, unit) in metrics.items()}}
+
+def test_compare_follows_each_unit_direction():
+    baseline = as_results(predict=(100.0, 'us'), quotes=(1_000.0, 'rows/s'), r2=(0.8, 'r2'),
+                          size=(1_000.0, 'bytes'), workers=(4.0, 'count'))
+    results = as_results(predict=(130.0, 'us'), quotes=(1_500.0, 'rows/s'), r2=(0.5, 'r2'),
+                         size=(900.0, 'bytes'), workers=(1.0, 'count'))
+
+    regressions = {metric: round(change, 3) for metric, _, _, change in compare(results, baseline, 0.2)}
+    assert regressions == {'predict': 0.3, 'r2': 0.375}
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip('streamlit.testing.v1')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter, since other tests may already have imported plotly
+RENDER_SECTION = """
+import json
+import sys
+from streamlit.testing.v1 import AppTest
+
+# Streamlit imports plotly.graph_objects itself to register its chart theme
+preloaded = {name for name in sys.modules if name.startswith('plotly')}
+at = AppTest.from_file('streamlit_app.py', default_timeout=60)
+at.session_state['authenticated'] = True
+at.session_state['user_id'] = 'user'
+at.session_state['dashboard_section'] = sys.argv[1]
+at.run()
+assert not at.exception, at.exception
+print(json.dumps([[header.value for header in at.header],
+                  sorted(name for name in sys.modules if name.startswith('plotly') and name not in preloaded)]))
+"""
+
+def render_section(section):
+    result = subprocess.run([sys.executable, '-c', RENDER_SECTION, section], cwd=ROOT,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    headers, plotly_modules = json.loads(result.stdout.splitlines()[-1])
+    return headers, plotly_modules
+
+def test_tips_render_imports_no_chart_code():
+    headers, plotly_modules = render_section('Health Tips')
+    assert 'Personalized Health Tips' in headers
+    assert 'Wellness Score Dashboard' not in headers
+    assert plotly_modules == []
+
+def test_wellness_section_draws_the_gauge():
+    headers, plotly_modules = render_section('Wellness Dashboard')
+    assert 'Wellness Score Dashboard' in headers
+    assert 'plotly.graph_objs._indicator' in plotly_modules
@@ -0,0 +1,46 @@
+import os
+import pandas as pd
+import tune_model
+
+CONFIGS = [{'backend': 'random_forest', 'params': {'n_estimators': 5, 'max_depth': 4}},
+           {'backend': 'random_forest', 'params': {'n_estimators': 5, 'max_depth': 8}},
+           {'backend': 'glm', 'params': {'alpha': 1e-3}}]
+
+def run_search(cache_dir):
+    return tune_model.search(CONFIGS, n_folds=3, n_samples=1_000, seed=0, n_jobs=1,
+                             cache_dir=str(cache_dir), latency_calls=5)
+
+def test_search_resumes_from_cached_folds(tmp_path, monkeypatch):
+    results, front = run_search(tmp_path)
+    cached = sorted(os.listdir(tmp_path))
+    assert len(cached) == 9 and all(name.startswith('fold-') for name in cached)
+    assert results['folds'].tolist() == [3, 3, 3]
+    assert set(front['params']) <= set(results['params'])
+
+    # An interrupted search lost two folds; only those are fitted again
+    for name in cached[:2]:
+        os.remove(tmp_path / name)
+    evaluated = []
+    evaluate_fold = tune_model.evaluate_fold
+    monkeypatch.setattr(tune_model, 'evaluate_fold', lambda task: evaluated.append(task) or evaluate_fold(task))
+
+    resumed, _ = run_search(tmp_path)
+    assert len(evaluated) == 2
+    assert sorted(os.listdir(tmp_path)) == cached
+    pd.testing.assert_frame_equal(resumed[['backend', 'params', 'r2', 'rmse', 'folds']],
+                                  results[['backend', 'params', 'r2', 'rmse', 'folds']])
+
+    evaluated.clear()
+    run_search(tmp_path)
+    assert evaluated == []
+
+def test_fold_key_changes_with_the_configuration():
+    dataset_params = {'n_samples': 1_000, 'seed': 0}
+    keys = {tune_model.fold_key(config, fold, 3, dataset_params, 0) for config in CONFIGS for fold in range(3)}
+    assert len(keys) == 9
+    assert tune_model.fold_key(CONFIGS[0], 0, 3, dataset_params, 1) not in keys
+
+def test_pareto_front_drops_dominated_rows():
+    results = pd.DataFrame({'params': ['a', 'b', 'c', 'd'], 'r2': [0.9, 0.8, 0.85, 0.7],
+                            'latency_p50_us': [50, 10, 60, 10], 'model_bytes': [1000, 100, 2000, 100]})
+    assert tune_model.pareto_front(results)['params'].tolist() == ['a', 'b']
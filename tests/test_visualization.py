@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from utils.visualization import downsample_lttb, downsample_trend
+
+def test_lttb_keeps_endpoints_and_one_point_per_bucket():
+    x = np.arange(1_000)
+    y = np.sin(x / 40.0)
+    indices = downsample_lttb(x, y, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert (np.diff(indices) > 0).all()
+    edges = np.linspace(1, 999, 49).astype(int)
+    assert ((indices[1:-1] >= edges[:-1]) & (indices[1:-1] < edges[1:])).all()
+
+def test_lttb_keeps_spikes():
+    y = np.zeros(1_000)
+    y[[137, 640]] = [50.0, -20.0]
+    indices = downsample_lttb(np.arange(1_000), y, 20)
+    assert {137, 640} <= set(indices.tolist())
+
+def test_lttb_returns_everything_when_there_is_nothing_to_drop():
+    assert downsample_lttb([0, 1, 2], [5, 6, 7], 10).tolist() == [0, 1, 2]
+    assert downsample_lttb(np.arange(10), np.arange(10), 2).tolist() == list(range(10))
+
+def test_trend_downsampling_over_dates():
+    dates = pd.date_range('2024-01-01', periods=2_000, freq='h')
+    df = pd.DataFrame({'date': dates, 'premium': np.linspace(1_000, 2_000, 2_000),
+                       'score': np.zeros(2_000)})
+    df.loc[1_234, 'score'] = 99.0
+
+    small = downsample_trend(df, 'date', ['premium', 'score'], 100)
+    assert len(small) <= 100
+    assert small['date'].is_monotonic_increasing
+    assert 1_234 in small.index
+    assert len(downsample_trend(df.head(50), 'date', ['premium'], 100)) == 50
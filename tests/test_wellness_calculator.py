@@ -0,0 +1,61 @@
+import itertools
+import numpy as np
+import pytest
+
+MISSING = [np.nan, None]
+
+# Every input the estimator UI offers, plus off-grid, out-of-range and missing values
+COMPONENT_INPUTS = {
+    'bmi': [round(x, 1) for x in np.arange(100, 601) / 10] + [18.45, 24.95, 27.35, 39.95] + MISSING,
+    'exercise': list(range(-1, 9)) + [0.5, 4.5, 5.5] + MISSING,
+    'diet': ['Excellent', 'Good', 'Fair', 'Poor', 'Unknown'] + MISSING,
+    'smoking': ['yes', 'no', 'Yes'] + MISSING,
+    'sleep': list(range(0, 15)) + [6.5, 9.5, 10.5, 11.5] + MISSING,
+    'stress': list(range(0, 12)) + [3.5, 7.5, 8.5] + MISSING,
+}
+METHODS = {
+    'bmi': 'calculate_bmi_score', 'exercise': 'calculate_exercise_score', 'diet': 'calculate_diet_score',
+    'smoking': 'calculate_smoking_score', 'sleep': 'calculate_sleep_score', 'stress': 'calculate_stress_score',
+}
+
+def as_batch(values):
+    """Batch input the way a member file arrives: float columns with NaN, or object columns"""
+    if all(value is None or isinstance(value, (int, float)) for value in values):
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+    return np.array(values, dtype=object)
+
+@pytest.mark.parametrize('component', list(METHODS))
+def test_component_batch_matches_scalar(wellness_calc, component):
+    values = COMPONENT_INPUTS[component]
+    score = getattr(wellness_calc, METHODS[component])
+    score_batch = getattr(wellness_calc, METHODS[component] + '_batch')
+    expected = [score(value) for value in values]
+
+    assert score_batch(as_batch(values)).tolist() == expected
+    assert score_batch(np.array(values, dtype=object)).tolist() == expected
+
+def test_wellness_score_batch_matches_scalar(wellness_calc):
+    # One input per distinct component score plus the missing values covers every
+    # combination of scores the weighted sum and rounding can see
+    representatives = {
+        component: list({getattr(wellness_calc, METHODS[component])(value): value
+                         for value in COMPONENT_INPUTS[component]}.values()) + MISSING
+        for component in METHODS
+    }
+    rows = list(itertools.product(*representatives.values()))
+    columns = [as_batch(list(column)) for column in zip(*rows)]
+
+    expected_scores = [wellness_calc.calculate_wellness_score(*row) for row in rows]
+    scores = wellness_calc.calculate_wellness_score_batch(*columns)
+    assert scores.tolist() == expected_scores
+    assert (wellness_calc.get_discount_percentage_batch(scores).tolist()
+            == [wellness_calc.get_discount_percentage(score) for score in expected_scores])
+
+    breakdown = wellness_calc.get_score_breakdown_batch(*columns)
+    expected = [wellness_calc.get_score_breakdown(*row) for row in rows]
+    assert breakdown.to_dict('records') == expected
+
+    texts = [text for _, _, text in wellness_calc.improvement_rules]
+    flags = wellness_calc.get_improvement_flags_batch(breakdown)
+    assert [[text for bit, text in enumerate(texts) if mask >> bit & 1] for mask in flags.tolist()] == [
+        wellness_calc.get_improvement_suggestions(*row) for row in rows]
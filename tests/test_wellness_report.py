@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.health_tips import get_personalized_tips
+from wellness_report import REPORT_INPUT_COLUMNS, ReportText, run_wellness_report, score_members
+
+MEMBER = dict(bmi=31.0, smoker='yes', exercise_freq=1, diet_quality='Fair', sleep_hours=5, stress_level=8)
+
+def test_report_text_matches_scalar_suggestions_and_tips(wellness_calc):
+    members = pd.DataFrame([MEMBER, {**MEMBER, 'bmi': 22.0, 'smoker': 'no', 'exercise_freq': 5}])
+    report = ReportText(wellness_calc).expand_report(score_members(members, wellness_calc))
+
+    for i, member in enumerate(members[REPORT_INPUT_COLUMNS].to_dict('records')):
+        args = [member[col] for col in ('bmi', 'exercise_freq', 'diet_quality', 'smoker',
+                                         'sleep_hours', 'stress_level')]
+        assert report.loc[i, 'wellness_score'] == wellness_calc.calculate_wellness_score(*args)
+        assert report.loc[i, 'suggestions'] == ' | '.join(wellness_calc.get_improvement_suggestions(*args))
+        tips = get_personalized_tips(0, wellness_calc.get_score_breakdown(*args))
+        assert report.loc[i, 'tips'] == ' | '.join(f"{category}: {'; '.join(items)}"
+                                                    for category, items in tips.items())
+
+@pytest.mark.parametrize('output_name', ['reports.parquet', 'reports.csv'])
+def test_bad_row_after_clean_first_chunk(tmp_path, output_name):
+    pytest.importorskip('pyarrow')
+    members = pd.DataFrame([MEMBER] * 6).astype(object)
+    members.insert(0, 'note', [None, None, None, 'vip', None, None])
+    members.loc[4, 'stress_level'] = 'high'
+    input_path = tmp_path / 'members.csv'
+    members.to_csv(input_path, index=False)
+
+    output = str(tmp_path / output_name)
+    rows, _ = run_wellness_report(str(input_path), output, chunk_size=3, keep_columns=['note'],
+                                  log=lambda message: None)
+
+    report = pd.read_parquet(output) if output.endswith('.parquet') else pd.read_csv(output)
+    assert rows == len(report) == 6
+    assert report['error'].isna().tolist() == [True] * 4 + [False, True]
+    assert report.loc[4, 'error'] == "Invalid value for 'stress_level'"
+    assert np.isnan(report.loc[4, 'wellness_score']) and report.loc[4, 'suggestion_flags'] == 0
+    assert report.loc[3, 'note'] == 'vip'
@@ -0,0 +1,158 @@
+import copy
+import math
+import os
+import numpy as np
+import pytest
+import yaml
+from wellness_calculator import WellnessCalculator
+from wellness_rules import DEFAULT_RULES, BandTable, CategoryTable, RulesWatcher, load_rules
+
+# The if/elif scorers the default rules replaced, kept as the reference
+def old_bmi_score(bmi):
+    if 18.5 <= bmi <= 24.9:
+        return 20
+    elif 25.0 <= bmi <= 29.9:
+        return 15
+    elif 30.0 <= bmi <= 34.9:
+        return 10
+    elif 35.0 <= bmi <= 39.9:
+        return 5
+    return 0
+
+def old_exercise_score(exercise_freq):
+    if exercise_freq >= 5:
+        return 20
+    elif exercise_freq >= 4:
+        return 16
+    elif exercise_freq >= 3:
+        return 12
+    elif exercise_freq >= 2:
+        return 8
+    elif exercise_freq >= 1:
+        return 4
+    return 0
+
+def old_sleep_score(sleep_hours):
+    if 7 <= sleep_hours <= 9:
+        return 20
+    elif 6 <= sleep_hours < 7 or 9 < sleep_hours <= 10:
+        return 15
+    elif 5 <= sleep_hours < 6 or 10 < sleep_hours <= 11:
+        return 10
+    return 5
+
+def old_stress_score(stress_level):
+    if stress_level <= 3:
+        return 20
+    elif stress_level <= 5:
+        return 15
+    elif stress_level <= 7:
+        return 10
+    elif stress_level <= 8:
+        return 5
+    return 0
+
+def old_discount_percentage(wellness_score):
+    for min_score, max_score, discount in [(90, 100, 20), (80, 89, 15), (70, 79, 10), (60, 69, 5), (0, 59, 0)]:
+        if min_score <= wellness_score <= max_score:
+            return discount
+    return 0
+
+def parity_inputs(low, high, edges):
+    """0.01-step grid plus off-grid points, every breakpoint +-1 ulp, infinities and NaN"""
+    grid = np.arange(round(low * 100), round(high * 100) + 1) / 100
+    edges = np.array(edges, dtype=float)
+    return np.concatenate([grid, grid + 0.005, edges, np.nextafter(edges, -np.inf),
+                           np.nextafter(edges, np.inf), [-np.inf, np.inf, np.nan]])
+
+PARITY_CASES = [
+    ('calculate_bmi_score', old_bmi_score, 0, 60, [18.5, 24.9, 25, 29.9, 30, 34.9, 35, 39.9]),
+    ('calculate_exercise_score', old_exercise_score, -2, 10, [1, 2, 3, 4, 5]),
+    ('calculate_sleep_score', old_sleep_score, 0, 16, [5, 6, 7, 9, 10, 11]),
+    ('calculate_stress_score', old_stress_score, -2, 12, [3, 5, 7, 8]),
+    ('get_discount_percentage', old_discount_percentage, -5, 105, [0, 59, 60, 69, 70, 79, 80, 89, 90, 100]),
+]
+
+@pytest.mark.parametrize('method, old_score, low, high, edges', PARITY_CASES, ids=[case[0] for case in PARITY_CASES])
+def test_compiled_rules_match_old_scorers(wellness_calc, method, old_score, low, high, edges):
+    score = getattr(wellness_calc, method)
+    score_batch = getattr(wellness_calc, method + '_batch')
+
+    for values in (parity_inputs(low, high, edges), np.arange(low, high + 1)):
+        expected = [old_score(x) for x in values.tolist()]
+        assert [score(x) for x in values.tolist()] == expected
+        assert score_batch(values).tolist() == expected
+
+def write_rules(path, rules):
+    path.write_text(yaml.safe_dump(rules, sort_keys=False))
+    return str(path)
+
+def broken_rules(edit):
+    rules = copy.deepcopy(DEFAULT_RULES)
+    edit(rules)
+    return rules
+
+@pytest.mark.parametrize('rules, message', [
+    (broken_rules(lambda r: r.pop('weights')), "need a 'weights' mapping"),
+    (broken_rules(lambda r: r['weights'].pop('sleep')), "'weights' must list exactly"),
+    (broken_rules(lambda r: r.update(extra={})), "Unknown wellness rules sections: extra"),
+    (broken_rules(lambda r: r['weights'].update(bmi='high')), "weights.bmi must be a number"),
+    (broken_rules(lambda r: r['scores']['bmi']['bands'][0].update(min=30)), "has min 30 above max 24.9"),
+    (broken_rules(lambda r: r['scores']['bmi']['bands'][0].update(top=1)), "has unknown keys: top"),
+    (broken_rules(lambda r: r['scores']['bmi']['bands'][0].pop('score')), "is missing 'score'"),
+    (broken_rules(lambda r: r['scores']['bmi'].update(categories={'x': 1})), "needs either 'bands' or 'categories'"),
+    (broken_rules(lambda r: r['scores']['smoking'].update(categories={True: 0})), "keys must be strings"),
+    (broken_rules(lambda r: r['discount_tiers']['bands'][0].pop('discount')), "is missing 'discount'"),
+])
+def test_invalid_rules_are_rejected(tmp_path, rules, message):
+    with pytest.raises(ValueError, match=message):
+        load_rules(write_rules(tmp_path / 'rules.yaml', rules))
+
+def test_unparseable_rules_file_is_rejected(tmp_path):
+    path = tmp_path / 'rules.yaml'
+    path.write_text("weights: [unclosed\n")
+    with pytest.raises(ValueError, match="Could not parse wellness rules"):
+        load_rules(str(path))
+
+def test_watcher_swaps_in_changed_rules(tmp_path):
+    path = write_rules(tmp_path / 'rules.yaml', DEFAULT_RULES)
+    calc = WellnessCalculator(rules_path=path, reload_interval=None)
+    watcher = RulesWatcher(calc, path, interval=3600)
+    try:
+        assert not watcher.check()
+        assert calc.calculate_bmi_score(22.0) == 20
+
+        write_rules(tmp_path / 'rules.yaml', broken_rules(
+            lambda r: r['scores']['bmi']['bands'][0].update(score=18)))
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+        assert watcher.check()
+        assert calc.calculate_bmi_score(22.0) == 18
+        assert calc.calculate_bmi_score_batch(np.array([22.0, 27.35])).tolist() == [18, 15]
+
+        # An invalid edit is logged and the last good rules stay in place
+        (tmp_path / 'rules.yaml').write_text("weights: [unclosed\n")
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+        assert not watcher.check()
+        assert calc.calculate_bmi_score(22.0) == 18
+    finally:
+        watcher.stop()
+
+def test_band_chain_edge_cases():
+    table = BandTable([{'max': 0, 'max_exclusive': True, 'score': 1},
+                       {'min': 0, 'max': math.inf, 'score': 2},
+                       {'score': 3}], default=9)
+    values = [-math.inf, -1, 0, 5, math.inf, math.nan]
+    assert [table.score(x) for x in values + [None]] == [1, 1, 2, 2, 2, 9, 9]
+    assert table.score_batch(np.array(values)).tolist() == [1, 1, 2, 2, 2, 9]
+
+    unbounded = BandTable([{'score': 3}], default=9)
+    assert [unbounded.score(x) for x in (-math.inf, 0, math.nan)] == [3, 3, 9]
+
+    with pytest.raises(ValueError, match="min_exclusive without a finite min"):
+        BandTable([{'max': 1, 'min_exclusive': True, 'score': 1}], default=0)
+
+def test_large_category_tables_score_like_small_ones():
+    categories = {f"level {i}": i for i in range(20)}
+    table = CategoryTable(categories, default=-1)
+    assert [table.score(key) for key in categories] == list(range(20))
+    assert table.score('other') == table.score(None) == -1
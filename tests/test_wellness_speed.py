@@ -0,0 +1,134 @@
+import timeit
+import pytest
+from wellness_calculator import WellnessCalculator
+
+# Slack for timer noise when comparing best-of-N timings
+TOLERANCE = 1.10
+
+class BaselineWellnessCalculator:
+    """The hardcoded scalar scorers the compiled rules replaced"""
+
+    def __init__(self):
+        self.weights = {'bmi': 0.25, 'exercise': 0.25, 'diet': 0.20, 'smoking': 0.15, 'sleep': 0.10, 'stress': 0.05}
+        self.discount_tiers = [(90, 100, 20), (80, 89, 15), (70, 79, 10), (60, 69, 5), (0, 59, 0)]
+
+    def calculate_bmi_score(self, bmi):
+        if 18.5 <= bmi <= 24.9:
+            return 20
+        elif 25.0 <= bmi <= 29.9:
+            return 15
+        elif 30.0 <= bmi <= 34.9:
+            return 10
+        elif 35.0 <= bmi <= 39.9:
+            return 5
+        else:
+            return 0
+
+    def calculate_exercise_score(self, exercise_freq):
+        if exercise_freq >= 5:
+            return 20
+        elif exercise_freq >= 4:
+            return 16
+        elif exercise_freq >= 3:
+            return 12
+        elif exercise_freq >= 2:
+            return 8
+        elif exercise_freq >= 1:
+            return 4
+        else:
+            return 0
+
+    def calculate_diet_score(self, diet_quality):
+        diet_scores = {"Excellent": 20, "Good": 15, "Fair": 10, "Poor": 0}
+        return diet_scores.get(diet_quality, 0)
+
+    def calculate_smoking_score(self, smoker):
+        return 0 if smoker == "yes" else 20
+
+    def calculate_sleep_score(self, sleep_hours):
+        if 7 <= sleep_hours <= 9:
+            return 20
+        elif 6 <= sleep_hours < 7 or 9 < sleep_hours <= 10:
+            return 15
+        elif 5 <= sleep_hours < 6 or 10 < sleep_hours <= 11:
+            return 10
+        else:
+            return 5
+
+    def calculate_stress_score(self, stress_level):
+        if stress_level <= 3:
+            return 20
+        elif stress_level <= 5:
+            return 15
+        elif stress_level <= 7:
+            return 10
+        elif stress_level <= 8:
+            return 5
+        else:
+            return 0
+
+    def calculate_wellness_score(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
+        bmi_score = self.calculate_bmi_score(bmi)
+        exercise_score = self.calculate_exercise_score(exercise_freq)
+        diet_score = self.calculate_diet_score(diet_quality)
+        smoking_score = self.calculate_smoking_score(smoker)
+        sleep_score = self.calculate_sleep_score(sleep_hours)
+        stress_score = self.calculate_stress_score(stress_level)
+        total_score = (
+            bmi_score * self.weights['bmi'] +
+            exercise_score * self.weights['exercise'] +
+            diet_score * self.weights['diet'] +
+            smoking_score * self.weights['smoking'] +
+            sleep_score * self.weights['sleep'] +
+            stress_score * self.weights['stress']
+        ) * 5
+        return round(total_score, 1)
+
+    def get_score_breakdown(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
+        return {
+            "BMI Score": self.calculate_bmi_score(bmi),
+            "Exercise Score": self.calculate_exercise_score(exercise_freq),
+            "Diet Score": self.calculate_diet_score(diet_quality),
+            "Smoking Score": self.calculate_smoking_score(smoker),
+            "Sleep Score": self.calculate_sleep_score(sleep_hours),
+            "Stress Score": self.calculate_stress_score(stress_level)
+        }
+
+    def get_discount_percentage(self, wellness_score):
+        for min_score, max_score, discount in self.discount_tiers:
+            if min_score <= wellness_score <= max_score:
+                return discount
+        return 0
+
+ON_GRID = [(22.0, 5, 'Excellent', 'no', 8, 2), (27.3, 3, 'Good', 'no', 7, 4),
+           (31.0, 1, 'Fair', 'yes', 6, 7), (41.5, 0, 'Poor', 'yes', 4, 9)]
+MIXED = [(27.35, 3, 'Good', 'no', 7.5, 4), (22.0, 5, 'Excellent', 'no', 8, 2),
+         (36.15, 2.5, 'Fair', 'yes', 10.25, 7.5), (17.9, 0, 'Poor', 'no', 5.5, 9)]
+
+def best_of(function, repeat=2, number=5_000):
+    return min(timeit.repeat(function, number=number, repeat=repeat))
+
+def profile_calls(calc, method, rows):
+    score = getattr(calc, method)
+    return lambda: [score(*row) for row in rows]
+
+@pytest.mark.parametrize('method, rows', [
+    ('calculate_wellness_score', ON_GRID),
+    ('calculate_wellness_score', MIXED),
+    ('get_score_breakdown', MIXED),
+    ('get_discount_percentage', [(92.25,), (85.0,), (64.5,), (89.5,), (12.0,)]),
+    ('calculate_bmi_score', [(27.35,), (22.0,), (36.15,), (45.5,)]),
+    ('calculate_sleep_score', [(7.5,), (6.25,), (10.5,), (3,)]),
+], ids=['wellness on-grid', 'wellness mixed', 'breakdown mixed', 'discount', 'bmi', 'sleep'])
+def test_rule_scoring_is_no_slower_than_hardcoded(method, rows):
+    calc, baseline = WellnessCalculator(), BaselineWellnessCalculator()
+    new, old = profile_calls(calc, method, rows), profile_calls(baseline, method, rows)
+    assert new() == old()
+
+    # Interleave the runs so machine load affects both sides alike
+    new_seconds = old_seconds = float('inf')
+    for _ in range(8):
+        old_seconds = min(old_seconds, best_of(old))
+        new_seconds = min(new_seconds, best_of(new))
+    assert new_seconds <= old_seconds * TOLERANCE, (
+        f"{method}: {new_seconds:.4f}s with compiled rules vs {old_seconds:.4f}s hardcoded")
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from what_if import sweep_values, what_if_surface
+
+PROFILE = {'age': 32, 'sex': 'female', 'bmi': 27.3, 'children': 1, 'smoker': 'no', 'region': 'southeast',
+           'exercise_freq': 3, 'diet_quality': 'Good', 'sleep_hours': 7, 'stress_level': 4}
+
+def scalar_quote(predictor, wellness_calc, member):
+    base = predictor.predict_premium(member['age'], member['sex'], member['bmi'], member['children'],
+                                     member['smoker'], member['region'])
+    score = wellness_calc.calculate_wellness_score(member['bmi'], member['exercise_freq'], member['diet_quality'],
+                                                   member['smoker'], member['sleep_hours'], member['stress_level'])
+    return base - base * wellness_calc.get_discount_percentage(score) / 100
+
+def test_surface_matches_scalar_quotes(predictor, wellness_calc):
+    ages = sweep_values('age', 30, 35)
+    surface = what_if_surface(PROFILE, {'age': ages, 'smoker': sweep_values('smoker')}, predictor, wellness_calc)
+
+    assert ages.tolist() == [30, 31, 32, 33, 34, 35]
+    assert len(surface) == 12
+    assert surface['age'].tolist() == np.repeat(ages, 2).tolist()
+    assert surface['smoker'].tolist() == ['no', 'yes'] * 6
+    assert surface['error'].isna().all()
+
+    for row in surface.itertuples():
+        member = dict(PROFILE, age=row.age, smoker=row.smoker)
+        assert row.final_premium == pytest.approx(scalar_quote(predictor, wellness_calc, member))
+
+    # The unchanged profile is one of the grid points
+    unchanged = surface[(surface['age'] == 32) & (surface['smoker'] == 'no')]
+    assert unchanged['final_premium_change'].tolist() == [0.0]
+
+@pytest.mark.parametrize('sweeps, profile, message', [
+    ({'age': [30], 'bmi': [25.0], 'sleep_hours': [7]}, PROFILE, "one or two dimensions"),
+    ({}, PROFILE, "one or two dimensions"),
+    ({'region': ['northeast']}, PROFILE, "Cannot sweep region"),
+    ({'age': [30]}, {k: v for k, v in PROFILE.items() if k != 'stress_level'}, "missing fields: stress_level"),
+])
+def test_invalid_sweeps_are_rejected(predictor, wellness_calc, sweeps, profile, message):
+    with pytest.raises(ValueError, match=message):
+        what_if_surface(profile, sweeps, predictor, wellness_calc)
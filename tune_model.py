@@ -0,0 +1,211 @@
+"""
+Cross-validated hyperparameter search for the premium model.
+
+Evaluates every configuration (a backend plus its settings) with k-fold
+cross-validation across a process pool. Each fold result is cached on disk
+under a hash of the configuration, so interrupted or repeated searches
+resume where they stopped. Reports the Pareto front of accuracy against
+single-quote latency and model size.
+
+Usage:
+    python tune_model.py --folds 5 --jobs 4
+    python tune_model.py --backend random_forest --random 20 --csv tuning.csv
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import LabelEncoder
+from data.insurance_data import get_insurance_data, DEFAULT_N_SAMPLES, SEXES, SMOKER_STATUSES, REGIONS
+from ml_model import InsurancePremiumPredictor, CATEGORICAL_COLUMNS, DEFAULT_MODEL_DIR, MODEL_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+# Settings searched per backend; every combination is one configuration
+SEARCH_SPACE = {
+    'random_forest': {
+        'n_estimators': [10, 25, 50, 100],
+        'max_depth': [None, 8, 12],
+        'min_samples_leaf': [1, 3, 5],
+    },
+    'hist_gradient_boosting': {
+        'max_iter': [50, 100, 200],
+        'learning_rate': [0.05, 0.1],
+        'max_leaf_nodes': [15, 31],
+    },
+    'glm': {
+        'alpha': [1e-4, 1e-3, 1e-2],
+    },
+}
+
+DEFAULT_N_FOLDS = 5
+DEFAULT_CACHE_DIR = os.path.join(DEFAULT_MODEL_DIR, 'tuning')
+# Single-quote predictions timed per fold; latencies are noisier while the pool is busy
+DEFAULT_LATENCY_CALLS = 30
+
+def grid_configs(search_space=None, backends=None):
+    """Every configuration of the search space, as {'backend': ..., 'params': {...}} dicts"""
+    search_space = search_space or SEARCH_SPACE
+    configs = []
+    for backend in backends or search_space:
+        grid = search_space[backend]
+        for values in itertools.product(*grid.values()):
+            configs.append({'backend': backend, 'params': dict(zip(grid, values))})
+    return configs
+
+def random_configs(n_configs, seed=0, search_space=None, backends=None):
+    """`n_configs` configurations drawn from the grid without replacement"""
+    configs = grid_configs(search_space, backends)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(configs), min(n_configs, len(configs)), replace=False)
+    return [configs[i] for i in sorted(picks)]
+
+def fold_key(config, fold, n_folds, dataset_params, cv_seed):
+    """Hash identifying one fold of one configuration, used as its cache file name"""
+    spec = {
+        'sklearn_version': sklearn.__version__,
+        'dataset_params': dataset_params,
+        'config': config,
+        'fold': fold,
+        'n_folds': n_folds,
+        'cv_seed': cv_seed,
+    }
+    payload = json.dumps(spec, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+def _encoded_dataset(dataset_params):
+    """Feature matrix and charges, encoded the way InsurancePremiumPredictor encodes them"""
+    df = get_insurance_data(**dataset_params)
+    encoders = {col: LabelEncoder().fit(categories)
+                for col, categories in zip(CATEGORICAL_COLUMNS, (SEXES, SMOKER_STATUSES, REGIONS))}
+    predictor = InsurancePremiumPredictor(**dataset_params)
+    predictor.encoders = encoders
+    X, _ = predictor.encode_features(df)
+    return X, df['charges'], encoders
+
+def evaluate_fold(task):
+    """
+    Fit one configuration on one fold and return its held-out accuracy, fit time,
+    single-quote latency and model size. The result is written to the cache directory.
+    """
+    config, fold, n_folds, dataset_params, cv_seed, cache_path, latency_calls = task
+    X, y, encoders = _encoded_dataset(dataset_params)
+    train_idx, test_idx = list(KFold(n_folds, shuffle=True, random_state=cv_seed).split(X))[fold]
+
+    predictor = InsurancePremiumPredictor(**dataset_params, n_jobs=1, backend=config['backend'],
+                                          **config['params'])
+    predictor.encoders = encoders
+    start = time.perf_counter()
+    predictor.model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    predictor.fit_seconds = time.perf_counter() - start
+
+    y_pred = predictor.model.predict(X.iloc[test_idx])
+    predictor.mse = mean_squared_error(y.iloc[test_idx], y_pred)
+    predictor.r2 = r2_score(y.iloc[test_idx], y_pred)
+    predictor.is_trained = True
+
+    result = {**config, 'fold': fold, **predictor.get_backend_profile(latency_calls)}
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, cache_path)
+    return result
+
+def pareto_front(results, objectives=(('r2', 'max'), ('latency_p50_us', 'min'), ('model_bytes', 'min'))):
+    """Rows of `results` not dominated on every objective by another row"""
+    scores = np.column_stack([results[col].to_numpy() * (-1 if goal == 'max' else 1)
+                              for col, goal in objectives])
+    dominated = np.zeros(len(results), dtype=bool)
+    for i in range(len(results)):
+        no_worse = np.all(scores <= scores[i], axis=1)
+        better = np.any(scores < scores[i], axis=1)
+        dominated[i] = np.any(no_worse & better)
+    return results[~dominated].sort_values('r2', ascending=False)
+
+def search(configs=None, n_folds=DEFAULT_N_FOLDS, n_samples=DEFAULT_N_SAMPLES, seed=42, cv_seed=0,
+           n_jobs=None, cache_dir=DEFAULT_CACHE_DIR, latency_calls=DEFAULT_LATENCY_CALLS):
+    """
+    Cross-validate every configuration (grid_configs() by default) and return one row per
+    configuration with mean/std r2 and RMSE and mean fit time, latency and size, sorted by r2,
+    together with its Pareto front. Folds already in `cache_dir` are not run again.
+    """
+    configs = configs or grid_configs()
+    dataset_params = {'n_samples': n_samples, 'seed': seed}
+    os.makedirs(cache_dir, exist_ok=True)
+
+    fold_results, tasks = [], []
+    for config in configs:
+        for fold in range(n_folds):
+            cache_path = os.path.join(cache_dir, f"fold-{fold_key(config, fold, n_folds, dataset_params, cv_seed)}.json")
+            if os.path.exists(cache_path):
+                with open(cache_path) as f:
+                    fold_results.append(json.load(f))
+            else:
+                tasks.append((config, fold, n_folds, dataset_params, cv_seed, cache_path, latency_calls))
+
+    logger.info("%d configurations x %d folds: %d cached, %d to run",
+                len(configs), n_folds, len(fold_results), len(tasks))
+    if tasks:
+        if n_jobs == 1:
+            fold_results.extend(evaluate_fold(task) for task in tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(evaluate_fold, task) for task in tasks]
+                for done, future in enumerate(as_completed(futures), 1):
+                    fold_results.append(future.result())
+                    if done % 25 == 0 or done == len(futures):
+                        logger.info("%d/%d folds done", done, len(futures))
+
+    folds = pd.DataFrame(fold_results)
+    folds['params'] = folds['params'].map(lambda params: json.dumps(params, sort_keys=True))
+    results = folds.groupby(['backend', 'params'], sort=False).agg(
+        r2=('r2', 'mean'),
+        r2_std=('r2', 'std'),
+        rmse=('rmse', 'mean'),
+        fit_seconds=('fit_seconds', 'mean'),
+        latency_p50_us=('latency_p50_us', 'mean'),
+        model_bytes=('model_bytes', 'mean'),
+        folds=('fold', 'count'),
+    ).reset_index().sort_values('r2', ascending=False, ignore_index=True)
+    return results, pareto_front(results)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the premium model")
+    parser.add_argument('--backend', action='append', choices=sorted(MODEL_BACKENDS),
+                        help="Backend to search; repeatable (default: all)")
+    parser.add_argument('--random', type=int, default=None, metavar='N',
+                        help="Evaluate N random configurations instead of the full grid")
+    parser.add_argument('--folds', type=int, default=DEFAULT_N_FOLDS)
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the folds and random search")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--csv', help="Also write every configuration's results to this CSV file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.random:
+        configs = random_configs(args.random, args.seed, backends=args.backend)
+    else:
+        configs = grid_configs(backends=args.backend)
+
+    results, front = search(configs, args.folds, cv_seed=args.seed, n_jobs=args.jobs, cache_dir=args.cache_dir)
+    columns = ['backend', 'params', 'r2', 'r2_std', 'rmse', 'latency_p50_us', 'model_bytes']
+    print("Pareto front (accuracy vs latency vs size):")
+    print(front[columns].to_string(index=False, formatters={
+        'r2': '{:.4f}'.format, 'r2_std': '{:.4f}'.format, 'rmse': '{:,.1f}'.format,
+        'latency_p50_us': '{:,.0f}'.format, 'model_bytes': '{:,.0f}'.format,
+    }))
+    if args.csv:
+        results.to_csv(args.csv, index=False)
+
+if __name__ == "__main__":
+    main()
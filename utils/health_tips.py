@@ -1,3 +1,7 @@
+import functools
+import sys
+import numpy as np
+
 def get_health_tips():
     """
     Return categorized health tips for improving wellness scores
@@ -39,44 +43,61 @@ def get_health_tips():
     
     return tips
 
+# Personalized tip categories in the order get_personalized_tips() adds them: (category,
+# breakdown component that triggers it when below PERSONALIZED_TIP_THRESHOLD, tips key or tips).
+# The order is the bit order of get_personalized_tip_flags_batch masks.
+PERSONALIZED_TIP_THRESHOLD = 15
+PERSONALIZED_TIP_CATEGORIES = [
+    ("BMI Improvement", "BMI Score", [
+        "🎯 Consult with a healthcare provider about a healthy weight management plan",
+        "📊 Track your food intake and physical activity",
+        "🥗 Focus on portion control and nutrient-dense foods"
+    ]),
+    ("Exercise Improvement", "Exercise Score", 'exercise'),
+    ("Nutrition Improvement", "Diet Score", 'nutrition'),
+    ("Sleep Improvement", "Sleep Score", 'sleep'),
+    ("Stress Management", "Stress Score", 'stress'),
+    ("Smoking Cessation", "Smoking Score", [
+        "🚭 Speak with your doctor about smoking cessation programs",
+        "📞 Call a quitline for support and resources",
+        "💊 Consider nicotine replacement therapy or medications",
+        "👥 Join a support group for people quitting smoking"
+    ])
+]
+
+@functools.lru_cache(maxsize=None)
+def get_personalized_tip_table():
+    """
+    Shared, immutable table of (category, component, tips) in PERSONALIZED_TIP_CATEGORIES
+    order, with the tips resolved once; bulk reports index it by bitmask bit.
+    """
+    all_tips = get_health_tips()
+    table = []
+    for category, component, tips in PERSONALIZED_TIP_CATEGORIES:
+        if isinstance(tips, str):
+            tips = all_tips[tips][:3]
+        table.append((category, component, tuple(sys.intern(tip) for tip in tips)))
+    return tuple(table)
+
 def get_personalized_tips(wellness_score, breakdown_scores):
     """
     Get personalized tips based on user's wellness score and breakdown
     """
-    all_tips = get_health_tips()
-    personalized = {}
-    
     # Identify areas that need improvement (scores below 15)
-    low_scoring_areas = {k: v for k, v in breakdown_scores.items() if v < 15}
-    
-    if "BMI Score" in low_scoring_areas:
-        personalized["BMI Improvement"] = [
-            "🎯 Consult with a healthcare provider about a healthy weight management plan",
-            "📊 Track your food intake and physical activity",
-            "🥗 Focus on portion control and nutrient-dense foods"
-        ]
-    
-    if "Exercise Score" in low_scoring_areas:
-        personalized["Exercise Improvement"] = all_tips['exercise'][:3]
-    
-    if "Diet Score" in low_scoring_areas:
-        personalized["Nutrition Improvement"] = all_tips['nutrition'][:3]
-    
-    if "Sleep Score" in low_scoring_areas:
-        personalized["Sleep Improvement"] = all_tips['sleep'][:3]
-    
-    if "Stress Score" in low_scoring_areas:
-        personalized["Stress Management"] = all_tips['stress'][:3]
-    
-    if "Smoking Score" in low_scoring_areas:
-        personalized["Smoking Cessation"] = [
-            "🚭 Speak with your doctor about smoking cessation programs",
-            "📞 Call a quitline for support and resources",
-            "💊 Consider nicotine replacement therapy or medications",
-            "👥 Join a support group for people quitting smoking"
-        ]
-    
-    return personalized
+    return {category: list(tips) for category, component, tips in get_personalized_tip_table()
+            if breakdown_scores.get(component, PERSONALIZED_TIP_THRESHOLD) < PERSONALIZED_TIP_THRESHOLD}
+
+def get_personalized_tip_flags_batch(breakdown):
+    """
+    Encode get_personalized_tips() for arrays of members as uint8 bitmasks, where bit i
+    set means category i of get_personalized_tip_table() applies. `breakdown` maps the
+    component names to score arrays, as returned by get_score_breakdown_batch.
+    """
+    table = get_personalized_tip_table()
+    flags = np.zeros(len(breakdown[table[0][1]]), dtype=np.uint8)
+    for bit, (_, component, _) in enumerate(table):
+        flags |= (np.asarray(breakdown[component]) < PERSONALIZED_TIP_THRESHOLD).astype(np.uint8) << bit
+    return flags
 
 def get_wellness_facts():
     """
@@ -0,0 +1,81 @@
+"""
+Cold-start import cost report, built on `python -X importtime`.
+
+Imports a module in a fresh interpreter and reports how long its direct
+imports took, plus which heavy optional dependencies ended up loaded.
+
+Usage:
+    python -m utils.import_report                  # cost of importing streamlit_app
+    python -m utils.import_report ml_model --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Dependencies that should only load when a feature actually needs them
+HEAVY_MODULES = ('sklearn', 'scipy', 'joblib', 'plotly.express', 'pandas', 'bcrypt')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_import_times(module, python=sys.executable):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns the total import time, one entry per imported module and the heavy modules loaded.
+    """
+    probe = (
+        f"import {module}, sys; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', probe],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            'module': name.strip(),
+            # -X importtime indents nested imports by two spaces per level
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+
+    target = next((m for m in reversed(modules) if m['module'] == module), None)
+    heavy_loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+    return {
+        'module': module,
+        'total_us': target['cumulative_us'] if target else sum(m['self_us'] for m in modules),
+        'modules': modules,
+        'heavy_loaded': [m for m in heavy_loaded.split(',') if m],
+    }
+
+def format_report(report, top=10):
+    """Human-readable summary of measure_import_times() output"""
+    target_depth = next((m['depth'] for m in reversed(report['modules'])
+                         if m['module'] == report['module']), 0)
+    direct = [m for m in report['modules'] if m['depth'] == target_depth + 1]
+    direct.sort(key=lambda m: m['cumulative_us'], reverse=True)
+
+    lines = [f"import {report['module']}: {report['total_us'] / 1000:.1f} ms total"]
+    for entry in direct[:top]:
+        lines.append(f"  {entry['module']:<40} {entry['cumulative_us'] / 1000:>9.1f} ms")
+    lines.append("Heavy modules loaded: " + (', '.join(report['heavy_loaded']) or 'none'))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report cold-start import cost per module")
+    parser.add_argument('module', nargs='?', default='streamlit_app', help="Module to import")
+    parser.add_argument('--top', type=int, default=10, help="How many direct imports to list")
+    args = parser.parse_args(argv)
+
+    print(format_report(measure_import_times(args.module), args.top))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Lightweight latency instrumentation for the app's hot paths.
+
+Stages are timed with the `timed` decorator or context manager and recorded
+into per-stage histograms. Recording is off unless HEALSURE_METRICS=1 is set
+(or enable() is called); when off, a timed call costs one flag check.
+
+Metrics can be exported in the Prometheus text format, either written to a
+file (e.g. for a node_exporter textfile collector) or served over HTTP.
+"""
+import bisect
+import collections
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds, as in Prometheus client defaults plus sub-ms buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Recent samples kept per stage for the percentiles shown in the admin panel
+RECENT_SAMPLES = 2048
+
+METRIC_NAME = 'healsure_stage_latency_seconds'
+
+_enabled = os.environ.get('HEALSURE_METRICS', '').lower() in ('1', 'true', 'yes')
+
+class StageHistogram:
+    """Latency histogram and call count for one stage"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        with self.lock:
+            self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.recent.append(seconds)
+
+    def percentiles(self, quantiles=(50, 95, 99)):
+        """Percentiles in seconds over the most recent samples"""
+        with self.lock:
+            samples = sorted(self.recent)
+        if not samples:
+            return {q: None for q in quantiles}
+        return {q: samples[min(len(samples) - 1, int(len(samples) * q / 100))] for q in quantiles}
+
+_stages = {}
+_stages_lock = threading.Lock()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Forget every recorded sample"""
+    with _stages_lock:
+        _stages.clear()
+
+def observe(stage, seconds):
+    """Record one latency sample for a stage"""
+    histogram = _stages.get(stage)
+    if histogram is None:
+        with _stages_lock:
+            histogram = _stages.setdefault(stage, StageHistogram())
+    histogram.observe(seconds)
+
+class timed:
+    """
+    Time a stage, as a decorator or a context manager:
+
+        @timed('train_model')
+        def train_model(self): ...
+
+        with timed('analytics.trends'):
+            ...
+    """
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = None
+
+    def __call__(self, func):
+        stage = self.stage
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    def __enter__(self):
+        if _enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            observe(self.stage, time.perf_counter() - self.start)
+            self.start = None
+        return False
+
+def get_summary():
+    """Per-stage call count, total time and p50/p95/p99 latency in milliseconds"""
+    with _stages_lock:
+        stages = dict(_stages)
+
+    summary = []
+    for stage in sorted(stages):
+        histogram = stages[stage]
+        percentiles = histogram.percentiles()
+        summary.append({
+            'stage': stage,
+            'count': histogram.count,
+            'total_ms': histogram.total * 1e3,
+            **{f'p{q}_ms': None if value is None else value * 1e3 for q, value in percentiles.items()}
+        })
+    return summary
+
+def to_prometheus_text():
+    """Render every stage histogram in the Prometheus text exposition format"""
+    with _stages_lock:
+        stages = dict(_stages)
+
+    lines = [
+        f"# HELP {METRIC_NAME} Latency of instrumented application stages.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage in sorted(stages):
+        histogram = stages[stage]
+        with histogram.lock:
+            bucket_counts = list(histogram.bucket_counts)
+            count, total = histogram.count, histogram.total
+
+        label = stage.replace('\\', '\\\\').replace('"', '\\"')
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + (float('inf'),), bucket_counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {total!r}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus_file(path):
+    """Atomically write the Prometheus text export to `path`"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(to_prometheus_text())
+    os.replace(tmp_path, path)
+    return path
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = to_prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port, host='127.0.0.1'):
+    """Serve GET /metrics in the Prometheus text format from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-exporter', daemon=True).start()
+    return server
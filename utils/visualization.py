@@ -1,6 +1,11 @@
-import plotly.graph_objects as go
-import plotly.express as px
+import copy
+import functools
+import numpy as np
 import streamlit as st
+from utils.metrics import timed
+
+# Plotly is imported inside the figure functions so that pages which only show
+# KPI cards or tips never pay for loading it.
 
 def create_kpi_cards(base_premium, discount_percentage, final_premium, wellness_score):
     """Create KPI cards for premium breakdown"""
@@ -37,26 +42,41 @@ def create_kpi_cards(base_premium, discount_percentage, final_premium, wellness_
             help="Premium after wellness discount"
         )
 
-def create_wellness_gauge(wellness_score):
-    """Create a Plotly gauge chart for wellness score"""
-    
-    # Determine color based on score
-    if wellness_score >= 80:
-        color = "green"
-    elif wellness_score >= 60:
-        color = "yellow"
-    else:
-        color = "red"
+# Figures are built from templates: the static parts of each figure are constructed
+# and validated once per process, then every call deep-copies the template spec,
+# patches only the data and wraps it without re-running Plotly's validation.
+
+@functools.lru_cache(maxsize=None)
+def _figure_template(name):
+    """Validated figure spec (a plain dict) for one of the template builders"""
+    return _TEMPLATE_BUILDERS[name]().to_dict()
+
+def _figure_from_template(name, **trace_updates):
+    """New figure from a cached template with the first trace's properties replaced"""
+    spec = copy.deepcopy(_figure_template(name))
+    trace = spec['data'][0]
+    for path, value in trace_updates.items():
+        # Nested properties use plotly's underscore paths, e.g. gauge_bar_color
+        *parents, prop = path.split('_')
+        target = trace
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[prop] = value
+    import plotly.graph_objects as go
+    return go.Figure(spec, _validate=False)
+
+def _build_wellness_gauge():
+    import plotly.graph_objects as go
     
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
-        value = wellness_score,
+        value = 0,
         domain = {'x': [0, 1], 'y': [0, 1]},
         title = {'text': "Wellness Score"},
         delta = {'reference': 80, 'increasing': {'color': "green"}, 'decreasing': {'color': "red"}},
         gauge = {
             'axis': {'range': [None, 100]},
-            'bar': {'color': color},
+            'bar': {'color': "red"},
             'steps': [
                 {'range': [0, 60], 'color': "lightgray"},
                 {'range': [60, 80], 'color': "yellow"},
@@ -77,8 +97,22 @@ def create_wellness_gauge(wellness_score):
     
     return fig
 
-def create_discount_tier_chart():
-    """Create a chart showing discount tiers"""
+@timed('figure.wellness_gauge')
+def create_wellness_gauge(wellness_score):
+    """Create a Plotly gauge chart for wellness score"""
+    
+    # Determine color based on score
+    if wellness_score >= 80:
+        color = "green"
+    elif wellness_score >= 60:
+        color = "yellow"
+    else:
+        color = "red"
+    
+    return _figure_from_template('wellness_gauge', value=wellness_score, gauge_bar_color=color)
+
+def _build_discount_tier_chart():
+    import plotly.express as px
     
     tiers = {
         'Wellness Score Range': ['90-100', '80-89', '70-79', '60-69', '<60'],
@@ -103,17 +137,19 @@ def create_discount_tier_chart():
     
     return fig
 
-def create_wellness_breakdown_chart(breakdown_scores):
-    """Create a radar chart for wellness score breakdown"""
-    
-    categories = list(breakdown_scores.keys())
-    values = list(breakdown_scores.values())
+@timed('figure.discount_tiers')
+def create_discount_tier_chart():
+    """Create a chart showing discount tiers"""
+    return _figure_from_template('discount_tiers')
+
+def _build_wellness_breakdown_chart():
+    import plotly.graph_objects as go
     
     fig = go.Figure()
     
     fig.add_trace(go.Scatterpolar(
-        r=values,
-        theta=categories,
+        r=[],
+        theta=[],
         fill='toself',
         name='Your Scores'
     ))
@@ -129,3 +165,132 @@ def create_wellness_breakdown_chart(breakdown_scores):
     )
     
     return fig
+
+@timed('figure.wellness_breakdown')
+def create_wellness_breakdown_chart(breakdown_scores):
+    """Create a radar chart for wellness score breakdown"""
+    return _figure_from_template(
+        'wellness_breakdown',
+        r=list(breakdown_scores.values()),
+        theta=list(breakdown_scores.keys())
+    )
+
+_TEMPLATE_BUILDERS = {
+    'wellness_gauge': _build_wellness_gauge,
+    'discount_tiers': _build_discount_tier_chart,
+    'wellness_breakdown': _build_wellness_breakdown_chart,
+}
+
+def downsample_lttb(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the sorted indices of at most `max_points` points that preserve the visual
+    shape of the (x, y) line, always keeping the first and last point.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n_points = len(x)
+    if max_points >= n_points or max_points < 3:
+        return np.arange(n_points)
+
+    # Inner points are split into max_points - 2 buckets; one point is kept per bucket
+    edges = np.linspace(1, n_points - 1, max_points - 1).astype(int)
+    indices = np.empty(max_points, dtype=int)
+    indices[0], indices[-1] = 0, n_points - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The next bucket's average point (or the last point) anchors the triangle
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n_points
+        anchor_x = x[next_start:next_end].mean()
+        anchor_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - anchor_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (anchor_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+
+    return indices
+
+def downsample_trend(df, x, y_columns, max_points):
+    """Downsample a trend DataFrame for plotting, keeping the LTTB points of every y column"""
+    if len(df) <= max_points:
+        return df
+
+    x_values = df[x].to_numpy().astype('int64') if np.issubdtype(df[x].dtype, np.datetime64) else df[x]
+    keep = np.unique(np.concatenate([
+        downsample_lttb(x_values, df[col].to_numpy(), max_points // len(y_columns))
+        for col in y_columns
+    ]))
+    return df.iloc[keep]
+
+@timed('figure.what_if')
+def create_what_if_chart(surface, dimensions, labels=None, profile=None):
+    """
+    Create a what-if chart from what_if.what_if_surface() output: premium curves for
+    one swept dimension, or a final premium heatmap for two. `profile` marks the current values.
+    """
+    import plotly.graph_objects as go
+
+    labels = labels or {}
+    x_dim = dimensions[0]
+    x_label = labels.get(x_dim, x_dim)
+    x_values = surface[x_dim].to_numpy()
+
+    fig = go.Figure()
+    if len(dimensions) == 1:
+        fig.add_trace(go.Scatter(x=x_values, y=surface['base_premium'], name='Base Premium',
+                                 mode='lines+markers' if len(x_values) <= 20 else 'lines'))
+        fig.add_trace(go.Scatter(x=x_values, y=surface['final_premium'], name='Final Premium',
+                                 mode='lines+markers' if len(x_values) <= 20 else 'lines',
+                                 customdata=surface[['wellness_score', 'discount_percentage']].to_numpy(),
+                                 hovertemplate=f"{x_label}: %{{x}}<br>Final Premium: ₹%{{y:,.2f}}"
+                                               "<br>Wellness Score: %{customdata[0]:.1f}"
+                                               "<br>Discount: %{customdata[1]}%<extra></extra>"))
+        if profile is not None:
+            current_premium = surface['final_premium'].iloc[0] - surface['final_premium_change'].iloc[0]
+            fig.add_trace(go.Scatter(x=[profile[x_dim]], y=[current_premium], mode='markers', name='You',
+                                     marker=dict(symbol='x', size=12, color='black'),
+                                     hovertemplate="You: ₹%{y:,.2f}<extra></extra>"))
+        fig.update_layout(
+            title=f"Premium vs {x_label}",
+            xaxis_title=x_label,
+            yaxis_title="Premium (₹)",
+            legend_title="Premium Type",
+            hovermode='x unified'
+        )
+        return fig
+
+    # Rows come from a meshgrid with the first dimension varying slowest
+    y_dim = dimensions[1]
+    y_label = labels.get(y_dim, y_dim)
+    x_axis = surface[x_dim].unique()
+    y_axis = surface[y_dim].unique()
+    shape = (len(x_axis), len(y_axis))
+    fig.add_trace(go.Heatmap(
+        x=x_axis,
+        y=y_axis,
+        z=surface['final_premium'].to_numpy().reshape(shape).T,
+        customdata=np.dstack([
+            surface['final_premium_change'].to_numpy().reshape(shape).T,
+            surface['wellness_score'].to_numpy().reshape(shape).T,
+        ]),
+        colorscale='RdYlGn_r',
+        colorbar=dict(title="Final Premium (₹)"),
+        hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<br>Final Premium: ₹%{{z:,.2f}}"
+                      "<br>Change: ₹%{customdata[0]:+,.2f}<br>Wellness Score: %{customdata[1]:.1f}"
+                      "<extra></extra>"
+    ))
+    if profile is not None:
+        fig.add_trace(go.Scatter(x=[profile[x_dim]], y=[profile[y_dim]], mode='markers', name='You',
+                                 marker=dict(symbol='x', size=12, color='black'), showlegend=False,
+                                 hovertemplate="You<extra></extra>"))
+    fig.update_layout(
+        title=f"Final Premium by {x_label} and {y_label}",
+        xaxis_title=x_label,
+        yaxis_title=y_label
+    )
+    return fig
@@ -0,0 +1,54 @@
+"""
+Background warm-up of expensive resources.
+
+The resource is built in a daemon thread, so callers can render right away
+and check `state` to decide whether to use it, wait for it or show that it
+is still warming up.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WARMING_UP = 'warming_up'
+READY = 'ready'
+FAILED = 'failed'
+
+class BackgroundWarmup:
+    """
+    Build a resource with `factory()` in a daemon thread.
+    `state` moves from WARMING_UP to READY, or to FAILED if the factory raised
+    (the exception is kept in `error`); `seconds` is how long the build took.
+    """
+
+    def __init__(self, factory, name='warmup'):
+        self.name = name
+        self.state = WARMING_UP
+        self.value = None
+        self.error = None
+        self.seconds = None
+        self._done = threading.Event()
+        self._started = time.perf_counter()
+        threading.Thread(target=self._run, args=(factory,), name=name, daemon=True).start()
+
+    def _run(self, factory):
+        try:
+            self.value = factory()
+            self.state = READY
+        except Exception as e:
+            logger.exception("Warm-up of %s failed", self.name)
+            self.error = e
+            self.state = FAILED
+        finally:
+            self.seconds = time.perf_counter() - self._started
+            self._done.set()
+
+    @property
+    def is_ready(self):
+        return self.state == READY
+
+    def wait(self, timeout=None):
+        """Block until the warm-up finishes; returns the resource, or None if it failed or timed out"""
+        self._done.wait(timeout)
+        return self.value if self.state == READY else None
@@ -1,152 +1,202 @@
+import os
 import numpy as np
+from utils.metrics import timed
+from wellness_rules import DEFAULT_RELOAD_INTERVAL, RULES_ENV_VAR, RulesWatcher, default_rules, load_rules
 
 class WellnessCalculator:
-    def __init__(self):
-        # Define scoring weights for different health factors
-        self.weights = {
-            'bmi': 0.25,
-            'exercise': 0.25,
-            'diet': 0.20,
-            'smoking': 0.15,
-            'sleep': 0.10,
-            'stress': 0.05
-        }
+    def __init__(self, rules_path=None, reload_interval=DEFAULT_RELOAD_INTERVAL):
+        # Scoring bands, weights and discount tiers come from a YAML rules file
+        # (HEALSURE_WELLNESS_RULES by default) or wellness_rules.DEFAULT_RULES.
+        # A file is polled every `reload_interval` seconds and swapped in when it changes.
+        self.rules_path = rules_path or os.environ.get(RULES_ENV_VAR) or None
+        self.rules = load_rules(self.rules_path) if self.rules_path else default_rules()
+        self.rules_watcher = None
+        if self.rules_path and reload_interval:
+            self.rules_watcher = RulesWatcher(self, self.rules_path, reload_interval)
         
-        # Define discount tiers
-        self.discount_tiers = [
-            (90, 100, 20),  # 90-100: 20%
-            (80, 89, 15),   # 80-89: 15%
-            (70, 79, 10),   # 70-79: 10%
-            (60, 69, 5),    # 60-69: 5%
-            (0, 59, 0)      # <60: 0%
+        # Improvement suggestions: (breakdown component, suggest when the score is below, text).
+        # The order is the bit order of get_improvement_flags_batch masks.
+        self.improvement_rules = [
+            ("BMI Score", 15, "Consider maintaining a healthy BMI between 18.5-24.9"),
+            ("Exercise Score", 16, "Increase exercise frequency to at least 4-5 days per week"),
+            ("Diet Score", 15, "Improve diet quality by eating more fruits, vegetables, and whole grains"),
+            ("Smoking Score", 15, "Consider quitting smoking for significant health and premium benefits"),
+            ("Sleep Score", 15, "Aim for 7-9 hours of quality sleep per night"),
+            ("Stress Score", 15, "Practice stress management techniques like meditation or yoga")
         ]
     
+    @property
+    def rules(self):
+        """The compiled rules in use; assigning new rules swaps them in"""
+        return self._rules
+    
+    @rules.setter
+    def rules(self, rules):
+        self._rules = rules
+        # The scalar component scorers below are shadowed by the compiled rule functions
+        # themselves, so a score is a single call without a method in between
+        (self.calculate_bmi_score, self.calculate_exercise_score, self.calculate_diet_score,
+         self.calculate_smoking_score, self.calculate_sleep_score, self.calculate_stress_score) = rules.scorers
+        self.get_discount_percentage = rules.discount.score
+    
+    @property
+    def weights(self):
+        """Scoring weights for the health factors"""
+        return self.rules.weights
+    
+    @property
+    def discount_tiers(self):
+        """Discount tiers as (min score, max score, discount percentage)"""
+        return self.rules.discount_tiers
+    
+    def reload_rules(self):
+        """Reload the rules file now; returns True if the rules changed"""
+        if not self.rules_path:
+            return False
+        rules = load_rules(self.rules_path)
+        changed = rules is not self.rules
+        self.rules = rules
+        return changed
+    
+    # Each instance shadows these six and get_discount_percentage with the compiled rule
+    # functions (see the rules setter); they document the scorers and work through the class.
+    
     def calculate_bmi_score(self, bmi):
         """Calculate BMI score (0-20)"""
-        if 18.5 <= bmi <= 24.9:
-            return 20  # Optimal BMI
-        elif 25.0 <= bmi <= 29.9:
-            return 15  # Overweight
-        elif 30.0 <= bmi <= 34.9:
-            return 10  # Obese Class I
-        elif 35.0 <= bmi <= 39.9:
-            return 5   # Obese Class II
-        else:
-            return 0   # Underweight or Severely Obese
+        return self.rules.bmi.score(bmi)
     
     def calculate_exercise_score(self, exercise_freq):
         """Calculate exercise score (0-20)"""
-        if exercise_freq >= 5:
-            return 20
-        elif exercise_freq >= 4:
-            return 16
-        elif exercise_freq >= 3:
-            return 12
-        elif exercise_freq >= 2:
-            return 8
-        elif exercise_freq >= 1:
-            return 4
-        else:
-            return 0
+        return self.rules.exercise.score(exercise_freq)
     
     def calculate_diet_score(self, diet_quality):
         """Calculate diet score (0-20)"""
-        diet_scores = {
-            "Excellent": 20,
-            "Good": 15,
-            "Fair": 10,
-            "Poor": 0
-        }
-        return diet_scores.get(diet_quality, 0)
+        return self.rules.diet.score(diet_quality)
     
     def calculate_smoking_score(self, smoker):
         """Calculate smoking score (0-20)"""
-        return 0 if smoker == "yes" else 20
+        return self.rules.smoking.score(smoker)
     
     def calculate_sleep_score(self, sleep_hours):
         """Calculate sleep score (0-20)"""
-        if 7 <= sleep_hours <= 9:
-            return 20  # Optimal sleep
-        elif 6 <= sleep_hours < 7 or 9 < sleep_hours <= 10:
-            return 15  # Slightly off optimal
-        elif 5 <= sleep_hours < 6 or 10 < sleep_hours <= 11:
-            return 10  # Suboptimal
-        else:
-            return 5   # Poor sleep
+        return self.rules.sleep.score(sleep_hours)
     
     def calculate_stress_score(self, stress_level):
         """Calculate stress score (0-20)"""
-        # Lower stress is better, so invert the scale
-        if stress_level <= 3:
-            return 20
-        elif stress_level <= 5:
-            return 15
-        elif stress_level <= 7:
-            return 10
-        elif stress_level <= 8:
-            return 5
-        else:
-            return 0
+        return self.rules.stress.score(stress_level)
     
     def calculate_wellness_score(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
         """Calculate overall wellness score (0-100)"""
-        bmi_score = self.calculate_bmi_score(bmi)
-        exercise_score = self.calculate_exercise_score(exercise_freq)
-        diet_score = self.calculate_diet_score(diet_quality)
-        smoking_score = self.calculate_smoking_score(smoker)
-        sleep_score = self.calculate_sleep_score(sleep_hours)
-        stress_score = self.calculate_stress_score(stress_level)
+        # One snapshot of the rules, so a concurrent reload cannot mix two versions.
+        # Not @timed: this runs per member in loops, and the batch version is timed.
+        rules = self._rules
+        bmi_score, exercise_score, diet_score, smoking_score, sleep_score, stress_score = rules.scorers
+        bmi_weight, exercise_weight, diet_weight, smoking_weight, sleep_weight, stress_weight = rules.weight_values
         
         # Weighted average
         total_score = (
-            bmi_score * self.weights['bmi'] +
-            exercise_score * self.weights['exercise'] +
-            diet_score * self.weights['diet'] +
-            smoking_score * self.weights['smoking'] +
-            sleep_score * self.weights['sleep'] +
-            stress_score * self.weights['stress']
+            bmi_score(bmi) * bmi_weight +
+            exercise_score(exercise_freq) * exercise_weight +
+            diet_score(diet_quality) * diet_weight +
+            smoking_score(smoker) * smoking_weight +
+            sleep_score(sleep_hours) * sleep_weight +
+            stress_score(stress_level) * stress_weight
         ) * 5  # Convert to 0-100 scale
         
         return round(total_score, 1)
     
     def get_discount_percentage(self, wellness_score):
         """Get discount percentage based on wellness score"""
-        for min_score, max_score, discount in self.discount_tiers:
-            if min_score <= wellness_score <= max_score:
-                return discount
-        return 0
+        return self.rules.discount.score(wellness_score)
     
     def get_score_breakdown(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
         """Get detailed breakdown of wellness score components"""
+        bmi_score, exercise_score, diet_score, smoking_score, sleep_score, stress_score = self._rules.scorers
         return {
-            "BMI Score": self.calculate_bmi_score(bmi),
-            "Exercise Score": self.calculate_exercise_score(exercise_freq),
-            "Diet Score": self.calculate_diet_score(diet_quality),
-            "Smoking Score": self.calculate_smoking_score(smoker),
-            "Sleep Score": self.calculate_sleep_score(sleep_hours),
-            "Stress Score": self.calculate_stress_score(stress_level)
+            "BMI Score": bmi_score(bmi),
+            "Exercise Score": exercise_score(exercise_freq),
+            "Diet Score": diet_score(diet_quality),
+            "Smoking Score": smoking_score(smoker),
+            "Sleep Score": sleep_score(sleep_hours),
+            "Stress Score": stress_score(stress_level)
         }
     
     def get_improvement_suggestions(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
         """Get suggestions for improving wellness score"""
-        suggestions = []
-        
-        if self.calculate_bmi_score(bmi) < 15:
-            suggestions.append("Consider maintaining a healthy BMI between 18.5-24.9")
-        
-        if self.calculate_exercise_score(exercise_freq) < 16:
-            suggestions.append("Increase exercise frequency to at least 4-5 days per week")
-        
-        if self.calculate_diet_score(diet_quality) < 15:
-            suggestions.append("Improve diet quality by eating more fruits, vegetables, and whole grains")
-        
-        if smoker == "yes":
-            suggestions.append("Consider quitting smoking for significant health and premium benefits")
+        breakdown = self.get_score_breakdown(bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level)
+        return [suggestion for component, threshold, suggestion in self.improvement_rules
+                if breakdown[component] < threshold]
+
+    # Batch versions of the scorers above. They take NumPy arrays or DataFrame
+    # columns and give the same results as the scalar methods, element by element.
+    
+    def calculate_bmi_score_batch(self, bmi):
+        """Calculate BMI scores (0-20) for an array of BMIs"""
+        return self.rules.bmi.score_batch(bmi)
+    
+    def calculate_exercise_score_batch(self, exercise_freq):
+        """Calculate exercise scores (0-20) for an array of exercise frequencies"""
+        return self.rules.exercise.score_batch(exercise_freq)
+    
+    def calculate_diet_score_batch(self, diet_quality):
+        """Calculate diet scores (0-20) for an array of diet qualities"""
+        return self.rules.diet.score_batch(diet_quality)
+    
+    def calculate_smoking_score_batch(self, smoker):
+        """Calculate smoking scores (0-20) for an array of smoking statuses"""
+        return self.rules.smoking.score_batch(smoker)
+    
+    def calculate_sleep_score_batch(self, sleep_hours):
+        """Calculate sleep scores (0-20) for an array of sleep hours"""
+        return self.rules.sleep.score_batch(sleep_hours)
+    
+    def calculate_stress_score_batch(self, stress_level):
+        """Calculate stress scores (0-20) for an array of stress levels"""
+        return self.rules.stress.score_batch(stress_level)
+    
+    @timed('wellness.score_batch')
+    def calculate_wellness_score_batch(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
+        """Calculate overall wellness scores (0-100) for arrays of members"""
+        rules = self.rules
+        bmi_weight, exercise_weight, diet_weight, smoking_weight, sleep_weight, stress_weight = rules.weight_values
         
-        if self.calculate_sleep_score(sleep_hours) < 15:
-            suggestions.append("Aim for 7-9 hours of quality sleep per night")
+        # Same operation order as calculate_wellness_score so results are bit-identical
+        total_score = (
+            rules.bmi.score_batch(bmi) * bmi_weight +
+            rules.exercise.score_batch(exercise_freq) * exercise_weight +
+            rules.diet.score_batch(diet_quality) * diet_weight +
+            rules.smoking.score_batch(smoker) * smoking_weight +
+            rules.sleep.score_batch(sleep_hours) * sleep_weight +
+            rules.stress.score_batch(stress_level) * stress_weight
+        ) * 5
         
-        if self.calculate_stress_score(stress_level) < 15:
-            suggestions.append("Practice stress management techniques like meditation or yoga")
+        return np.round(total_score, 1)
+    
+    def get_discount_percentage_batch(self, wellness_score):
+        """Get discount percentages for an array of wellness scores"""
+        return self.rules.discount.score_batch(np.asarray(wellness_score, dtype=float))
+    
+    def get_score_breakdown_batch(self, bmi, exercise_freq, diet_quality, smoker, sleep_hours, stress_level):
+        """Get the wellness score components for arrays of members as a DataFrame"""
+        import pandas as pd
         
-        return suggestions
+        rules = self.rules
+        return pd.DataFrame({
+            "BMI Score": rules.bmi.score_batch(bmi),
+            "Exercise Score": rules.exercise.score_batch(exercise_freq),
+            "Diet Score": rules.diet.score_batch(diet_quality),
+            "Smoking Score": rules.smoking.score_batch(smoker),
+            "Sleep Score": rules.sleep.score_batch(sleep_hours),
+            "Stress Score": rules.stress.score_batch(stress_level)
+        })
+    
+    def get_improvement_flags_batch(self, breakdown):
+        """
+        Encode get_improvement_suggestions() for arrays of members as uint8 bitmasks,
+        where bit i set means self.improvement_rules[i] applies. `breakdown` maps the
+        component names to score arrays, as returned by get_score_breakdown_batch.
+        """
+        flags = np.zeros(len(breakdown[self.improvement_rules[0][0]]), dtype=np.uint8)
+        for bit, (component, threshold, _) in enumerate(self.improvement_rules):
+            flags |= (np.asarray(breakdown[component]) < threshold).astype(np.uint8) << bit
+        return flags
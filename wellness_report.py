@@ -0,0 +1,136 @@
+"""
+Bulk personalized wellness reports for member files.
+
+Streams a CSV or Parquet file in chunks and scores every member with the
+vectorized wellness scorers. The improvement suggestions and personalized tip
+categories that apply to a member are encoded as two uint8 bitmasks; their
+text lives once in shared tables and is only expanded, once per distinct
+bitmask, when a chunk of the report is written out. Memory stays flat
+regardless of the number of members.
+
+Usage:
+    python wellness_report.py members.csv wellness_reports.csv --keep member_id
+    python wellness_report.py members.parquet wellness_reports.parquet --chunk-size 250000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from bulk_quote import (WELLNESS_COLUMNS, DEFAULT_CHUNK_SIZE, ChunkWriter, coerce_wellness_columns,
+                        import_pyarrow, read_chunks)
+from utils.health_tips import get_personalized_tip_flags_batch, get_personalized_tip_table
+from utils.metrics import timed
+from wellness_calculator import WellnessCalculator
+
+REPORT_INPUT_COLUMNS = ['bmi', 'smoker'] + WELLNESS_COLUMNS
+
+ITEM_SEPARATOR = ' | '
+TIP_SEPARATOR = '; '
+
+@timed('wellness_report.score')
+def score_members(members, wellness_calc):
+    """
+    Compact report rows for a DataFrame of members, aligned with its rows: wellness
+    score, discount and the suggestion and tip category bitmasks (11 bytes per member),
+    plus the reason a row could not be scored in 'error' (NaN score, no flags)
+    """
+    wellness, errors = coerce_wellness_columns(members)
+    columns = [wellness[col] for col in ('bmi', 'exercise_freq', 'diet_quality', 'smoker',
+                                          'sleep_hours', 'stress_level')]
+    breakdown = wellness_calc.get_score_breakdown_batch(*columns)
+    wellness_score = wellness_calc.calculate_wellness_score_batch(*columns)
+
+    valid = pd.isna(errors)
+    wellness_score = np.where(valid, wellness_score, np.nan)
+    return pd.DataFrame({
+        'wellness_score': wellness_score,
+        'discount_percentage': wellness_calc.get_discount_percentage_batch(wellness_score).astype(np.int8),
+        'suggestion_flags': np.where(valid, wellness_calc.get_improvement_flags_batch(breakdown), np.uint8(0)),
+        'tip_flags': np.where(valid, get_personalized_tip_flags_batch(breakdown), np.uint8(0)),
+        'error': errors
+    }, index=members.index)
+
+def report_output_schema():
+    """Parquet types of the report columns, so every chunk is written with the same types"""
+    pa = import_pyarrow()
+    text = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema([
+        pa.field('wellness_score', pa.float64()), pa.field('discount_percentage', pa.int8()),
+        pa.field('suggestion_flags', pa.uint8()), pa.field('tip_flags', pa.uint8()),
+        pa.field('error', pa.string()), pa.field('suggestions', text), pa.field('tips', text)
+    ])
+
+class ReportText:
+    """Expands report bitmasks into suggestion and tip text from the shared, interned tables"""
+
+    def __init__(self, wellness_calc):
+        self.suggestions = tuple(sys.intern(text) for _, _, text in wellness_calc.improvement_rules)
+        self.tip_table = get_personalized_tip_table()
+
+    def suggestions_text(self, mask):
+        return ITEM_SEPARATOR.join(text for bit, text in enumerate(self.suggestions) if mask >> bit & 1)
+
+    def tips_text(self, mask):
+        return ITEM_SEPARATOR.join(f"{category}: {TIP_SEPARATOR.join(tips)}"
+                                   for bit, (category, _, tips) in enumerate(self.tip_table) if mask >> bit & 1)
+
+    def expand(self, flags, to_text):
+        """Categorical of to_text(mask) per row, with each distinct mask's text built once"""
+        masks, codes = np.unique(np.asarray(flags), return_inverse=True)
+        return pd.Categorical.from_codes(codes.ravel(), categories=[to_text(int(mask)) for mask in masks])
+
+    def expand_report(self, report):
+        """Copy of `report` with 'suggestions' and 'tips' text columns added"""
+        return report.assign(
+            suggestions=self.expand(report['suggestion_flags'], self.suggestions_text),
+            tips=self.expand(report['tip_flags'], self.tips_text)
+        )
+
+def run_wellness_report(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, keep_columns=(), log=print):
+    """Write a wellness report for every row of `input_path` into `output_path`; returns (rows, seconds)"""
+    wellness_calc = WellnessCalculator()
+    text = ReportText(wellness_calc)
+    keep_columns = [col for col in keep_columns if col not in REPORT_INPUT_COLUMNS]
+
+    writer = ChunkWriter(output_path, report_output_schema() if output_path.endswith('.parquet') else None)
+    start = time.perf_counter()
+    try:
+        # Kept columns are passed through verbatim, so a CSV column that is empty in the
+        # first chunk is not typed as float (and member ids keep any leading zeros)
+        for chunk in read_chunks(input_path, chunk_size, columns=keep_columns + REPORT_INPUT_COLUMNS,
+                                 dtype={col: str for col in keep_columns}):
+            chunk_start = time.perf_counter()
+            report = score_members(chunk, wellness_calc)
+            writer.write(text.expand_report(pd.concat([chunk[keep_columns], report], axis=1)))
+
+            elapsed = time.perf_counter() - start
+            log(f"{writer.rows_written:,} reports written "
+                f"({len(chunk) / max(time.perf_counter() - chunk_start, 1e-9):,.0f} rows/sec this chunk, "
+                f"{writer.rows_written / max(elapsed, 1e-9):,.0f} rows/sec overall)")
+    finally:
+        writer.close()
+
+    return writer.rows_written, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write personalized wellness reports for a CSV or Parquet member file")
+    parser.add_argument('input', help="Member file (.csv or .parquet) with columns: " + ", ".join(REPORT_INPUT_COLUMNS))
+    parser.add_argument('output', help="Output file (.csv or .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument('--keep', action='append', default=[], metavar='COLUMN',
+                        help="Input column to copy into the report, e.g. a member id; repeatable")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"Input file not found: {args.input}")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    rows, seconds = run_wellness_report(args.input, args.output, args.chunk_size, args.keep, log=log)
+    log(f"Done: {rows:,} reports in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Wellness scoring rules: component score bands, weights and discount tiers.
+
+Rules are plain data, either DEFAULT_RULES or a YAML file with the same shape:
+
+    weights: {bmi: 0.25, exercise: 0.25, diet: 0.20, smoking: 0.15, sleep: 0.10, stress: 0.05}
+    scores:
+      bmi:
+        bands:              # first matching band wins; bounds are inclusive
+          - {min: 18.5, max: 24.9, score: 20}
+        default: 0          # score when no band matches
+      sleep:
+        bands:              # min_exclusive / max_exclusive make a bound exclusive
+          - {min: 6, max: 7, max_exclusive: true, score: 15}
+        default: 5
+      smoking:
+        categories: {'yes': 0}   # quote yes/no, YAML reads them as booleans otherwise
+        default: 20
+    discount_tiers:
+      bands:
+        - {min: 90, max: 100, discount: 20}
+      default: 0
+
+Rules are compiled twice: into generated if/elif chains for scoring single
+values, so a rules file costs what hand-written code does, and into breakpoint
+arrays and dense lookup tables for scoring arrays. Compiled rules are cached by
+the SHA-256 of their file, and RulesWatcher swaps in new rules when the file
+changes.
+
+Usage:
+    python wellness_rules.py --dump-defaults > wellness_rules.yaml
+    python wellness_rules.py wellness_rules.yaml
+"""
+import argparse
+import hashlib
+import logging
+import math
+import os
+import threading
+import weakref
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ('bmi', 'exercise', 'diet', 'smoking', 'sleep', 'stress')
+
+RULES_ENV_VAR = 'HEALSURE_WELLNESS_RULES'
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+# Float batches are scored by counting breakpoints up to this many, by binary search beyond
+MAX_COUNTED_EDGES = 16
+
+# Scalar category scores compare against up to this many categories in turn, and use a dict beyond
+MAX_CHAINED_CATEGORIES = 8
+
+# The rules WellnessCalculator has always used
+DEFAULT_RULES = {
+    'weights': {'bmi': 0.25, 'exercise': 0.25, 'diet': 0.20, 'smoking': 0.15, 'sleep': 0.10, 'stress': 0.05},
+    'scores': {
+        'bmi': {
+            'bands': [
+                {'min': 18.5, 'max': 24.9, 'score': 20},  # Optimal BMI
+                {'min': 25.0, 'max': 29.9, 'score': 15},  # Overweight
+                {'min': 30.0, 'max': 34.9, 'score': 10},  # Obese Class I
+                {'min': 35.0, 'max': 39.9, 'score': 5},   # Obese Class II
+            ],
+            'default': 0,  # Underweight or Severely Obese
+        },
+        'exercise': {
+            'bands': [
+                {'min': 5, 'score': 20},
+                {'min': 4, 'score': 16},
+                {'min': 3, 'score': 12},
+                {'min': 2, 'score': 8},
+                {'min': 1, 'score': 4},
+            ],
+            'default': 0,
+        },
+        'diet': {
+            'categories': {'Excellent': 20, 'Good': 15, 'Fair': 10, 'Poor': 0},
+            'default': 0,
+        },
+        'smoking': {
+            'categories': {'yes': 0},
+            'default': 20,
+        },
+        'sleep': {
+            'bands': [
+                {'min': 7, 'max': 9, 'score': 20},                          # Optimal sleep
+                {'min': 6, 'max': 7, 'max_exclusive': True, 'score': 15},   # Slightly off optimal
+                {'min': 9, 'max': 10, 'min_exclusive': True, 'score': 15},
+                {'min': 5, 'max': 6, 'max_exclusive': True, 'score': 10},   # Suboptimal
+                {'min': 10, 'max': 11, 'min_exclusive': True, 'score': 10},
+            ],
+            'default': 5,  # Poor sleep
+        },
+        'stress': {
+            # Lower stress is better, so the scale is inverted
+            'bands': [
+                {'max': 3, 'score': 20},
+                {'max': 5, 'score': 15},
+                {'max': 7, 'score': 10},
+                {'max': 8, 'score': 5},
+            ],
+            'default': 0,
+        },
+    },
+    'discount_tiers': {
+        'bands': [
+            {'min': 90, 'max': 100, 'discount': 20},
+            {'min': 80, 'max': 89, 'discount': 15},
+            {'min': 70, 'max': 79, 'discount': 10},
+            {'min': 60, 'max': 69, 'discount': 5},
+            {'min': 0, 'max': 59, 'discount': 0},
+        ],
+        'default': 0,
+    },
+}
+
+def _number(value, what):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{what} must be a number, got {value!r}")
+    return value
+
+def _grid_key(x):
+    # Integral keys are ints: NumPy integers compare slowly with Python floats
+    return int(x) if float(x).is_integer() else x
+
+def _literal(value, constants):
+    """Source text for a rule number; NaN and infinities go through `constants`"""
+    if math.isfinite(value):
+        return repr(value)
+    name = f"_c{len(constants)}"
+    constants[name] = value
+    return name
+
+def _band_condition(low, low_exclusive, high, high_exclusive, constants):
+    """Source of the test `low <= x <= high` for a band, leaving out unbounded inclusive sides"""
+    parts = ['x']
+    if low != -math.inf:
+        parts = [_literal(low, constants), '<' if low_exclusive else '<='] + parts
+    if high != math.inf:
+        parts += ['<' if high_exclusive else '<=', _literal(high, constants)]
+    # A band with no bounds still leaves NaN to the default
+    return ' '.join(parts) if len(parts) > 1 else 'x == x'
+
+def _compile_chain(branches, default, name, constants=None):
+    """
+    Compile [(condition source over x, value), ...] into `score(x)`: the value of the first
+    branch whose condition holds, else `default`. This is the if/elif chain the rules
+    describe, so a scalar score costs what a hand-written chain does. None scores the default.
+    `constants` holds names the conditions refer to.
+    """
+    constants = {} if constants is None else constants
+    lines = ["def score(x):", "    try:"]
+    for condition, value in branches:
+        lines += [f"        if {condition}:", f"            return {_literal(value, constants)}"]
+    lines += ["    except TypeError:",
+              "        if x is None:",
+              f"            return {_literal(default, constants)}",
+              "        raise",
+              f"    return {_literal(default, constants)}"]
+    exec(compile("\n".join(lines), f"<wellness rules: {name}>", "exec"), constants)
+    return constants['score']
+
+class _CategoryLookup(dict):
+    """Category scores; anything not listed gets `default`"""
+
+    __slots__ = ('default',)
+
+    def __missing__(self, value):
+        return self.default
+
+class BandTable:
+    """
+    First-match bands over a numeric input, compiled into a piecewise-constant lookup.
+    Scalars run the bands as a generated if/elif chain; integer arrays index a dense
+    table and float arrays count breakpoints or use searchsorted.
+    """
+
+    def __init__(self, bands, default, value_key='score', what='bands'):
+        self.default = _number(default, f"{what}.default")
+        self.bands = []
+        for i, band in enumerate(bands):
+            if not isinstance(band, dict):
+                raise ValueError(f"{what}[{i}] must be a mapping, got {band!r}")
+            unknown = set(band) - {'min', 'max', 'min_exclusive', 'max_exclusive', value_key}
+            if unknown:
+                raise ValueError(f"{what}[{i}] has unknown keys: {', '.join(sorted(unknown))}")
+            if value_key not in band:
+                raise ValueError(f"{what}[{i}] is missing '{value_key}'")
+            low = _number(band.get('min', -math.inf), f"{what}[{i}].min")
+            high = _number(band.get('max', math.inf), f"{what}[{i}].max")
+            if low > high:
+                raise ValueError(f"{what}[{i}] has min {low} above max {high}")
+            for side, bound in (('min', low), ('max', high)):
+                if band.get(f'{side}_exclusive') and not math.isfinite(bound):
+                    raise ValueError(f"{what}[{i}] has {side}_exclusive without a finite {side}")
+            self.bands.append((low, bool(band.get('min_exclusive', False)), high,
+                               bool(band.get('max_exclusive', False)),
+                               _number(band[value_key], f"{what}[{i}].{value_key}")))
+
+        # score(value): value of the first band containing it, or the default
+        constants = {}
+        branches = [(_band_condition(low, low_exclusive, high, high_exclusive, constants), value)
+                    for low, low_exclusive, high, high_exclusive, value in self.bands]
+        self.score = _compile_chain(branches, self.default, what, constants)
+
+        # f(x) is constant between consecutive breakpoints, so it is evaluated once at
+        # every breakpoint and once inside every interval between them
+        self.edges = sorted({_grid_key(bound) for low, _, high, _, _ in self.bands
+                             for bound in (low, high) if math.isfinite(bound)})
+        inside = ([self.edges[0] - 1] + [(a + b) / 2 for a, b in zip(self.edges, self.edges[1:])]
+                  + [self.edges[-1] + 1]) if self.edges else [0]
+        self.point_values = [self.score(edge) for edge in self.edges]
+        self.interval_values = [self.score(x) for x in inside]
+
+        # Batch lookup table: interval i at 2i, breakpoint i at 2i + 1
+        values = [None] * (2 * len(self.edges) + 1)
+        values[0::2], values[1::2] = self.interval_values, self.point_values
+        self.table = np.array(values)
+        self.edge_array = np.array(self.edges, dtype=float)
+        self.padded_edges = np.append(self.edge_array, np.nan)
+
+        # Dense table over the discrete input domain, clamped to the constant tails
+        self.dense_start = math.floor(self.edges[0]) - 1 if self.edges else 0
+        self.dense_stop = math.ceil(self.edges[-1]) + 1 if self.edges else 0
+        self.dense = np.array([self.score(x) for x in range(self.dense_start, self.dense_stop + 1)])
+
+    def score_batch(self, values):
+        """score() for every element of an array"""
+        values = np.asarray(values)
+        if values.dtype.kind in 'iu':
+            return self.dense[np.clip(values, self.dense_start, self.dense_stop) - self.dense_start]
+
+        values = values.astype(float, copy=False)
+        if len(self.edges) <= MAX_COUNTED_EDGES:
+            # Counting the breakpoints at or below and strictly below each value gives
+            # its table index directly; for a few breakpoints this beats a binary search
+            index = np.zeros(values.shape, dtype=np.uint8)
+            below = np.empty(values.shape, dtype=bool)
+            for edge in self.edges:
+                index += np.greater_equal(values, edge, out=below)
+                index += np.greater(values, edge, out=below)
+        else:
+            i = np.searchsorted(self.edge_array, values)
+            index = 2 * i + (self.padded_edges[i] == values)
+        result = self.table[index]
+        nan = np.isnan(values)
+        if nan.any():
+            result[nan] = self.default
+        return result
+
+class CategoryTable:
+    """Scores for categorical values; anything not listed gets the default"""
+
+    def __init__(self, categories, default, what='categories'):
+        if not isinstance(categories, dict) or not categories:
+            raise ValueError(f"{what} must be a non-empty mapping of category to score")
+        for category, score in categories.items():
+            if not isinstance(category, str):
+                raise ValueError(f"{what} keys must be strings, got {category!r} (quote values like 'yes')")
+            _number(score, f"{what}.{category}")
+        self.mapping = dict(categories)
+        self.default = _number(default, f"{what}.default")
+        if len(categories) <= MAX_CHAINED_CATEGORIES:
+            self.score = _compile_chain([(f"x == {category!r}", score) for category, score in categories.items()],
+                                        self.default, what)
+        else:
+            lookup = _CategoryLookup(categories)
+            lookup.default = self.default
+            self.score = lookup.__getitem__
+        self.categories = list(categories)
+        # Scores in code order; the trailing default catches unknown values (code -1)
+        self.table = np.array(list(categories.values()) + [self.default])
+
+    def score_batch(self, values):
+        values = np.asarray(values, dtype=object)
+        if len(self.categories) == 1:
+            return np.where(values == self.categories[0], self.table[0], self.default)
+        import pandas as pd
+
+        return self.table[pd.Categorical(values, categories=self.categories).codes]
+
+class CompiledRules:
+    """Compiled scoring tables for every component, the weights and the discount tiers"""
+
+    def __init__(self, rules, source=None, digest=None):
+        if not isinstance(rules, dict):
+            raise ValueError("Wellness rules must be a mapping")
+        unknown = set(rules) - {'weights', 'scores', 'discount_tiers'}
+        if unknown:
+            raise ValueError(f"Unknown wellness rules sections: {', '.join(sorted(unknown))}")
+
+        weights, scores, tiers = rules.get('weights'), rules.get('scores'), rules.get('discount_tiers')
+        for name, section in (('weights', weights), ('scores', scores), ('discount_tiers', tiers)):
+            if not isinstance(section, dict):
+                raise ValueError(f"Wellness rules need a '{name}' mapping")
+        for name, section in (('weights', weights), ('scores', scores)):
+            if set(section) != set(COMPONENTS):
+                raise ValueError(f"'{name}' must list exactly: {', '.join(COMPONENTS)}")
+
+        self.weights = {component: _number(weights[component], f"weights.{component}") for component in COMPONENTS}
+        self.weight_values = tuple(self.weights[component] for component in COMPONENTS)
+
+        self.tables = {}
+        for component in COMPONENTS:
+            spec = scores[component]
+            if not isinstance(spec, dict) or ('bands' in spec) == ('categories' in spec):
+                raise ValueError(f"scores.{component} needs either 'bands' or 'categories'")
+            if 'bands' in spec:
+                self.tables[component] = BandTable(spec['bands'], spec.get('default', 0),
+                                                   what=f"scores.{component}.bands")
+            else:
+                self.tables[component] = CategoryTable(spec['categories'], spec.get('default', 0),
+                                                       what=f"scores.{component}.categories")
+        self.bmi, self.exercise, self.diet, self.smoking, self.sleep, self.stress = (
+            self.tables[component] for component in COMPONENTS)
+        # Scalar scorers in COMPONENTS order
+        self.scorers = tuple(self.tables[component].score for component in COMPONENTS)
+
+        self.discount = BandTable(tiers.get('bands', []), tiers.get('default', 0), value_key='discount',
+                                  what='discount_tiers.bands')
+        self.discount_tiers = [(low, high, discount) for low, _, high, _, discount in self.discount.bands]
+        self.source = source
+        self.digest = digest
+
+# Compiled rules by file digest, oldest first; edits of a watched file add one entry each
+MAX_CACHED_RULES = 8
+_compiled_by_digest = {}
+_compiled_defaults = None
+_compiled_lock = threading.Lock()
+
+def default_rules():
+    """Compiled DEFAULT_RULES, built once"""
+    global _compiled_defaults
+    with _compiled_lock:
+        if _compiled_defaults is None:
+            _compiled_defaults = CompiledRules(DEFAULT_RULES)
+        return _compiled_defaults
+
+def load_rules(path):
+    """
+    Compile the YAML rules file at `path`; files with the same content share one
+    compiled instance. Raises ValueError if the rules are invalid.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    with _compiled_lock:
+        compiled = _compiled_by_digest.get(digest)
+    if compiled is not None:
+        return compiled
+
+    import yaml
+
+    try:
+        rules = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Could not parse wellness rules {path}: {e}") from e
+    compiled = CompiledRules(rules, source=path, digest=digest)
+    with _compiled_lock:
+        compiled = _compiled_by_digest.setdefault(digest, compiled)
+        while len(_compiled_by_digest) > MAX_CACHED_RULES:
+            del _compiled_by_digest[next(iter(_compiled_by_digest))]
+        return compiled
+
+class RulesWatcher:
+    """
+    Poll a rules file from a daemon thread and assign the recompiled rules to
+    `target.rules` when its content changes. The assignment swaps one reference, so
+    readers see either the old or the new rules. Invalid files are logged and ignored.
+    """
+
+    def __init__(self, target, path, interval=DEFAULT_RELOAD_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._target = weakref.ref(target)
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, name='wellness-rules-watcher', daemon=True).start()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """Reload now if the file changed; returns True if new rules were swapped in"""
+        signature = self._stat()
+        target = self._target()
+        if signature is None or signature == self._signature or target is None:
+            return False
+        self._signature = signature
+        try:
+            rules = load_rules(self.path)
+        except (OSError, ValueError) as e:
+            logger.error("Keeping the current wellness rules; could not load %s: %s", self.path, e)
+            return False
+        if rules is target.rules:
+            return False
+        target.rules = rules
+        logger.info("Reloaded wellness rules from %s (sha256 %s)", self.path, rules.digest[:12])
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self._target() is None:
+                return
+            self.check()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a wellness rules file or print the default rules")
+    parser.add_argument('path', nargs='?', help="YAML rules file to validate")
+    parser.add_argument('--dump-defaults', action='store_true', help="Print DEFAULT_RULES as YAML")
+    args = parser.parse_args(argv)
+
+    if args.dump_defaults:
+        import yaml
+        print(yaml.safe_dump(DEFAULT_RULES, sort_keys=False), end='')
+        return
+    if not args.path:
+        parser.error("Give a rules file to validate, or --dump-defaults")
+
+    try:
+        rules = load_rules(args.path)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Invalid wellness rules: {e}\n")
+    print(f"{args.path}: valid (sha256 {rules.digest})")
+    print("weights: " + ", ".join(f"{component}={weight}" for component, weight in rules.weights.items()))
+    for component, table in rules.tables.items():
+        if isinstance(table, BandTable):
+            print(f"{component}: breakpoints {table.edges}, default {table.default}")
+        else:
+            print(f"{component}: {table.mapping}, default {table.default}")
+    print("discount tiers: " + ", ".join(f"{low}-{high}: {discount}%" for low, high, discount in rules.discount_tiers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+What-if sensitivity surfaces for premium and wellness.
+
+Sweeps one or two dimensions of a member profile and quotes every point of
+the grid, plus the unchanged profile, with one batched model call and
+vectorized wellness scoring.
+"""
+import numpy as np
+import pandas as pd
+from bulk_quote import INPUT_COLUMNS, quote_members
+from utils.metrics import timed
+
+# Sweep values per dimension, matching the estimator's input ranges.
+# BMI steps by 0.1 so sweeps stay on the compiled premium table's grid.
+SWEEP_DIMENSIONS = {
+    'age': np.arange(18, 81),
+    'bmi': np.round(np.arange(150, 501) / 10, 1),
+    'exercise_freq': np.arange(0, 8),
+    'sleep_hours': np.arange(4, 13),
+    'smoker': np.array(['no', 'yes'], dtype=object),
+}
+
+SWEEP_LABELS = {
+    'age': 'Age',
+    'bmi': 'BMI',
+    'exercise_freq': 'Exercise (days/week)',
+    'sleep_hours': 'Sleep Hours',
+    'smoker': 'Smoker',
+}
+
+MAX_SWEEP_DIMENSIONS = 2
+
+def sweep_values(dimension, start=None, stop=None):
+    """Sweep values of a dimension, optionally limited to the closed range [start, stop]"""
+    values = SWEEP_DIMENSIONS[dimension]
+    if start is not None:
+        values = values[values >= start]
+    if stop is not None:
+        values = values[values <= stop]
+    return values
+
+@timed('what_if.surface')
+def what_if_surface(profile, sweeps, predictor, wellness_calc):
+    """
+    Quote every combination of swept values around a base profile.
+    `profile` holds every field of INPUT_COLUMNS; `sweeps` maps one or two of
+    SWEEP_DIMENSIONS to the values to try. Returns one row per grid point, with the
+    first swept dimension varying slowest, and the change in final premium relative
+    to the unchanged profile.
+    """
+    dimensions = list(sweeps)
+    if not 1 <= len(dimensions) <= MAX_SWEEP_DIMENSIONS:
+        raise ValueError(f"Sweep one or two dimensions, got {len(dimensions)}")
+    unknown = [dim for dim in dimensions if dim not in SWEEP_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Cannot sweep {', '.join(unknown)}; choose from {', '.join(SWEEP_DIMENSIONS)}")
+    missing = [col for col in INPUT_COLUMNS if col not in profile]
+    if missing:
+        raise ValueError(f"Profile is missing fields: {', '.join(missing)}")
+
+    grids = np.meshgrid(*[np.asarray(sweeps[dim]) for dim in dimensions], indexing='ij')
+    n_points = grids[0].size
+
+    # The last row is the unchanged profile, quoted in the same batch as the grid
+    members = pd.DataFrame({col: profile[col] for col in INPUT_COLUMNS}, index=pd.RangeIndex(n_points + 1))
+    for dim, grid in zip(dimensions, grids):
+        members[dim] = np.append(grid.ravel(), profile[dim])
+
+    quotes = quote_members(members, predictor, wellness_calc)
+    baseline = quotes.iloc[-1]
+
+    surface = pd.concat([members[dimensions], quotes], axis=1).iloc[:-1]
+    surface['final_premium_change'] = surface['final_premium'] - baseline['final_premium']
+    return surface